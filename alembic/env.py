@@ -29,6 +29,7 @@ import src.database.refresh_tokens  # noqa: F401,E402
 import src.database.checkpointer  # noqa: F401,E402
 import src.database.reactions  # noqa: F401,E402
 import src.database.password_resets  # noqa: F401,E402
+import src.database.thread_summaries  # noqa: F401,E402
 
 target_metadata = Base.metadata
 
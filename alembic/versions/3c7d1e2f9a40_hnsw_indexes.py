@@ -0,0 +1,65 @@
+"""hnsw indexes
+
+Revision ID: 3c7d1e2f9a40
+Revises: ec398c0cbc12
+Create Date: 2025-10-06 11:02:17.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.ai.config import config
+from src.ai.retrieval.index import create_hnsw_index_sql, hnsw_index_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c7d1e2f9a40"
+down_revision: Union[str, Sequence[str], None] = "ec398c0cbc12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _collections() -> list[tuple[str, str]]:
+    # The langchain_postgres tables are created by the library on first use,
+    # so a fresh database may not have them yet.
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("langchain_pg_embedding"):
+        return []
+    rows = bind.execute(sa.text("SELECT name, uuid FROM langchain_pg_collection"))
+    return [(row.name, str(row.uuid)) for row in rows]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    retrieval_config = config["retrieval"]
+    collections = _collections()
+    # Built CONCURRENTLY, outside the migration's transaction, so collections
+    # stay writable meanwhile. Tune and rebuild later with
+    # `python -m src.ai.retrieval.index build --rebuild`.
+    with op.get_context().autocommit_block():
+        for name, collection_id in collections:
+            op.execute(
+                create_hnsw_index_sql(
+                    name,
+                    collection_id,
+                    m=retrieval_config["hnsw"]["m"],
+                    ef_construction=retrieval_config["hnsw"]["ef_construction"],
+                    quantization=retrieval_config["quantization"],
+                )
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    quantization = config["retrieval"]["quantization"]
+    collections = _collections()
+    with op.get_context().autocommit_block():
+        for name, _ in collections:
+            op.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS "
+                f"{hnsw_index_name(name, quantization)}"
+            )
@@ -0,0 +1,51 @@
+"""answer cache
+
+Revision ID: 5a1f0b7c2d84
+Revises: 3c7d1e2f9a40
+Create Date: 2025-10-09 14:21:45.502113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a1f0b7c2d84"
+down_revision: Union[str, Sequence[str], None] = "3c7d1e2f9a40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIMENSIONS = 1536
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(
+        f"""
+        CREATE TABLE answer_cache (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            question text NOT NULL,
+            answer text NOT NULL,
+            embedding vector({DIMENSIONS}) NOT NULL,
+            collections_version integer NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_answer_cache_embedding_hnsw ON answer_cache "
+        "USING hnsw (embedding vector_cosine_ops)"
+    )
+    op.create_index(
+        "ix_answer_cache_collections_version", "answer_cache", ["collections_version"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_answer_cache_collections_version", table_name="answer_cache")
+    op.execute("DROP INDEX IF EXISTS ix_answer_cache_embedding_hnsw")
+    op.drop_table("answer_cache")
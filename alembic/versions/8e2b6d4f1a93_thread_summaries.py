@@ -0,0 +1,42 @@
+"""thread summaries
+
+Revision ID: 8e2b6d4f1a93
+Revises: 5a1f0b7c2d84
+Create Date: 2025-10-14 10:37:12.640591
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2b6d4f1a93"
+down_revision: Union[str, Sequence[str], None] = "5a1f0b7c2d84"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "thread_summaries",
+        sa.Column("thread_id", sa.String(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("last_message_id", sa.String(), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("thread_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("thread_summaries")
@@ -0,0 +1,83 @@
+"""auth token indexes
+
+Revision ID: b4d9e7a2c615
+Revises: 8e2b6d4f1a93
+Create Date: 2025-10-20 09:14:52.307118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4d9e7a2c615"
+down_revision: Union[str, Sequence[str], None] = "8e2b6d4f1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY so logins and refreshes are not blocked meanwhile,
+    # which needs to run outside the migration's transaction.
+    with op.get_context().autocommit_block():
+        # Lookups only ever want live tokens, so only those are indexed, and a
+        # hash can be live once.
+        op.create_index(
+            "ix_refresh_tokens_token_hash_active",
+            "refresh_tokens",
+            ["token_hash"],
+            unique=True,
+            postgresql_where=sa.text("revoked_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_password_resets_token_hash_unused",
+            "password_resets",
+            ["token_hash"],
+            unique=True,
+            postgresql_where=sa.text("used_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+        # Cleared once the email is verified.
+        op.create_index(
+            "ix_users_email_verification_token",
+            "users",
+            ["email_verification_token"],
+            postgresql_where=sa.text("email_verification_token IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        # User.get_by_email compares lower(email); the unique index on email
+        # cannot serve it.
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_email_lower", table_name="users", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_users_email_verification_token",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_password_resets_token_hash_unused",
+            table_name="password_resets",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_refresh_tokens_token_hash_active",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
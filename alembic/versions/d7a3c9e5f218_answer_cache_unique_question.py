@@ -0,0 +1,51 @@
+"""answer cache unique question
+
+Revision ID: d7a3c9e5f218
+Revises: b4d9e7a2c615
+Create Date: 2025-10-21 11:02:37.918264
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3c9e5f218"
+down_revision: Union[str, Sequence[str], None] = "b4d9e7a2c615"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the newest answer of each question, answer_cache.store upserts it
+    # from now on.
+    op.execute(
+        """
+        DELETE FROM answer_cache AS older
+        USING answer_cache AS newer
+        WHERE older.question = newer.question
+          AND older.collections_version = newer.collections_version
+          AND (older.created_at, older.id) < (newer.created_at, newer.id)
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_answer_cache_question_version",
+            "answer_cache",
+            ["question", "collections_version"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_answer_cache_question_version",
+            table_name="answer_cache",
+            postgresql_concurrently=True,
+        )
@@ -5,6 +5,7 @@ load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from src.cron_jobs.answer_cache import delete_expired_answers
 from src.cron_jobs.payments import delete_expired_subscriptions
 from src.cron_jobs.users import cleanup_unverified_accounts
 from datetime import datetime
@@ -13,9 +14,15 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from contextlib import asynccontextmanager
 
 from src.api.api import api_router  # noqa: E402
+from src.middleware.metrics_middleware import PrometheusMiddleware
+from src.middleware.profiling_middleware import ProfilingMiddleware
+from src.monitoring.metrics import make_metrics_app
+from src.monitoring.tracing import setup_tracing
 
 logger = logging.getLogger(__name__)
 
+setup_tracing()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     scheduler = AsyncIOScheduler()
@@ -31,6 +38,12 @@ async def lifespan(app: FastAPI):
         hours=12,
         next_run_time=datetime.now(UTC),
     )
+    scheduler.add_job(
+        func=delete_expired_answers,
+        trigger="interval",
+        hours=1,
+        next_run_time=datetime.now(UTC),
+    )
     scheduler.start()
     app.state.scheduler = scheduler
     yield
@@ -56,6 +69,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(PrometheusMiddleware)
 
 
 @app.get("/")
@@ -67,6 +82,7 @@ async def root():
 
 
 app.include_router(api_router, prefix="")
+app.mount("/metrics", make_metrics_app())
 
 
 if __name__ == "__main__":
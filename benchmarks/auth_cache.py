@@ -0,0 +1,121 @@
+"""Database queries and latency of resolving the authenticated user.
+
+Calls the ``get_current_user`` dependency for one verified user, with the
+principal cache in each state it can serve from, and counts the SQL
+statements it sends to Postgres (DATABASE_URL); Redis is used as configured::
+
+    python -m benchmarks.auth_cache --requests 500 --output auth_cache.json
+
+Phases: ``db`` invalidates the cache before every request (the cost of a
+miss), ``redis`` only clears this process' memory (another worker's hit),
+``local`` leaves the cache alone (the common case).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from sqlalchemy import delete, event  # noqa: E402
+
+from benchmarks.load_test import percentiles  # noqa: E402
+from src.cache.principal_cache import principal_cache  # noqa: E402
+from src.database.session import get_async_engine, get_session  # noqa: E402
+from src.database.users import User  # noqa: E402
+from src.middleware.auth_middleware import get_current_user  # noqa: E402
+from src.services.auth_service import PasswordService, TokenService  # noqa: E402
+
+EMAIL = "authbench@example.com"
+
+
+async def create_user() -> User:
+    async with get_session() as session:
+        await session.execute(delete(User).where(User.email == EMAIL))
+        user = User(
+            email=EMAIL,
+            name="Auth benchmark",
+            password_hash=await PasswordService.hash_password(uuid4().hex),
+            email_verified=True,
+        )
+        session.add(user)
+        await session.commit()
+    return user
+
+
+async def run_phase(phase: str, user: User, token: str, requests: int) -> dict:
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    # Warm up the connection pool and, for the cached phases, the cache.
+    await get_current_user(credentials)
+
+    engine = get_async_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    latencies = []
+    try:
+        for _ in range(requests):
+            if phase == "db":
+                await principal_cache.invalidate(user.id)
+            elif phase == "redis":
+                principal_cache.clear_local()
+            started = time.perf_counter()
+            await get_current_user(credentials)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    return {
+        "phase": phase,
+        "requests": requests,
+        "queries_per_request": statements / requests,
+        **percentiles(latencies),
+    }
+
+
+async def run(args) -> dict:
+    user = await create_user()
+    token, _ = TokenService.create_access_token(user.id, user.email)
+    try:
+        phases = [
+            await run_phase(phase, user, token, args.requests)
+            for phase in ("db", "redis", "local")
+        ]
+    finally:
+        await principal_cache.invalidate(user.id)
+        async with get_session() as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+    for result in phases:
+        print(
+            f"{result['phase']:>5}: {result['queries_per_request']:.2f} queries "
+            f"per request, p50={result['p50_ms']:.2f}ms "
+            f"p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms"
+        )
+    return {"phases": phases}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
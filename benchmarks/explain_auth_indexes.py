@@ -0,0 +1,126 @@
+"""Check that auth token and email lookups can use their indexes.
+
+Runs the model lookups against the database in DATABASE_URL, captures the
+SQL they send, and EXPLAINs it with sequential scans disabled, so the check
+holds on a small development database where the planner would otherwise
+prefer a scan. Exits with status 1 if a lookup does not use its index::
+
+    alembic upgrade head
+    python -m benchmarks.explain_auth_indexes --output explain.json
+
+Nothing is written to the database.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import event, text  # noqa: E402
+
+from src.database.password_resets import PasswordReset  # noqa: E402
+from src.database.refresh_tokens import RefreshToken  # noqa: E402
+from src.database.session import get_async_engine, get_session  # noqa: E402
+from src.database.users import User  # noqa: E402
+from src.services.auth_service import EmailTokenService, TokenService  # noqa: E402
+
+TOKEN = EmailTokenService.generate_secure_token()
+
+# Lookup, how to run it, and the index it must use.
+LOOKUPS = [
+    (
+        "RefreshToken.get_by_token_hash",
+        lambda session: RefreshToken.get_by_token_hash(
+            TokenService.hash_token(TOKEN), session
+        ),
+        "ix_refresh_tokens_token_hash_active",
+    ),
+    (
+        "PasswordReset.get_valid_token",
+        lambda session: PasswordReset.get_valid_token(
+            TokenService.hash_token(TOKEN), session
+        ),
+        "ix_password_resets_token_hash_unused",
+    ),
+    (
+        "User.get_by_verification_token",
+        lambda session: User.get_by_verification_token(TOKEN, session),
+        "ix_users_email_verification_token",
+    ),
+    (
+        "User.get_by_email",
+        lambda session: User.get_by_email("Explain@Example.com", session),
+        "ix_users_email_lower",
+    ),
+]
+
+
+def index_names(plan: dict) -> list[str]:
+    names = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(index_names(child))
+    return names
+
+
+async def explain(name, lookup, expected_index) -> dict:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = get_async_engine().sync_engine
+    async with get_session() as session:
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            await lookup(session)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        statement, parameters = statements[-1]
+        connection = await session.connection()
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        explained = result.scalar()
+        await session.rollback()
+
+    plan = (json.loads(explained) if isinstance(explained, str) else explained)[0]
+    used = index_names(plan["Plan"])
+    return {
+        "lookup": name,
+        "expected_index": expected_index,
+        "indexes_used": used,
+        "ok": expected_index in used,
+        "plan": plan["Plan"],
+    }
+
+
+async def run() -> list[dict]:
+    results = [await explain(*lookup) for lookup in LOOKUPS]
+    for result in results:
+        status = "ok" if result["ok"] else "MISSING"
+        used = ", ".join(result["indexes_used"]) or result["plan"]["Node Type"]
+        print(f"{status:>7}  {result['lookup']}: {used}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write plans as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
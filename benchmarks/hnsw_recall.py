@@ -0,0 +1,226 @@
+"""Recall vs latency of pgvector HNSW search at several corpus sizes.
+
+Runs against the database in DATABASE_URL using a scratch table filled with
+synthetic vectors, so it never touches real collections::
+
+    python -m benchmarks.hnsw_recall --sizes 10000 50000 100000 \
+        --ef-search 10 20 40 80 160 --quantization none halfvec binary \
+        --output hnsw.json --chart hnsw.png
+
+For every corpus size and index quantization the exact (sequential scan)
+top-k is compared with the HNSW top-k for each ef_search value, and the
+index size is reported to show the storage saving of quantization.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text  # noqa: E402
+
+from src.ai.config import config  # noqa: E402
+from src.ai.retrieval.vector_search import (  # noqa: E402
+    embedding_expression,
+    operator_class,
+    search_query,
+)
+from src.database.session import get_async_engine  # noqa: E402
+
+TABLE = "bench_hnsw_vectors"
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _seed(connection, size: int, dimensions: int) -> None:
+    await connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await connection.execute(
+        text(
+            f"CREATE UNLOGGED TABLE {TABLE} "
+            f"(id integer PRIMARY KEY, embedding vector({dimensions}))"
+        )
+    )
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO {TABLE}
+            SELECT i, (
+                SELECT array_agg(random() - 0.5)
+                FROM generate_series(1, {dimensions}) WHERE i > 0
+            )::vector
+            FROM generate_series(1, {size}) AS i
+            """
+        )
+    )
+    await connection.execute(text(f"ANALYZE {TABLE}"))
+
+
+async def _build_index(connection, args, quantization) -> int:
+    """(Re)build the HNSW index and return its size in bytes."""
+    await connection.execute(text(f"DROP INDEX IF EXISTS {TABLE}_hnsw"))
+    await connection.execute(text("SET maintenance_work_mem = '1GB'"))
+    await connection.execute(
+        text(
+            f"CREATE INDEX {TABLE}_hnsw ON {TABLE} USING hnsw ("
+            f"{embedding_expression(quantization, args.dimensions)} "
+            f"{operator_class(quantization)}) "
+            f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+        )
+    )
+    return await connection.scalar(text(f"SELECT pg_relation_size('{TABLE}_hnsw')"))
+
+
+async def _top_k(
+    connection, query: str, k: int, args, quantization=None
+) -> tuple[list[int], float]:
+    parameters = {"embedding": query, "k": k}
+    if quantization:
+        parameters["candidates"] = k * args.rescore_factor
+    started = time.perf_counter()
+    rows = await connection.execute(
+        text(
+            search_query(
+                table=TABLE,
+                where="TRUE",
+                columns="id",
+                quantization=quantization,
+                dimensions=args.dimensions,
+            )
+        ),
+        parameters,
+    )
+    ids = [row.id for row in rows]
+    return ids, (time.perf_counter() - started) * 1000
+
+
+async def run(args) -> list[dict]:
+    engine = get_async_engine().execution_options(isolation_level="AUTOCOMMIT")
+    results = []
+    async with engine.connect() as connection:
+        for size in args.sizes:
+            print(f"Seeding {size} vectors of {args.dimensions} dimensions...")
+            await _seed(connection, size, args.dimensions)
+            queries = [
+                row.q
+                for row in await connection.execute(
+                    text(
+                        f"SELECT (SELECT array_agg(random() - 0.5) "
+                        f"FROM generate_series(1, {args.dimensions}) WHERE i > 0)"
+                        "::vector::text AS q FROM generate_series(1, :n) AS i"
+                    ),
+                    {"n": args.queries},
+                )
+            ]
+
+            # No index exists yet, so this is the exact top-k.
+            exact = [(await _top_k(connection, q, args.k, args))[0] for q in queries]
+
+            for name in args.quantization:
+                quantization = None if name == "none" else name
+                index_bytes = await _build_index(connection, args, quantization)
+                for ef_search in args.ef_search:
+                    candidates = args.k * (args.rescore_factor if quantization else 1)
+                    await connection.execute(
+                        text(f"SET hnsw.ef_search = {max(ef_search, candidates)}")
+                    )
+                    latencies, recalls = [], []
+                    for query, truth in zip(queries, exact):
+                        ids, elapsed = await _top_k(
+                            connection, query, args.k, args, quantization
+                        )
+                        latencies.append(elapsed)
+                        recalls.append(len(set(ids) & set(truth)) / args.k)
+                    result = {
+                        "size": size,
+                        "quantization": name,
+                        "index_bytes": index_bytes,
+                        "ef_search": ef_search,
+                        "recall": statistics.mean(recalls),
+                        "p50_ms": percentile(latencies, 0.50),
+                        "p95_ms": percentile(latencies, 0.95),
+                    }
+                    results.append(result)
+                    print(
+                        f"size={size:>8} index={name:<8} "
+                        f"({index_bytes / 2**20:.1f} MiB) ef_search={ef_search:>4} "
+                        f"recall@{args.k}={result['recall']:.3f} "
+                        f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms"
+                    )
+
+        await connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    return results
+
+
+def chart(results: list[dict], path: str) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    figure, axis = plt.subplots()
+    for size, quantization in sorted({(r["size"], r["quantization"]) for r in results}):
+        points = [
+            r
+            for r in results
+            if r["size"] == size and r["quantization"] == quantization
+        ]
+        axis.plot(
+            [r["p95_ms"] for r in points],
+            [r["recall"] for r in points],
+            marker="o",
+            label=f"{size} vectors, {quantization}",
+        )
+        for r in points:
+            axis.annotate(str(r["ef_search"]), (r["p95_ms"], r["recall"]))
+    axis.set_xlabel("p95 latency, ms")
+    axis.set_ylabel("recall@k")
+    axis.legend()
+    figure.savefig(path)
+
+
+def main() -> None:
+    hnsw_config = config["retrieval"]["hnsw"]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument(
+        "--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160]
+    )
+    parser.add_argument("--m", type=int, default=hnsw_config["m"])
+    parser.add_argument(
+        "--ef-construction", type=int, default=hnsw_config["ef_construction"]
+    )
+    parser.add_argument(
+        "--quantization",
+        nargs="+",
+        choices=["none", "halfvec", "binary"],
+        default=["none"],
+    )
+    parser.add_argument(
+        "--rescore-factor", type=int, default=config["retrieval"]["rescore_factor"]
+    )
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--chart", help="Plot recall vs p95 to this image file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.chart:
+        chart(results, args.chart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Routing behaviour of RoutedChatModel against simulated providers.
+
+Each candidate is a fake streaming chat model with a configurable time to
+first token and failure rate. The scenario walks the primary through a
+healthy, slow, failing and recovered phase and reports, per phase, which
+candidate served the requests, the TTFT seen by the caller and how many
+failures reached the caller::
+
+    python -m benchmarks.llm_router --requests 50 --output router.json
+
+No provider is called and no environment is needed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.ai import router
+from src.ai.router import RoutedChatModel
+
+
+class ProviderError(Exception):
+    """Stands in for a 429 or 5xx response."""
+
+
+class SimulatedChatModel(BaseChatModel):
+    name: str
+    ttft_seconds: float = 0.2
+    failure_rate: float = 0.0
+    tokens: int = 20
+    seconds_per_token: float = 0.005
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        content = ""
+        async for chunk in self._astream(messages):
+            content += chunk.text
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator:
+        raise NotImplementedError
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft_seconds)
+        if random.random() < self.failure_rate:
+            raise ProviderError(f"{self.name}: 429 Too Many Requests")
+        for i in range(self.tokens):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=f"{self.name} "))
+            await asyncio.sleep(self.seconds_per_token)
+
+
+PHASES = {
+    "healthy": {"ttft_seconds": 0.2, "failure_rate": 0.0},
+    "slow": {"ttft_seconds": 1.5, "failure_rate": 0.0},
+    "failing": {"ttft_seconds": 0.2, "failure_rate": 0.8},
+    "recovered": {"ttft_seconds": 0.2, "failure_rate": 0.0},
+}
+
+
+async def request(model: RoutedChatModel) -> tuple[str | None, float]:
+    """Return the candidate that answered (None on failure) and caller TTFT."""
+    started = time.perf_counter()
+    ttft = None
+    served_by = None
+    try:
+        async for chunk in model.astream([HumanMessage("Що таке позовна давність?")]):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+                served_by = chunk.content.strip()
+    except ProviderError:
+        return None, time.perf_counter() - started
+    return served_by, ttft
+
+
+async def run(args) -> list[dict]:
+    random.seed(args.seed)
+    router._stats.clear()
+    primary = SimulatedChatModel(name="primary")
+    fallback = SimulatedChatModel(name="fallback", ttft_seconds=0.4)
+    model = RoutedChatModel(
+        purpose="chat",
+        names=["primary", "fallback"],
+        candidates=[primary, fallback],
+        window=args.window,
+        cooldown_seconds=args.cooldown,
+        first_token_timeout_seconds=args.first_token_timeout,
+    )
+
+    results = []
+    for phase, settings in PHASES.items():
+        for key, value in settings.items():
+            setattr(primary, key, value)
+
+        served, ttfts = Counter(), []
+        for _ in range(args.requests):
+            served_by, ttft = await request(model)
+            served[served_by or "error"] += 1
+            ttfts.append(ttft)
+
+        ordered = sorted(ttfts)
+        result = {
+            "phase": phase,
+            "served": dict(served),
+            "p50_ttft_ms": statistics.median(ttfts) * 1000,
+            "p95_ttft_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+        }
+        results.append(result)
+        print(
+            f"{phase:<10} served={dict(served)} "
+            f"p50={result['p50_ttft_ms']:.0f}ms p95={result['p95_ttft_ms']:.0f}ms"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--window", type=int, default=20)
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    parser.add_argument("--first-token-timeout", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""End-to-end load test of the chat path: message, stream, thread history.
+
+Drives a running API with an asyncio client. Each simulated user posts a
+message to ``/chat/message``, follows the answer on ``/chat/stream`` (with
+one or more concurrent viewers), then loads ``/thread``, for a number of
+turns in the same thread. Start the app against local Postgres and Redis
+with the fake providers so runs are reproducible and free::
+
+    FAKE_PROVIDERS=true uvicorn app:app --port 8000
+    python -m benchmarks.load_test --preset sse-fanout --output load.json
+
+Verified load-test users are created directly in the database from
+DATABASE_URL. Reported: throughput, time to first token and inter-token
+latency, p50/p95/p99 per endpoint, Redis commands per streamed chunk (from
+INFO commandstats) and the database connections in use (sampled from
+pg_stat_activity). The app and this script must share the Redis and
+Postgres instances for the last two.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import httpx  # noqa: E402
+from sqlalchemy import delete, select, text  # noqa: E402
+
+from src.cache.redis import get_redis  # noqa: E402
+from src.database.session import get_async_engine, get_session  # noqa: E402
+from src.database.users import User  # noqa: E402
+from src.services.auth_service import PasswordService, TokenService  # noqa: E402
+
+EMAIL_TEMPLATE = "loadtest+{index}@example.com"
+
+PRESETS = {
+    "baseline": {"users": 20, "turns": 3, "viewers": 1},
+    # Many clients watching the same answers, e.g. several open tabs.
+    "sse-fanout": {"users": 10, "turns": 2, "viewers": 20},
+    # Few users with long conversations: history loading and summaries.
+    "long-threads": {"users": 5, "turns": 40, "viewers": 1},
+}
+
+QUESTIONS = [
+    "Який строк позовної давності для стягнення боргу за договором позики?",
+    "Як оформити спадщину, якщо пропущено шестимісячний строк?",
+    "Чи може роботодавець звільнити працівника під час лікарняного?",
+    "Який порядок розірвання договору оренди квартири достроково?",
+]
+
+
+@dataclass
+class Results:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    ttft: list[float] = field(default_factory=list)
+    inter_token: list[float] = field(default_factory=list)
+    tokens: int = 0
+    turns: int = 0
+    errors: Counter = field(default_factory=Counter)
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        self.latencies.setdefault(endpoint, []).append(seconds)
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] * 1000
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+async def create_users(count: int) -> list[str]:
+    """Return access tokens of ``count`` verified load-test users."""
+    emails = [EMAIL_TEMPLATE.format(index=i) for i in range(count)]
+    async with get_session() as session:
+        existing = {
+            user.email: user
+            for user in await session.scalars(
+                select(User).where(User.email.in_(emails))
+            )
+        }
+        password_hash = await PasswordService.hash_password(uuid4().hex)
+        for index, email in enumerate(emails):
+            if email not in existing:
+                existing[email] = User(
+                    email=email,
+                    name=f"Load test {index}",
+                    password_hash=password_hash,
+                    email_verified=True,
+                )
+                session.add(existing[email])
+        await session.commit()
+    return [
+        TokenService.create_access_token(existing[email].id, email)[0]
+        for email in emails
+    ]
+
+
+async def delete_users(count: int) -> None:
+    emails = [EMAIL_TEMPLATE.format(index=i) for i in range(count)]
+    async with get_session() as session:
+        await session.execute(delete(User).where(User.email.in_(emails)))
+        await session.commit()
+
+
+async def redis_commands() -> Counter:
+    stats = await get_redis().info("commandstats")
+    return Counter(
+        {
+            name.removeprefix("cmdstat_"): values["calls"]
+            for name, values in stats.items()
+            if name != "cmdstat_info"
+        }
+    )
+
+
+async def sample_connections(samples: list[int], interval: float) -> None:
+    async with get_async_engine().connect() as connection:
+        while True:
+            samples.append(
+                await connection.scalar(
+                    text(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() "
+                        "AND pid <> pg_backend_pid()"
+                    )
+                )
+            )
+            await asyncio.sleep(interval)
+
+
+async def watch(
+    client: httpx.AsyncClient,
+    thread_id: str,
+    posted_at: float,
+    results: Results,
+    primary: bool,
+) -> None:
+    """Follow one stream until its end event, like a browser EventSource."""
+    started = time.perf_counter()
+    last_token_at = None
+    event, data = None, []
+    async with client.stream(
+        "GET", "/chat/stream", params={"thread_id": thread_id}
+    ) as response:
+        if response.status_code == 204:
+            results.errors["stream_not_found"] += 1
+            return
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line.removeprefix("event: ")
+            elif line.startswith("data: "):
+                data.append(line.removeprefix("data: "))
+            elif line == "" and event is not None:
+                payload = "\n".join(data)
+                if event == "chunk":
+                    now = time.perf_counter()
+                    if last_token_at is None:
+                        results.ttft.append(now - posted_at)
+                    else:
+                        results.inter_token.append(now - last_token_at)
+                    last_token_at = now
+                    if primary:
+                        results.tokens += 1
+                elif event == "system" and payload == "error":
+                    results.errors["generation_error"] += 1
+                elif event == "system" and payload == "end":
+                    break
+                event, data = None, []
+    results.record("GET /chat/stream", time.perf_counter() - started)
+
+
+async def session(
+    client: httpx.AsyncClient, token: str, args, results: Results
+) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    thread_id = str(uuid4())
+    for turn in range(args.turns):
+        question = QUESTIONS[turn % len(QUESTIONS)]
+        posted_at = time.perf_counter()
+        response = await client.post(
+            "/chat/message",
+            json={"message": question, "thread_id": thread_id},
+            headers=headers,
+        )
+        results.record("POST /chat/message", time.perf_counter() - posted_at)
+        if response.status_code != 200:
+            results.errors[f"message_{response.status_code}"] += 1
+            return
+
+        await asyncio.gather(
+            *(
+                watch(client, thread_id, posted_at, results, primary=viewer == 0)
+                for viewer in range(args.viewers)
+            )
+        )
+
+        started = time.perf_counter()
+        response = await client.get(
+            "/thread", params={"thread_id": thread_id}, headers=headers
+        )
+        results.record("GET /thread", time.perf_counter() - started)
+        if response.status_code != 200:
+            results.errors[f"thread_{response.status_code}"] += 1
+        results.turns += 1
+
+    if args.cleanup:
+        await client.delete("/thread", params={"thread_id": thread_id}, headers=headers)
+
+
+async def run(args) -> dict:
+    tokens = await create_users(args.users)
+    results = Results()
+    connections: list[int] = []
+    before = await redis_commands()
+
+    sampler = asyncio.create_task(sample_connections(connections, interval=0.5))
+    started = time.perf_counter()
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        timeout=httpx.Timeout(args.timeout),
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+    ) as client:
+        await asyncio.gather(
+            *(session(client, token, args, results) for token in tokens)
+        )
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    commands = await redis_commands() - before
+    if args.cleanup:
+        await delete_users(args.users)
+
+    report = {
+        "scenario": {
+            "preset": args.preset,
+            "users": args.users,
+            "turns": args.turns,
+            "viewers": args.viewers,
+        },
+        "elapsed_seconds": elapsed,
+        "turns_per_second": results.turns / elapsed,
+        "tokens_per_second": results.tokens / elapsed,
+        "ttft": percentiles(results.ttft),
+        "inter_token": percentiles(results.inter_token),
+        "endpoints": {
+            endpoint: {"requests": len(values), **percentiles(values)}
+            for endpoint, values in results.latencies.items()
+        },
+        "redis_commands_per_token": sum(commands.values()) / max(results.tokens, 1),
+        "redis_commands": dict(commands.most_common(10)),
+        "db_connections": {
+            "max": max(connections, default=0),
+            "mean": sum(connections) / max(len(connections), 1),
+        },
+        "errors": dict(results.errors),
+    }
+
+    print(
+        f"{results.turns} turns, {results.tokens} tokens in {elapsed:.1f}s "
+        f"({report['turns_per_second']:.2f} turns/s, "
+        f"{report['tokens_per_second']:.0f} tokens/s)"
+    )
+    for name in ("ttft", "inter_token"):
+        stats = report[name]
+        if stats:
+            print(
+                f"{name:<22} p50={stats['p50_ms']:.0f}ms "
+                f"p95={stats['p95_ms']:.0f}ms p99={stats['p99_ms']:.0f}ms"
+            )
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<22} p50={stats['p50_ms']:.0f}ms "
+            f"p95={stats['p95_ms']:.0f}ms p99={stats['p99_ms']:.0f}ms"
+        )
+    print(
+        f"redis commands/token={report['redis_commands_per_token']:.1f} "
+        f"db connections max={report['db_connections']['max']} "
+        f"mean={report['db_connections']['mean']:.1f} errors={report['errors']}"
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--preset", choices=PRESETS, default="baseline")
+    parser.add_argument("--users", type=int, help="Overrides the preset")
+    parser.add_argument("--turns", type=int, help="Overrides the preset")
+    parser.add_argument("--viewers", type=int, help="Overrides the preset")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Delete the threads and load-test users afterwards",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    for name, value in PRESETS[args.preset].items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Wall-clock saving of running the tool calls of one agent step concurrently.
+
+Drives the real agent graph with a scripted chat model that asks for a web
+search and a legal document search in the same step, against stand-in tools
+that sleep for a fixed latency::
+
+    python -m benchmarks.parallel_tools --turns 20 --fan-out 1 2 \
+        --latency tavily_search=0.8 SearchLegalDocuments=0.5
+
+Fan-out 1 is the sequential baseline.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from langchain_core.language_models.fake_chat_models import (  # noqa: E402
+    GenericFakeChatModel,
+)
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.tools import StructuredTool  # noqa: E402
+
+from src.ai.agent import GraphBuilder  # noqa: E402
+from src.ai.config import config  # noqa: E402
+
+
+class ScriptedChatModel(GenericFakeChatModel):
+    """Fake chat model replaying a fixed script; tools are accepted and ignored."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def make_tool(name: str, latency: float) -> StructuredTool:
+    async def call(query: str) -> str:
+        await asyncio.sleep(latency)
+        return f"{name} results for: {query}"
+
+    return StructuredTool.from_function(
+        coroutine=call, name=name, description=f"Stand-in for {name}"
+    )
+
+
+def script(tool_names: list[str]) -> list[AIMessage]:
+    """One step calling every tool at once, then the final answer."""
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": name,
+                    "args": {"query": "строк позовної давності"},
+                    "id": f"call_{i}",
+                }
+                for i, name in enumerate(tool_names)
+            ],
+        ),
+        AIMessage(content="Загальна позовна давність становить три роки."),
+    ]
+
+
+async def run_turns(latencies: dict[str, float], fan_out: int, turns: int) -> dict:
+    config["agent"]["max_parallel_tool_calls"] = fan_out
+    graph = GraphBuilder(
+        llm=ScriptedChatModel(messages=itertools.cycle(script(list(latencies)))),
+        store=None,
+        checkpointer=None,
+        tools=[make_tool(name, latency) for name, latency in latencies.items()],
+    ).get_graph()
+
+    durations, events = [], 0
+    for _ in range(turns):
+        started = time.perf_counter()
+        async for event in graph.astream(
+            {"messages": [HumanMessage(content="Який строк позовної давності?")]},
+            stream_mode="custom",
+        ):
+            events += event.get("type") == "tool_call"
+        durations.append(time.perf_counter() - started)
+
+    return {
+        "fan_out": fan_out,
+        "turns": turns,
+        "mean_s": statistics.mean(durations),
+        "max_s": max(durations),
+        "tool_call_events_per_turn": events / turns,
+    }
+
+
+def parse_latency(value: str) -> tuple[str, float]:
+    name, _, seconds = value.partition("=")
+    return name, float(seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--fan-out", type=int, nargs="+", default=[1, 2])
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        nargs="+",
+        default=[("tavily_search", 0.8), ("SearchLegalDocuments", 0.5)],
+        help="Tool latency as name=seconds",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    latencies = dict(args.latency)
+    results = []
+    for fan_out in args.fan_out:
+        result = asyncio.run(run_turns(latencies, fan_out, args.turns))
+        results.append(result)
+        print(
+            f"fan_out={fan_out:>2} mean={result['mean_s'] * 1000:.0f}ms "
+            f"max={result['max_s'] * 1000:.0f}ms "
+            f"tool_call events/turn={result['tool_call_events_per_turn']:.1f}"
+        )
+
+    baseline = next((r for r in results if r["fan_out"] == 1), None)
+    if baseline:
+        for result in results:
+            result["saving_s"] = baseline["mean_s"] - result["mean_s"]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"latencies": latencies, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
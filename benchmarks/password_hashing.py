@@ -0,0 +1,124 @@
+"""Event loop lag during a login storm, with bcrypt inline and on the pool.
+
+Verifies a password ``--logins`` times, ``--concurrency`` at a time, while a
+probe task sleeps in short intervals and records how late it wakes up: the
+delay every SSE stream and request on the worker would see. Run once with
+bcrypt called directly in the coroutine (how login worked before) and once
+through PasswordService, on the password hashing pool::
+
+    python -m benchmarks.password_hashing --logins 200 --concurrency 50
+    PASSWORD_HASH_WORKERS=2 python -m benchmarks.password_hashing --output pw.json
+
+Logins refused by the pool's overload policy (see AuthConfig) are counted as
+rejected. No database or Redis is needed.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import bcrypt  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+from benchmarks.load_test import percentiles  # noqa: E402
+from src.services.auth_service import AuthConfig, PasswordService  # noqa: E402
+
+PASSWORD = "Pravo-benchmark-1"
+PROBE_INTERVAL = 0.01
+
+
+async def verify_inline(hashed: str) -> bool:
+    return bcrypt.checkpw(PASSWORD.encode("utf-8"), hashed.encode("utf-8"))
+
+
+async def verify_pooled(hashed: str) -> bool:
+    return await PasswordService.verify_password(PASSWORD, hashed)
+
+
+async def probe(lags: list[float]) -> None:
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def storm(mode: str, hashed: str, logins: int, concurrency: int) -> dict:
+    verify = verify_inline if mode == "inline" else verify_pooled
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies: list[float] = []
+    rejected = 0
+
+    async def login() -> None:
+        nonlocal rejected
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await verify(hashed)
+            except HTTPException:
+                rejected += 1
+                return
+            login_latencies.append(time.perf_counter() - started)
+
+    lags: list[float] = []
+    probe_task = asyncio.create_task(probe(lags))
+    await asyncio.sleep(PROBE_INTERVAL * 5)
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    duration = time.perf_counter() - started
+    # Let the probe record the lag of the last blocking stretch.
+    await asyncio.sleep(PROBE_INTERVAL * 5)
+    probe_task.cancel()
+
+    return {
+        "mode": mode,
+        "logins": logins,
+        "rejected": rejected,
+        "logins_per_second": len(login_latencies) / duration,
+        "max_loop_lag_ms": max(lags) * 1000,
+        "loop_lag": percentiles(lags),
+        "login_latency": percentiles(login_latencies),
+    }
+
+
+async def run(args) -> dict:
+    hashed = await PasswordService.hash_password(PASSWORD)
+    results = [
+        await storm(mode, hashed, args.logins, args.concurrency)
+        for mode in ("inline", "pool")
+    ]
+    for result in results:
+        print(
+            f"{result['mode']:>6}: {result['logins_per_second']:.1f} logins/s, "
+            f"{result['rejected']} rejected, loop lag "
+            f"p50={result['loop_lag']['p50_ms']:.1f}ms "
+            f"p99={result['loop_lag']['p99_ms']:.1f}ms "
+            f"max={result['max_loop_lag_ms']:.1f}ms"
+        )
+    return {
+        "workers": AuthConfig.PASSWORD_HASH_WORKERS,
+        "overload": AuthConfig.PASSWORD_HASH_OVERLOAD,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
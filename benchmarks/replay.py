@@ -0,0 +1,161 @@
+"""Framework overhead per turn, replaying recorded conversations.
+
+Replays every cassette of a corpus (see src/ai/cassette.py) turn by turn
+through the real agent graph, consuming the stream the way
+generate_response does, and reports the time not spent in the recorded
+model and tool delays: graph construction, checkpointing, pre-model hook,
+tool node and message streaming::
+
+    python -m benchmarks.replay --speed 0 --repeat 5
+    python -m benchmarks.replay --checkpointer postgres --output replay.json
+
+With ``--speed 0`` (the default) the recorded delays are skipped and the
+whole turn is overhead; ``--speed 1`` keeps the original timing (timer
+slack of the replayed delays then also counts as overhead). The
+samples in benchmarks/data/cassettes are Ukrainian legal consultations;
+record more with CASSETTE_RECORD_DIR. Summarization runs in on_demand mode,
+so no database is needed unless the Postgres checkpointer (DATABASE_URL) is
+chosen. Assumes all tool calls of a turn run in one parallel step.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from langchain_core.messages import AIMessageChunk, HumanMessage  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+from src.ai import cassette  # noqa: E402
+from src.ai.agent import GraphBuilder  # noqa: E402
+from src.ai.config import config  # noqa: E402
+
+
+@asynccontextmanager
+async def open_checkpointer(kind: str):
+    if kind == "memory":
+        yield InMemorySaver()
+        return
+
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+    from src.database.config import db_config
+
+    async with AsyncPostgresSaver.from_conn_string(
+        conn_string=db_config.connection_string,
+    ) as checkpointer:
+        await checkpointer.setup()
+        yield checkpointer
+
+
+async def replay_turn(turn: dict, thread_id: str, checkpointer, speed: float) -> dict:
+    llm = cassette.ReplayChatModel(llm_calls=turn["llm_calls"], speed=speed)
+    tools = cassette.replay_tools(turn, speed=speed)
+
+    started = time.perf_counter()
+    graph = GraphBuilder(
+        llm=llm, store=None, checkpointer=checkpointer, tools=tools
+    ).get_graph()
+    built = time.perf_counter()
+
+    chunks = tool_events = 0
+    async for mode, payload in graph.astream(
+        {"messages": HumanMessage(content=turn["message"])},
+        {"configurable": {"thread_id": thread_id}},
+        stream_mode=["messages", "custom"],
+    ):
+        if mode == "custom":
+            tool_events += payload.get("type") == "tool_call"
+            continue
+        chunk, metadata = payload
+        if (
+            isinstance(chunk, AIMessageChunk)
+            and chunk.content
+            and metadata.get("langgraph_node", "") == "agent"
+        ):
+            chunks += 1
+    finished = time.perf_counter()
+
+    waited = llm.waited_seconds + max(
+        (tool.waited_seconds for tool in tools), default=0.0
+    )
+    return {
+        "build_seconds": built - started,
+        "run_seconds": finished - built,
+        "overhead_seconds": finished - started - waited,
+        "chunks": chunks,
+        "tool_call_events": tool_events,
+    }
+
+
+async def run(args) -> dict:
+    config["summarization"]["mode"] = "on_demand"
+    corpus = cassette.load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No cassettes in {args.corpus}")
+
+    turns = []
+    async with open_checkpointer(args.checkpointer) as checkpointer:
+        for _ in range(args.repeat):
+            for recorded in corpus:
+                thread_id = str(uuid4())
+                for index, turn in enumerate(recorded["turns"]):
+                    result = await replay_turn(
+                        turn, thread_id, checkpointer, args.speed
+                    )
+                    turns.append({"thread_turn": index, **result})
+                if args.checkpointer == "postgres":
+                    await checkpointer.adelete_thread(thread_id)
+
+    overheads = sorted(t["overhead_seconds"] for t in turns)
+    chunks = sum(t["chunks"] for t in turns)
+    report = {
+        "cassettes": len(corpus),
+        "turns": len(turns),
+        "checkpointer": args.checkpointer,
+        "speed": args.speed,
+        "p50_overhead_ms": statistics.median(overheads) * 1000,
+        "p95_overhead_ms": overheads[int(0.95 * (len(overheads) - 1))] * 1000,
+        "mean_overhead_ms": statistics.mean(overheads) * 1000,
+        "mean_build_ms": statistics.mean(t["build_seconds"] for t in turns) * 1000,
+        "overhead_per_chunk_us": sum(overheads) / max(chunks, 1) * 1e6,
+        "results": turns,
+    }
+    print(
+        f"{report['turns']} turns from {report['cassettes']} cassettes "
+        f"({args.checkpointer}, speed={args.speed}): "
+        f"overhead p50={report['p50_overhead_ms']:.1f}ms "
+        f"p95={report['p95_overhead_ms']:.1f}ms "
+        f"mean={report['mean_overhead_ms']:.1f}ms "
+        f"(graph build {report['mean_build_ms']:.1f}ms), "
+        f"{report['overhead_per_chunk_us']:.0f}us per chunk"
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default="benchmarks/data/cassettes")
+    parser.add_argument("--speed", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--checkpointer", choices=["memory", "postgres"], default="memory"
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Offline retrieval quality and latency benchmark.
+
+Seeds a dedicated collection in the local Postgres from DATABASE_URL with a
+labelled Ukrainian legal corpus, embeds it with a deterministic hashing model
+and compares retrieval strategies without calling any provider::
+
+    python -m benchmarks.retrieval --output retrieval.json \
+        --quantization none halfvec binary
+
+Reported per strategy: recall@k, MRR, p50/p95 latency and the number of LLM
+and embedding calls per query. Results are written as JSON so runs can be
+diffed against each other.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import subprocess
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from langchain.retrievers.multi_query import MultiQueryRetriever  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+from langchain_postgres import PGVector  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from src.ai.config import config  # noqa: E402
+from src.ai.fake import HashingEmbeddings  # noqa: E402
+from src.ai.retrieval.index import build_hnsw_index, hnsw_index_name  # noqa: E402
+from src.ai.retrieval.search import retrieve  # noqa: E402
+from src.ai.retrieval.vector_search import similarity_search_with_score  # noqa: E402
+from src.database.config import db_config  # noqa: E402
+from src.database.session import get_async_engine  # noqa: E402
+
+DATA_DIR = Path(__file__).parent / "data"
+COLLECTION = "benchmark_constitution"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class DeterministicQueryGenerator:
+    """Stand-in for the query generation LLM producing fixed rewrites."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def _generate(self, input: dict[str, str]) -> list[str]:
+        self.calls += 1
+        words = _WORD_RE.findall(input["question"].lower())
+        stems = [word[:5] for word in words if len(word) > 3]
+        return [
+            " ".join(words),
+            " ".join(stems),
+            " ".join(words[len(words) // 2 :]),
+            " ".join(words[: len(words) // 2 + 1]),
+            " ".join(sorted(set(stems))),
+        ]
+
+    def as_runnable(self) -> RunnableLambda:
+        return RunnableLambda(self._generate)
+
+
+def load_jsonl(name: str) -> list[dict]:
+    with open(DATA_DIR / name, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+async def seed(embeddings: Embeddings) -> int:
+    corpus = load_jsonl("constitution_corpus.jsonl")
+    store = PGVector(
+        embeddings=embeddings,
+        collection_name=COLLECTION,
+        connection=db_config.langchain_connection_string,
+        use_jsonb=True,
+        async_mode=True,
+        pre_delete_collection=True,
+    )
+    await store.aadd_documents(
+        [
+            Document(
+                page_content=item["text"],
+                metadata={
+                    "article": item["article"],
+                    "chunk_index": item["chunk_index"],
+                },
+            )
+            for item in corpus
+        ],
+        ids=[item["id"] for item in corpus],
+    )
+    return len(corpus)
+
+
+async def build_index(quantization) -> int:
+    hnsw_config = config["retrieval"]["hnsw"]
+    engine = get_async_engine().execution_options(isolation_level="AUTOCOMMIT")
+    async with engine.connect() as connection:
+        await build_hnsw_index(
+            connection,
+            COLLECTION,
+            m=hnsw_config["m"],
+            ef_construction=hnsw_config["ef_construction"],
+            quantization=quantization,
+            rebuild=True,
+        )
+        return await connection.scalar(
+            text("SELECT pg_relation_size(CAST(:name AS regclass))"),
+            {"name": hnsw_index_name(COLLECTION, quantization)},
+        )
+
+
+def score(documents: list[Document], relevant: set[int], k: int) -> tuple[float, float]:
+    """Recall@k over relevant articles and reciprocal rank of the first hit."""
+    articles = [(doc.metadata or {}).get("article") for doc in documents[:k]]
+    recall = len(relevant & set(articles)) / len(relevant)
+    reciprocal_rank = next(
+        (1.0 / rank for rank, a in enumerate(articles, 1) if a in relevant), 0.0
+    )
+    return recall, reciprocal_rank
+
+
+async def run_strategy(name, search, queries, k, embeddings, generator) -> dict:
+    embeddings.calls = generator.calls = 0
+    latencies, recalls, reciprocal_ranks = [], [], []
+    for item in queries:
+        started = time.perf_counter()
+        documents = await search(item["query"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        recall, reciprocal_rank = score(documents, set(item["relevant_articles"]), k)
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+
+    return {
+        "strategy": name,
+        f"recall@{k}": statistics.mean(recalls),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "llm_calls_per_query": generator.calls / len(queries),
+        "embedding_calls_per_query": embeddings.calls / len(queries),
+    }
+
+
+async def run(args) -> dict:
+    retrieval_config = config["retrieval"]
+    embeddings = HashingEmbeddings(config["embeddings"]["dimensions"])
+    generator = DeterministicQueryGenerator()
+    queries = load_jsonl("constitution_queries.jsonl")
+    corpus_size = await seed(embeddings)
+    k = args.k
+
+    async def vector(query: str) -> list[Document]:
+        embedding = await embeddings.aembed_query(query)
+        results = await similarity_search_with_score(
+            COLLECTION,
+            embedding,
+            k=k,
+            ef_search=retrieval_config["hnsw"]["ef_search"],
+            quantization=retrieval_config["quantization"],
+            rescore_factor=retrieval_config["rescore_factor"],
+        )
+        return [doc for doc, _ in results]
+
+    async def fused(query: str) -> list[Document]:
+        results = await retrieve(
+            query,
+            [COLLECTION],
+            query_generator=generator.as_runnable(),
+            embeddings_model=embeddings,
+        )
+        return [doc for doc, _ in results]
+
+    legacy = MultiQueryRetriever(
+        retriever=PGVector(
+            embeddings=embeddings,
+            collection_name=COLLECTION,
+            connection=db_config.langchain_connection_string,
+            use_jsonb=True,
+            async_mode=True,
+        ).as_retriever(search_kwargs={"k": retrieval_config["k"]}),
+        llm_chain=generator.as_runnable(),
+    )
+
+    results = []
+    for name in args.quantization:
+        quantization = None if name == "none" else name
+        retrieval_config["quantization"] = quantization
+        index_bytes = await build_index(quantization)
+        strategies = {"vector": vector, "fused": fused}
+        if quantization is None:
+            strategies["multi_query_retriever"] = legacy.ainvoke
+        for strategy, search in strategies.items():
+            result = await run_strategy(
+                strategy, search, queries, k, embeddings, generator
+            )
+            result.update(quantization=name, index_bytes=index_bytes)
+            results.append(result)
+            print(
+                f"{strategy:<22} index={name:<8} "
+                f"recall@{k}={result[f'recall@{k}']:.3f} mrr={result['mrr']:.3f} "
+                f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms "
+                f"llm={result['llm_calls_per_query']:.1f} "
+                f"embed={result['embedding_calls_per_query']:.1f}"
+            )
+
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "run": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "commit": commit,
+            "k": k,
+            "corpus_size": corpus_size,
+            "queries": len(queries),
+            "retrieval_config": {
+                key: value
+                for key, value in retrieval_config.items()
+                if key != "quantization"
+            },
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument(
+        "--quantization",
+        nargs="+",
+        choices=["none", "halfvec", "binary"],
+        default=["none"],
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
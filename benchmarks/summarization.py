@@ -0,0 +1,241 @@
+"""Prompt size and time to first token on long threads, by summarization mode.
+
+Replays a synthetic consultation turn by turn (question, legal document
+search, answer) against simulated models whose latency grows with the
+prompt, and compares:
+
+- on_demand: langmem's asummarize_messages with the SummarizationNode
+  settings, run inside the turn before the model call;
+- incremental: the stored rolling summary plus the recent messages, with the
+  summary advanced after each turn (reported as background time)::
+
+    python -m benchmarks.summarization --turns 60 --output summarization.json
+
+No provider or database is used.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any
+from uuid import uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import (  # noqa: E402
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import (  # noqa: E402
+    ChatGeneration,
+    ChatGenerationChunk,
+    ChatResult,
+)
+from langmem.short_term import asummarize_messages  # noqa: E402
+
+from src.ai import summary  # noqa: E402
+from src.ai.config import config  # noqa: E402
+from src.ai.tokens import approx_token_count, token_counter  # noqa: E402
+
+WORDS = "позивач відповідач договір строк позовна давність стаття кодекс суд".split()
+
+
+def filler(tokens: int) -> str:
+    words = []
+    while approx_token_count(" ".join(words)) < tokens:
+        words.append(WORDS[len(words) % len(WORDS)])
+    return " ".join(words)
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Latency of base_seconds plus prefill of the prompt plus decoding."""
+
+    base_seconds: float = 0.2
+    prefill_tokens_per_second: float = 200_000
+    decode_tokens_per_second: float = 2_000
+    output_tokens: int = 300
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def _prefill_seconds(self, messages) -> float:
+        return self.base_seconds + (
+            token_counter(messages) / self.prefill_tokens_per_second
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(
+            self._prefill_seconds(messages)
+            + self.output_tokens / self.decode_tokens_per_second
+        )
+        message = AIMessage(content=filler(self.output_tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self._prefill_seconds(messages))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="Відповідь"))
+
+
+def turn(index: int, tool_tokens: int, answer_tokens: int) -> list:
+    """Question, the search the agent runs for it, its result and the answer."""
+    call_id = f"call_{index}"
+    return [
+        HumanMessage(f"Питання {index}: {filler(60)}", id=str(uuid4())),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "SearchLegalDocuments",
+                    "args": {"query": filler(15)},
+                    "id": call_id,
+                }
+            ],
+            id=str(uuid4()),
+        ),
+        ToolMessage(
+            filler(tool_tokens),
+            name="SearchLegalDocuments",
+            tool_call_id=call_id,
+            id=str(uuid4()),
+        ),
+        AIMessage(filler(answer_tokens), id=str(uuid4())),
+    ]
+
+
+async def ttft(model: SimulatedChatModel, prompt: list) -> float:
+    started = time.perf_counter()
+    async for _ in model.astream(prompt):
+        break
+    return time.perf_counter() - started
+
+
+async def run_on_demand(args, chat_model, summarizer) -> list[dict]:
+    history, running_summary, results = [], None, []
+    for index in range(args.turns):
+        question, *rest = turn(index, args.tool_tokens, args.answer_tokens)
+        history.append(question)
+
+        started = time.perf_counter()
+        result = await asummarize_messages(
+            history,
+            running_summary=running_summary,
+            model=summarizer,
+            max_tokens=args.max_prompt_tokens,
+            max_tokens_before_summary=None,
+            max_summary_tokens=8_000,
+            token_counter=token_counter,
+        )
+        stall = time.perf_counter() - started
+        running_summary = result.running_summary
+
+        results.append(
+            {
+                "turn": index,
+                "prompt_tokens": token_counter(result.messages),
+                "ttft": stall + await ttft(chat_model, result.messages),
+                "background_seconds": 0.0,
+            }
+        )
+        history.extend(rest)
+    return results
+
+
+async def run_incremental(args, chat_model, summarizer) -> list[dict]:
+    history, rolling, results = [], None, []
+    for index in range(args.turns):
+        question, *rest = turn(index, args.tool_tokens, args.answer_tokens)
+        history.append(question)
+
+        prompt = summary.build_prompt(history, rolling, args.max_prompt_tokens)
+        first_token = await ttft(chat_model, prompt)
+        history.extend(rest)
+
+        started = time.perf_counter()
+        rolling = (
+            await summary.advance(summarizer, "benchmark", history, rolling) or rolling
+        )
+        results.append(
+            {
+                "turn": index,
+                "prompt_tokens": token_counter(prompt),
+                "ttft": first_token,
+                "background_seconds": time.perf_counter() - started,
+            }
+        )
+    return results
+
+
+def report(mode: str, results: list[dict]) -> dict:
+    ttfts = sorted(r["ttft"] for r in results)
+    late = results[len(results) // 2 :]
+    aggregate = {
+        "mode": mode,
+        "max_prompt_tokens": max(r["prompt_tokens"] for r in results),
+        "mean_prompt_tokens_second_half": statistics.mean(
+            r["prompt_tokens"] for r in late
+        ),
+        "p50_ttft_ms": statistics.median(ttfts) * 1000,
+        "p95_ttft_ms": ttfts[int(0.95 * (len(ttfts) - 1))] * 1000,
+        "max_ttft_ms": ttfts[-1] * 1000,
+        "background_seconds": sum(r["background_seconds"] for r in results),
+        "turns": results,
+    }
+    print(
+        f"{mode:<12} max_prompt={aggregate['max_prompt_tokens']:>7} "
+        f"p50={aggregate['p50_ttft_ms']:.0f}ms p95={aggregate['p95_ttft_ms']:.0f}ms "
+        f"max={aggregate['max_ttft_ms']:.0f}ms "
+        f"background={aggregate['background_seconds']:.1f}s"
+    )
+    return aggregate
+
+
+async def run(args) -> list[dict]:
+    config["summarization"]["keep_last_messages"] = args.keep_last_messages
+    chat_model = SimulatedChatModel(
+        prefill_tokens_per_second=args.prefill_tokens_per_second
+    )
+    summarizer = SimulatedChatModel(
+        prefill_tokens_per_second=args.prefill_tokens_per_second,
+        output_tokens=args.summary_tokens,
+    )
+    return [
+        report("on_demand", await run_on_demand(args, chat_model, summarizer)),
+        report("incremental", await run_incremental(args, chat_model, summarizer)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--tool-tokens", type=int, default=3_000)
+    parser.add_argument("--answer-tokens", type=int, default=600)
+    parser.add_argument("--summary-tokens", type=int, default=800)
+    parser.add_argument("--max-prompt-tokens", type=int, default=170_000)
+    parser.add_argument(
+        "--keep-last-messages",
+        type=int,
+        default=config["summarization"]["keep_last_messages"],
+    )
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=200_000)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Per-turn cost of counting a thread history's tokens.
+
+Compares, for threads of 100 and 1000 messages:
+
+- recount: langchain's count_tokens_approximately over the whole history,
+  what the pre-model hook paid on every model call before;
+- cached: MessageTokenCounter with every message already counted;
+- incremental: MessageTokenCounter.count_history after one new turn (four
+  messages) has been appended, the steady state of a live thread::
+
+    python -m benchmarks.token_counting --sizes 100 1000 --repeat 200
+
+No environment is needed.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from uuid import uuid4
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from src.ai.tokens import MessageTokenCounter
+
+
+def turn(index: int) -> list:
+    call_id = f"call_{index}"
+    return [
+        HumanMessage("Який строк позовної давності? " * 5, id=str(uuid4())),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "SearchLegalDocuments",
+                    "args": {"query": "строк позовної давності"},
+                    "id": call_id,
+                }
+            ],
+            id=str(uuid4()),
+        ),
+        ToolMessage(
+            "Стаття 257. Загальна позовна давність. " * 200,
+            tool_call_id=call_id,
+            id=str(uuid4()),
+        ),
+        AIMessage(
+            "Загальна позовна давність становить три роки. " * 30, id=str(uuid4())
+        ),
+    ]
+
+
+def history(size: int) -> list:
+    messages = []
+    while len(messages) < size:
+        messages.extend(turn(len(messages)))
+    return messages[:size]
+
+
+def timed(call, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run(size: int, repeat: int) -> dict:
+    messages = history(size)
+
+    recount = timed(lambda: count_tokens_approximately(messages), repeat)
+
+    counter = MessageTokenCounter()
+    counter(messages)
+    cached = timed(lambda: counter(messages), repeat)
+
+    counter = MessageTokenCounter()
+    live = list(messages)
+    counter.count_history(live)
+    incremental = []
+    for index in range(repeat):
+        live.extend(turn(size + index))
+        incremental += timed(lambda: counter.count_history(live), 1)
+
+    result = {
+        "messages": size,
+        "recount_us": statistics.median(recount) * 1e6,
+        "cached_us": statistics.median(cached) * 1e6,
+        "incremental_us": statistics.median(incremental) * 1e6,
+    }
+    print(
+        f"{size:>5} messages  recount={result['recount_us']:8.1f}us  "
+        f"cached={result['cached_us']:8.1f}us  "
+        f"incremental={result['incremental_us']:6.1f}us"
+    )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [run(size, args.repeat) for size in args.sizes]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Gunicorn settings.
+
+Workers share their Prometheus metrics through files in
+PROMETHEUS_MULTIPROC_DIR, which must be set before prometheus_client is
+imported anywhere, so it is set here, in the master, and inherited by the
+workers. /metrics then reports the sum over all workers.
+"""
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "pravo-prometheus"),
+)
+
+
+def on_starting(server):
+    # Files left by a previous run would be counted again.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
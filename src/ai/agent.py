@@ -1,30 +1,53 @@
+from langchain_core.tools import BaseTool
 from langgraph.prebuilt import create_react_agent
-from langmem.short_term import SummarizationNode
+from src.ai.config import config
 from src.ai.tools.web_search import tool as web_search_tool
 from src.ai.tools.similarity_search import tool as similarity_search_tool
 from src.ai.prompt import SYSTEM_PROMPT
+from src.ai.summary import OnDemandSummarizationNode, rolling_summary_hook
+from src.ai.tokens import token_counter
+from src.ai.tools.resilience import with_resilience
+from src.ai.tools.tool_node import ParallelToolNode
+
+
+def get_tools() -> list[BaseTool]:
+    return [
+        with_resilience(web_search_tool),
+        with_resilience(similarity_search_tool),
+    ]
 
 
 class GraphBuilder:
-    def __init__(self, llm, store, checkpointer):
+    def __init__(self, llm, store, checkpointer, tools: list[BaseTool] | None = None):
         self.llm = llm
         self.store = store
         self.checkpointer = checkpointer
+        self.tools = tools
 
-    def get_graph(self):
-        summarization_node = SummarizationNode(
+    def get_pre_model_hook(self):
+        summarization = config["summarization"]
+        if summarization["mode"] == "incremental":
+            return rolling_summary_hook
+        return OnDemandSummarizationNode(
             model=self.llm,
-            max_tokens=170_000,
+            max_tokens=summarization["max_prompt_tokens"],
             max_tokens_before_summary=None,
             max_summary_tokens=8_000,
+            token_counter=token_counter,
             input_messages_key="messages",
             output_messages_key="summarized_messages",
         )
+
+    def get_graph(self):
+        tool_node = ParallelToolNode(
+            self.tools if self.tools is not None else get_tools(),
+            max_parallel_calls=config["agent"]["max_parallel_tool_calls"],
+        )
         agent = create_react_agent(
             model=self.llm,
-            tools=[web_search_tool, similarity_search_tool],
+            tools=tool_node,
             prompt=SYSTEM_PROMPT,
-            pre_model_hook=summarization_node,
+            pre_model_hook=self.get_pre_model_hook(),
             store=self.store,
             checkpointer=self.checkpointer,
         )
@@ -0,0 +1,170 @@
+"""Cache of answers to first-turn questions.
+
+Two tiers, both scoped to the current collections version so that
+re-ingesting the legal collections invalidates every cached answer:
+
+- exact: Redis, keyed by the normalized question text;
+- semantic: the ``answer_cache`` Postgres table, matched by cosine
+  similarity of question embeddings above ``similarity_threshold``.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import text
+
+from src.ai.config import config, get_embeddings_model
+from src.ai.retrieval.vector_search import format_vector
+from src.cache.redis import get_redis
+from src.database.session import get_async_engine
+from src.monitoring.metrics import ANSWER_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "answer_cache:collections_version"
+TABLE = "answer_cache"
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    tier: Literal["exact", "semantic"]
+
+
+def normalize_question(question: str) -> str:
+    question = " ".join(question.lower().split())
+    return re.sub(r"[\s?!.,;:]+$", "", question)
+
+
+def _exact_key(version: int, question: str) -> str:
+    digest = hashlib.sha256(question.encode("utf-8")).hexdigest()
+    return f"answer_cache:{version}:{digest}"
+
+
+async def get_collections_version() -> int:
+    return int(await get_redis().get(VERSION_KEY) or 0)
+
+
+async def bump_collections_version() -> int:
+    """Invalidate all cached answers; call after re-ingesting collections."""
+    version = await get_redis().incr(VERSION_KEY)
+    async with get_async_engine().begin() as connection:
+        await connection.execute(
+            text(f"DELETE FROM {TABLE} WHERE collections_version < :version"),
+            {"version": version},
+        )
+    logger.info(f"Answer cache invalidated, collections version {version}")
+    return version
+
+
+async def delete_expired() -> int:
+    """Delete answers older than the TTL; returns how many were deleted."""
+    async with get_async_engine().begin() as connection:
+        result = await connection.execute(
+            text(
+                f"DELETE FROM {TABLE} "
+                "WHERE created_at < now() - make_interval(secs => :ttl)"
+            ),
+            {"ttl": config["answer_cache"]["ttl_seconds"]},
+        )
+    return result.rowcount
+
+
+def is_cacheable(question: str) -> bool:
+    answer_config = config["answer_cache"]
+    return answer_config["enabled"] and (
+        0 < len(question.strip()) <= answer_config["max_question_chars"]
+    )
+
+
+async def _semantic_lookup(version: int, embedding: list[float]) -> str | None:
+    answer_config = config["answer_cache"]
+    async with get_async_engine().connect() as connection:
+        row = (
+            await connection.execute(
+                text(
+                    f"""
+                    SELECT answer,
+                           1 - (embedding <=> CAST(CAST(:embedding AS text) AS vector))
+                               AS similarity
+                    FROM {TABLE}
+                    WHERE collections_version = :version
+                      AND created_at > now() - make_interval(secs => :ttl)
+                    ORDER BY embedding <=> CAST(CAST(:embedding AS text) AS vector)
+                    LIMIT 1
+                    """
+                ),
+                {
+                    "embedding": format_vector(embedding),
+                    "version": version,
+                    "ttl": answer_config["ttl_seconds"],
+                },
+            )
+        ).first()
+
+    if row is None or row.similarity < answer_config["similarity_threshold"]:
+        return None
+    return row.answer
+
+
+async def lookup(question: str) -> CachedAnswer | None:
+    version = await get_collections_version()
+    normalized = normalize_question(question)
+
+    cached = await get_redis().get(_exact_key(version, normalized))
+    if cached:
+        ANSWER_CACHE_REQUESTS.labels("exact").inc()
+        return CachedAnswer(answer=json.loads(cached)["answer"], tier="exact")
+
+    embedding = await get_embeddings_model().aembed_query(normalized)
+    answer = await _semantic_lookup(version, embedding)
+    if answer is not None:
+        ANSWER_CACHE_REQUESTS.labels("semantic").inc()
+        # Promote to the exact tier so a repeat skips the embeddings call.
+        await _store_exact(version, normalized, answer)
+        return CachedAnswer(answer=answer, tier="semantic")
+
+    ANSWER_CACHE_REQUESTS.labels("miss").inc()
+    return None
+
+
+async def _store_exact(version: int, normalized: str, answer: str) -> None:
+    await get_redis().set(
+        _exact_key(version, normalized),
+        json.dumps({"answer": answer}, ensure_ascii=False),
+        ex=config["answer_cache"]["ttl_seconds"],
+    )
+
+
+async def store(question: str, answer: str) -> None:
+    version = await get_collections_version()
+    normalized = normalize_question(question)
+    await _store_exact(version, normalized, answer)
+
+    embedding = await get_embeddings_model().aembed_query(normalized)
+    async with get_async_engine().begin() as connection:
+        await connection.execute(
+            text(
+                f"""
+                INSERT INTO {TABLE} (question, answer, embedding, collections_version)
+                VALUES (
+                    :question, :answer,
+                    CAST(CAST(:embedding AS text) AS vector), :version
+                )
+                ON CONFLICT (question, collections_version) DO UPDATE
+                SET answer = EXCLUDED.answer,
+                    embedding = EXCLUDED.embedding,
+                    created_at = now()
+                """
+            ),
+            {
+                "question": normalized,
+                "answer": answer,
+                "embedding": format_vector(embedding),
+                "version": version,
+            },
+        )
@@ -0,0 +1,307 @@
+"""Record agent runs to cassettes and replay them without providers.
+
+``CassetteRecorder`` is a callback handler attached to one agent run (one
+``generate_response`` turn). It captures the chunks streamed by the agent's
+model calls with their offsets from the start of each call, and the tool
+calls with their arguments, results and durations. Turns of the same thread
+are appended to one JSON cassette.
+
+``ReplayChatModel`` and ``ReplayTool`` feed a recorded turn back to the real
+graph, with the original timing, a faster one (``speed`` > 1) or none
+(``speed`` = 0), so graph, checkpointing and streaming overhead can be
+measured without network access.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import agenerate_from_stream
+from langchain_core.messages import AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult, LLMResult
+from langchain_core.tools import BaseTool, ToolException
+from langgraph.constants import TAG_NOSTREAM
+from pydantic import PrivateAttr
+
+from src.ai.config import config
+
+CASSETTE_VERSION = 1
+
+# Response metadata kept per chunk; the rest is provider detail.
+_RESPONSE_METADATA = ("finish_reason", "model_name")
+
+
+def _chunk_record(message: BaseMessage, at: float) -> dict[str, Any]:
+    record = {"at": round(at, 4), "content": message.content}
+    if getattr(message, "tool_call_chunks", None):
+        record["tool_call_chunks"] = [
+            {key: chunk[key] for key in ("name", "args", "id", "index")}
+            for chunk in message.tool_call_chunks
+        ]
+    if getattr(message, "usage_metadata", None):
+        record["usage_metadata"] = dict(message.usage_metadata)
+    metadata = {
+        key: message.response_metadata[key]
+        for key in _RESPONSE_METADATA
+        if message.response_metadata.get(key)
+    }
+    if metadata:
+        record["response_metadata"] = metadata
+    return record
+
+
+class CassetteRecorder(AsyncCallbackHandler):
+    """Captures the model and tool calls of one agent turn.
+
+    Only the agent node's own model calls are recorded: calls made inside
+    tools are covered by the recorded tool result, and routed candidates
+    (tagged nostream) duplicate their router's call. Tools wrapped by other
+    tools are likewise recorded once, at the outer call.
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        self.llm_calls: list[dict] = []
+        self.tool_calls: list[dict] = []
+        self._llm_runs: dict[UUID, tuple[float, dict]] = {}
+        self._tool_runs: dict[UUID, tuple[float, dict]] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if TAG_NOSTREAM in (tags or []):
+            return
+        if (metadata or {}).get("langgraph_node") != "agent":
+            return
+        call = {"chunks": []}
+        self.llm_calls.append(call)
+        self._llm_runs[run_id] = (time.perf_counter(), call)
+
+    async def on_llm_new_token(
+        self,
+        token: str,
+        *,
+        chunk: ChatGenerationChunk | None = None,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        if run_id not in self._llm_runs or chunk is None:
+            return
+        started, call = self._llm_runs[run_id]
+        call["chunks"].append(
+            _chunk_record(chunk.message, time.perf_counter() - started)
+        )
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        run = self._llm_runs.pop(run_id, None)
+        if run is None:
+            return
+        started, call = run
+        if not call["chunks"] and response.generations:
+            # Not streamed: replay the whole message as a single chunk.
+            message = response.generations[0][0].message
+            call["chunks"].append(_chunk_record(message, time.perf_counter() - started))
+
+    async def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        inputs: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if parent_run_id in self._tool_runs:
+            return
+        call = {"name": serialized.get("name"), "args": inputs or {}}
+        self._tool_runs[run_id] = (time.perf_counter(), call)
+
+    def _finish_tool(self, run_id: UUID, **result: Any) -> None:
+        run = self._tool_runs.get(run_id)
+        if run is None or "seconds" in run[1]:
+            return
+        started, call = run
+        call.update(result, seconds=round(time.perf_counter() - started, 4))
+        self.tool_calls.append(call)
+
+    async def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if isinstance(output, ToolMessage):
+            self._finish_tool(run_id, output=output.content, status=output.status)
+        else:
+            self._finish_tool(run_id, output=output, status="success")
+
+    async def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._finish_tool(run_id, error=str(error), status="error")
+
+    def turn(self) -> dict[str, Any]:
+        return {
+            "message": self.message,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+        }
+
+
+def load(path: str | Path) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        cassette = json.load(f)
+    if cassette.get("version") != CASSETTE_VERSION:
+        raise ValueError(f"Unsupported cassette version in {path}")
+    return cassette
+
+
+def load_corpus(directory: str | Path) -> list[dict[str, Any]]:
+    return [load(path) for path in sorted(Path(directory).glob("*.json"))]
+
+
+def append_turn(path: str | Path, thread_id: str, turn: dict[str, Any]) -> None:
+    """Append a recorded turn to the thread's cassette, creating it if needed."""
+    path = Path(path)
+    if path.exists():
+        cassette = load(path)
+    else:
+        cassette = {"version": CASSETTE_VERSION, "thread_id": thread_id, "turns": []}
+    cassette["turns"].append(turn)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(cassette, ensure_ascii=False, separators=(",", ":")),
+        encoding="utf-8",
+    )
+
+
+def get_recorder(message: str) -> CassetteRecorder | None:
+    """A recorder for the turn if recording is enabled, else None."""
+    if not config["cassette"]["record_dir"]:
+        return None
+    return CassetteRecorder(message)
+
+
+async def save(recorder: CassetteRecorder, thread_id: str) -> None:
+    path = Path(config["cassette"]["record_dir"]) / f"{thread_id}.json"
+    await asyncio.to_thread(append_turn, path, thread_id, recorder.turn())
+
+
+class ReplayChatModel(BaseChatModel):
+    """Replays the recorded model calls of one turn, in order.
+
+    Tools may be bound but are ignored: the recorded chunks already carry
+    the tool calls the original model made.
+    """
+
+    llm_calls: list[dict]
+    # Timing multiplier: 1 replays the original delays, 0 none at all.
+    speed: float = 1.0
+
+    _next_call: int = PrivateAttr(default=0)
+    # Total time spent reproducing recorded delays.
+    _waited: float = PrivateAttr(default=0.0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @property
+    def waited_seconds(self) -> float:
+        return self._waited
+
+    def bind_tools(self, tools, **kwargs: Any) -> "ReplayChatModel":
+        return self
+
+    async def _sleep(self, seconds: float) -> None:
+        if self.speed and seconds > 0:
+            await asyncio.sleep(seconds / self.speed)
+            self._waited += seconds / self.speed
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("ReplayChatModel is async only")
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop, **kwargs))
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self._next_call >= len(self.llm_calls):
+            raise ValueError("Cassette has no more recorded model calls")
+        call = self.llm_calls[self._next_call]
+        self._next_call += 1
+
+        previous = 0.0
+        for record in call["chunks"]:
+            await self._sleep(record["at"] - previous)
+            previous = record["at"]
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content=record["content"],
+                    tool_call_chunks=record.get("tool_call_chunks", []),
+                    usage_metadata=record.get("usage_metadata"),
+                    response_metadata=record.get("response_metadata", {}),
+                )
+            )
+
+
+class ReplayTool(BaseTool):
+    """Returns the recorded results of one tool, matched by arguments."""
+
+    description: str = "Replays recorded results"
+    args_schema: dict = {"type": "object", "properties": {}}
+    calls: list[dict]
+    speed: float = 1.0
+
+    _pending: list[dict] = PrivateAttr(default_factory=list)
+    _waited: float = PrivateAttr(default=0.0)
+
+    def model_post_init(self, context: Any) -> None:
+        self._pending = list(self.calls)
+
+    @property
+    def waited_seconds(self) -> float:
+        return self._waited
+
+    def _run(self, **kwargs: Any) -> Any:
+        raise NotImplementedError("ReplayTool is async only")
+
+    async def _arun(self, **kwargs: Any) -> Any:
+        if not self._pending:
+            raise ToolException(f"Cassette has no more results for {self.name}")
+        call = next(
+            (call for call in self._pending if call["args"] == kwargs),
+            self._pending[0],
+        )
+        self._pending.remove(call)
+        if self.speed and call["seconds"] > 0:
+            await asyncio.sleep(call["seconds"] / self.speed)
+            self._waited += call["seconds"] / self.speed
+        if "error" in call:
+            raise ToolException(call["error"])
+        return call["output"]
+
+
+def replay_tools(turn: dict[str, Any], speed: float = 1.0) -> list[ReplayTool]:
+    calls_by_name: dict[str, list[dict]] = {}
+    for call in turn["tool_calls"]:
+        calls_by_name.setdefault(call["name"], []).append(call)
+    return [
+        ReplayTool(name=name, calls=calls, speed=speed)
+        for name, calls in calls_by_name.items()
+    ]
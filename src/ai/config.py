@@ -1,3 +1,4 @@
+import os
 from functools import lru_cache
 
 from langchain_anthropic import ChatAnthropic
@@ -5,7 +6,90 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.language_models import BaseChatModel
 
+from src.ai.embeddings import RateLimitedEmbeddings
+from src.ai.fake import FakeChatModel, HashingEmbeddings
+from src.ai.prompt_cache import (
+    CachingChatGoogleGenerativeAI,
+    gemini_prompt_cache,
+    gemini_prompt_cache_supported,
+)
+from src.ai.router import RoutedChatModel
+from src.cache.rate_limiter import RateLimiter
+from src.database.plans import SubscriptionPlan
+
 config = {
+    # Every purpose below is served by a RoutedChatModel over the primary
+    # provider/model and its optional "fallbacks".
+    "routing": {
+        # Number of recent calls per candidate used for TTFT and error rate.
+        "window": 50,
+        # Candidates above this error rate are only tried after healthy ones.
+        "max_error_rate": 0.5,
+        # A failed candidate is deprioritized for this long.
+        "cooldown_seconds": 30,
+        # Give up on a streaming candidate without a first token by then.
+        "first_token_timeout_seconds": 15,
+    },
+    # Per "provider:model" limits shared by all workers through Redis. Set
+    # them a little below the account's provider limits.
+    "rate_limits": {
+        "google:gemini-2.0-flash": {
+            "requests_per_minute": 1_800,
+            "tokens_per_minute": 3_600_000,
+        },
+        "google:gemini-2.5-flash-lite": {
+            "requests_per_minute": 3_600,
+            "tokens_per_minute": 3_600_000,
+        },
+        "openai:gpt-4.1-mini": {
+            "requests_per_minute": 4_500,
+            "tokens_per_minute": 1_800_000,
+        },
+        "openai:text-embedding-3-small": {
+            "requests_per_minute": 4_500,
+            "tokens_per_minute": 4_500_000,
+        },
+        "tavily:search": {"requests_per_minute": 90},
+    },
+    # FAKE_PROVIDERS=true replaces every LLM, the embeddings and web search
+    # with the deterministic local stand-ins in src/ai/fake.py, e.g. for
+    # load tests and CI. Not for production.
+    "fake": {
+        "enabled": os.getenv("FAKE_PROVIDERS", "false").lower() == "true",
+        "ttft_seconds": float(os.getenv("FAKE_TTFT_SECONDS", "0.3")),
+        "tokens_per_second": float(os.getenv("FAKE_TOKENS_PER_SECOND", "60")),
+        "answer_tokens": int(os.getenv("FAKE_ANSWER_TOKENS", "150")),
+        # Made on the first model step of a turn when the tool is bound;
+        # "{question}" is replaced with the user's message.
+        "tool_calls": [
+            {
+                "name": "SearchLegalDocuments",
+                "args": {"query": "{question}", "search_source": "all"},
+            },
+            {"name": "tavily_search", "args": {"query": "{question}"}},
+        ],
+        "search_latency_seconds": float(
+            os.getenv("FAKE_SEARCH_LATENCY_SECONDS", "0.5")
+        ),
+    },
+    # CASSETTE_RECORD_DIR records every agent turn to a cassette in that
+    # directory (one file per thread), replayable with src/ai/cassette.py.
+    # Cassettes contain the conversation, so only enable it on test data.
+    "cassette": {
+        "record_dir": os.getenv("CASSETTE_RECORD_DIR") or None,
+    },
+    # Provider-side caching of the static system prompt and tool schemas; opt
+    # in with PROMPT_CACHE_ENABLED (Gemini bills cache storage).
+    "prompt_cache": {
+        "enabled": os.getenv("PROMPT_CACHE_ENABLED", "false").lower() == "true",
+        # Gemini context caches: lifetime, and how long before expiry the
+        # lifetime is extended.
+        "ttl_seconds": 60 * 60,
+        "refresh_margin_seconds": 5 * 60,
+        # After a failed creation (e.g. a prefix below the model's minimum
+        # cacheable size) that prefix is sent uncached for this long.
+        "retry_after_seconds": 60 * 60,
+    },
     "embeddings": {
         "provider": "openai",
         "model": "text-embedding-3-small",
@@ -21,26 +105,157 @@ config = {
         "provider": "google",
         "model": "gemini-2.0-flash",
         "max_retries": 2,
+        # Tried in order when the primary fails or is slow; see "routing".
+        "fallbacks": [
+            {"provider": "openai", "model": "gpt-4.1-mini"},
+        ],
+    },
+    "summary": {
+        "provider": "google",
+        "model": "gemini-2.5-flash-lite",
+        "max_tokens": 2_000,
+        "max_retries": 2,
     },
     "query_generation": {
         "provider": "openai",
         "model": "gpt-4.1-mini",
         "max_retries": 2,
     },
+    "retrieval": {
+        # Documents fetched per generated query before fusion.
+        "k": 6,
+        # Reciprocal rank fusion damping constant.
+        "rrf_k": 60,
+        # Word-shingle Jaccard similarity above which two chunks are duplicates.
+        "near_duplicate_threshold": 0.85,
+        # Upper bound for the context returned to the chat model.
+        "context_token_budget": 3_000,
+        # Chunk metadata used to merge neighbouring chunks of the same article.
+        "article_key": "article",
+        "chunk_key": "chunk_index",
+        # Search source -> langchain_postgres collection name. Only ingested
+        # collections belong here; add them to SearchType and the prompts too.
+        "collections": {
+            "constitution": "constitution",
+            # "laws": "laws",
+            # "codes": "codes",
+            # "judicial practice": "judicial_practice",
+        },
+        # How long a collection's id is reused before it is looked up again.
+        "collection_id_ttl_seconds": 60,
+        # A collection slower than this is left out of an "all" search.
+        "collection_timeout_seconds": 5.0,
+        # pgvector HNSW parameters, see `python -m src.ai.retrieval.index`.
+        "hnsw": {
+            "m": 16,
+            "ef_construction": 64,
+            # Candidate list size per query: higher is better recall, slower.
+            "ef_search": 40,
+            # Per collection overrides of ef_search.
+            "ef_search_overrides": {},
+        },
+        # Index vectors as "halfvec" (2x smaller) or "binary" (32x smaller)
+        # instead of full precision; None keeps float32 vectors.
+        "quantization": None,
+        # Quantized searches rescore k * rescore_factor candidates exactly.
+        "rescore_factor": 4,
+    },
+    "web_search": {
+        # Identical searches within this window reuse the stored Tavily result.
+        "cache_ttl_seconds": 6 * 60 * 60,
+        # How long other workers wait for an in-flight identical search.
+        "lock_timeout_seconds": 30,
+    },
+    "answer_cache": {
+        # Reuse answers to first-turn questions; opt in with ANSWER_CACHE_ENABLED.
+        "enabled": os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true",
+        "ttl_seconds": 7 * 24 * 60 * 60,
+        # Cosine similarity of question embeddings for a semantic hit.
+        "similarity_threshold": 0.95,
+        # Longer questions usually describe a specific case, not a common one.
+        "max_question_chars": 300,
+    },
+    # Fair queuing of agent runs per worker, weighted by the user's plan.
+    "scheduler": {
+        "max_concurrent_generations": 8,
+        # Extra runs allowed over capacity for runs past their maximum wait.
+        "max_overflow": 4,
+        "plans": {
+            SubscriptionPlan.FREE: {"weight": 1, "max_wait_seconds": 60},
+            SubscriptionPlan.MONTHLY: {"weight": 4, "max_wait_seconds": 5},
+        },
+    },
+    "summarization": {
+        # "on_demand": the history is summarized inside a turn once it exceeds
+        # max_prompt_tokens. "incremental" (opt in): a rolling summary is
+        # updated after each turn and the prompt is the summary plus the
+        # recent messages.
+        "mode": os.getenv("SUMMARIZATION_MODE", "on_demand"),
+        "max_prompt_tokens": 170_000,
+        # Recent messages always sent verbatim (extended to a turn boundary).
+        "keep_last_messages": 8,
+        # Older messages are only folded in once they add up to this much.
+        "min_tokens_to_summarize": 4_000,
+        # Tool results are cut to this size in the summarizer's input.
+        "max_tool_output_tokens": 500,
+    },
+    "agent": {
+        # Tool calls from one model step that may run at the same time.
+        "max_parallel_tool_calls": 4,
+    },
+    # Agent tool deadlines and circuit breakers, by tool name.
+    "tools": {
+        "default": {
+            "timeout_seconds": 20,
+            # Start a second identical call if the first is slower than this;
+            # None disables hedging.
+            "hedge_after_seconds": None,
+            # Open the circuit after this many failures within the window.
+            "failure_threshold": 5,
+            "failure_window_seconds": 60,
+            # Calls are rejected immediately while the circuit is open.
+            "reset_seconds": 30,
+        },
+        # Web searches are coalesced in-process, so a hedged duplicate would
+        # only wait for the same request.
+        "tavily_search": {"timeout_seconds": 15},
+        "SearchLegalDocuments": {"timeout_seconds": 15, "hedge_after_seconds": 5},
+    },
 }
 
 
-@lru_cache(maxsize=5)
-def get_llm(purpose: str) -> BaseChatModel:
-    model_config = config[purpose]
+@lru_cache(maxsize=None)
+def get_rate_limiter(name: str) -> RateLimiter | None:
+    """Shared limiter for a "provider:model" name, if it has configured limits."""
+    limits = config["rate_limits"].get(name)
+    if limits is None:
+        return None
+    return RateLimiter(name, **limits)
+
+
+def create_llm(model_config: dict, purpose: str | None = None) -> BaseChatModel:
     provider = model_config["provider"]
+    prompt_cache = config["prompt_cache"]["enabled"]
 
     providers = {
         "openai": ChatOpenAI,
         "anthropic": ChatAnthropic,
-        "google": ChatGoogleGenerativeAI,
+        "google": CachingChatGoogleGenerativeAI
+        if prompt_cache and gemini_prompt_cache_supported()
+        else ChatGoogleGenerativeAI,
     }
 
+    if provider == "fake":
+        fake = config["fake"]
+        return FakeChatModel(
+            model=model_config["model"],
+            max_tokens=model_config.get("max_tokens"),
+            ttft_seconds=fake["ttft_seconds"],
+            tokens_per_second=fake["tokens_per_second"],
+            answer_tokens=fake["answer_tokens"],
+            tool_calls=fake["tool_calls"],
+        )
+
     if provider not in providers:
         raise ValueError(f"Invalid provider: {provider}")
 
@@ -50,17 +265,49 @@ def get_llm(purpose: str) -> BaseChatModel:
         "max_tokens": model_config.get("max_tokens", None),
         "max_retries": model_config.get("max_retries", 2),
     }
+    if prompt_cache and provider == "openai" and purpose:
+        # Calls of one purpose share their prefix; keep them on one cache.
+        params["extra_body"] = {"prompt_cache_key": f"pravo-{purpose}"}
+
+    llm = llm_class(**params)
+    if isinstance(llm, CachingChatGoogleGenerativeAI):
+        llm.prompt_cache = gemini_prompt_cache(llm, config["prompt_cache"])
+    return llm
+
+
+@lru_cache(maxsize=5)
+def get_llm(purpose: str) -> BaseChatModel:
+    model_config = config[purpose]
+    if config["fake"]["enabled"]:
+        model_config = {**model_config, "provider": "fake", "fallbacks": []}
+    primary = {k: v for k, v in model_config.items() if k != "fallbacks"}
+    # Fallbacks inherit unspecified settings (max_tokens, ...) from the primary.
+    candidates = [primary] + [
+        {**primary, **fallback} for fallback in model_config.get("fallbacks", [])
+    ]
+    names = [f"{c['provider']}:{c['model']}" for c in candidates]
 
-    return llm_class(**params)
+    return RoutedChatModel(
+        purpose=purpose,
+        names=names,
+        candidates=[create_llm(c, purpose) for c in candidates],
+        limiters=[get_rate_limiter(name) for name in names],
+        **config["routing"],
+    )
 
 
 @lru_cache(maxsize=1)
 def get_embeddings_model():
     model_config = config["embeddings"]
+    if config["fake"]["enabled"] or model_config["provider"] == "fake":
+        return HashingEmbeddings(model_config["dimensions"])
     if model_config["provider"] == "openai":
-        return OpenAIEmbeddings(
+        embeddings = OpenAIEmbeddings(
             model=model_config["model"],
             dimensions=model_config["dimensions"],
         )
     else:
         raise ValueError(f"Invalid provider: {model_config['provider']}")
+
+    name = f"{model_config['provider']}:{model_config['model']}"
+    return RateLimitedEmbeddings(embeddings, get_rate_limiter(name), name)
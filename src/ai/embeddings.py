@@ -0,0 +1,34 @@
+from langchain_core.embeddings import Embeddings
+
+from src.ai.tokens import approx_token_count
+from src.cache.rate_limiter import RateLimiter
+from src.monitoring.metrics import EMBEDDING_TOKENS
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """Embeddings model whose async calls wait for the shared rate limiter,
+    if any, and are counted in ``embedding_tokens_total``."""
+
+    def __init__(self, embeddings: Embeddings, limiter: RateLimiter | None, name: str):
+        self.embeddings = embeddings
+        self.limiter = limiter
+        self.name = name
+
+    async def _acquire(self, tokens: int) -> None:
+        EMBEDDING_TOKENS.labels(self.name).inc(tokens)
+        if self.limiter is not None:
+            await self.limiter.acquire(tokens)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await self._acquire(sum(approx_token_count(text) for text in texts))
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await self._acquire(approx_token_count(text))
+        return await self.embeddings.aembed_query(text)
@@ -0,0 +1,304 @@
+"""Deterministic local stand-ins for the LLM, embedding and search providers.
+
+Used instead of Gemini, OpenAI and Tavily when ``config["fake"]["enabled"]``
+(FAKE_PROVIDERS=true), so load tests and CI can run the whole chat flow
+without network access or quota. Output depends only on the input, and
+latency only on the settings, so runs are reproducible.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.ai.tokens import token_counter
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+VOCABULARY = (
+    "відповідно до статті закону україни кодексу позовна давність строк "
+    "договір сторони зобов'язання суд рішення позивач відповідач право "
+    "власності спадщина заява вимога порядок звернення нотаріус орган "
+    "державної реєстрації підстави відшкодування шкоди компенсація розмір"
+).split()
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _words(seed: int, count: int) -> list[str]:
+    generator = random.Random(seed)
+    return [generator.choice(VOCABULARY) for _ in range(count)]
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings built with feature hashing.
+
+    Words and their 5 character prefixes (a crude stemmer for Ukrainian
+    inflection) are hashed into a fixed number of signed buckets, so texts
+    sharing vocabulary end up close in cosine distance.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for word in _WORD_RE.findall(text.lower()):
+            for feature in {word, word[:5]}:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8)
+                value = int.from_bytes(digest.digest(), "big")
+                sign = 1.0 if value & 1 else -1.0
+                vector[(value >> 1) % self.dimensions] += sign
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return self.embed_query(text)
+
+
+def _fake_value(schema: dict, question: str, seed: int) -> Any:
+    """A value matching a JSON schema, derived from the question."""
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][seed % len(schema["enum"])]
+    if kind == "array":
+        return [
+            _fake_value(schema.get("items", {}), question, seed + i) for i in range(5)
+        ]
+    if kind == "object":
+        return {
+            name: _fake_value(prop, question, seed + i)
+            for i, (name, prop) in enumerate(schema.get("properties", {}).items())
+        }
+    if kind == "integer":
+        return seed % 10
+    if kind == "number":
+        return (seed % 100) / 10
+    if kind == "boolean":
+        return bool(seed & 1)
+    return " ".join([question, *_words(seed, 3)]).strip()
+
+
+class FakeChatModel(BaseChatModel):
+    """Streaming chat model with scripted tool calls and a canned answer.
+
+    On the first model step of a turn it calls the ``tool_calls`` whose
+    tools are bound, with "{question}" in their arguments replaced by the
+    user's message; after tool results it streams an answer of
+    ``answer_tokens`` words picked deterministically from the question.
+    With a forced tool choice (``with_structured_output``) it returns
+    arguments generated from the tool's schema instead.
+    """
+
+    model: str = "fake"
+    ttft_seconds: float = 0.3
+    tokens_per_second: float = 60.0
+    answer_tokens: int = 150
+    max_tokens: int | None = None
+    tool_calls: list[dict] = []
+    bound_tools: list[dict] = []
+    tool_choice: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(
+        self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any
+    ) -> "FakeChatModel":
+        return self.model_copy(
+            update={
+                "bound_tools": [convert_to_openai_tool(tool) for tool in tools],
+                "tool_choice": tool_choice,
+            }
+        )
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        question = next(
+            (m.text() for m in reversed(messages) if isinstance(m, HumanMessage)), ""
+        )
+        seed = _seed(question)
+        functions = {
+            tool["function"]["name"]: tool["function"] for tool in self.bound_tools
+        }
+
+        if self.tool_choice and functions:
+            # The question is typically the last line of a prompt template.
+            question = question.strip().splitlines()[-1] if question else ""
+            function = next(iter(functions.values()))
+            return AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": function["name"],
+                        "args": _fake_value(
+                            function.get("parameters", {}), question, seed
+                        ),
+                        "id": f"call_{seed:x}",
+                    }
+                ],
+            )
+
+        if not isinstance(messages[-1], ToolMessage):
+            scripted = [call for call in self.tool_calls if call["name"] in functions]
+            if scripted:
+                return AIMessage(
+                    content="",
+                    tool_calls=[
+                        {
+                            "name": call["name"],
+                            "args": json.loads(
+                                json.dumps(call["args"]).replace(
+                                    "{question}", json.dumps(question)[1:-1]
+                                )
+                            ),
+                            "id": f"call_{i}_{seed:x}",
+                        }
+                        for i, call in enumerate(scripted)
+                    ],
+                )
+
+        count = min(self.answer_tokens, self.max_tokens or self.answer_tokens)
+        return AIMessage(content=" ".join(_words(seed, count)))
+
+    def _usage(self, messages: list[BaseMessage], message: AIMessage) -> dict:
+        input_tokens = token_counter(messages)
+        output_tokens = token_counter([message])
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _chunks(self, message: AIMessage) -> list[AIMessageChunk]:
+        if message.tool_calls:
+            return [
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"], ensure_ascii=False),
+                            "id": call["id"],
+                            "index": i,
+                        }
+                        for i, call in enumerate(message.tool_calls)
+                    ],
+                )
+            ]
+        words = message.content.split(" ")
+        return [
+            AIMessageChunk(content=word if i == 0 else f" {word}")
+            for i, word in enumerate(words)
+        ]
+
+    def _last_chunk(self, messages, message: AIMessage) -> AIMessageChunk:
+        return AIMessageChunk(
+            content="",
+            usage_metadata=self._usage(messages, message),
+            response_metadata={
+                "finish_reason": "tool_calls" if message.tool_calls else "stop",
+                "model_name": self.model,
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        message = self._respond(messages)
+        time.sleep(
+            self.ttft_seconds + len(self._chunks(message)) / self.tokens_per_second
+        )
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        message = self._respond(messages)
+        await asyncio.sleep(
+            self.ttft_seconds + len(self._chunks(message)) / self.tokens_per_second
+        )
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        time.sleep(self.ttft_seconds)
+        for i, chunk in enumerate(self._chunks(message)):
+            if i:
+                time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=chunk)
+        yield ChatGenerationChunk(message=self._last_chunk(messages, message))
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        await asyncio.sleep(self.ttft_seconds)
+        for i, chunk in enumerate(self._chunks(message)):
+            if i:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(generation.text, chunk=generation)
+            yield generation
+        yield ChatGenerationChunk(message=self._last_chunk(messages, message))
+
+
+async def web_search(
+    query: str, latency_seconds: float = 0.0, max_results: int = 5, **options: Any
+) -> dict[str, Any]:
+    """Canned Tavily-shaped search results for ``query``."""
+    await asyncio.sleep(latency_seconds)
+    seed = _seed(" ".join(query.lower().split()))
+    return {
+        "query": query,
+        "follow_up_questions": None,
+        "answer": None,
+        "images": [],
+        "results": [
+            {
+                "url": f"https://zakon.example.gov.ua/documents/{(seed + i) % 100_000}",
+                "title": " ".join(_words(seed + i, 6)).capitalize(),
+                "content": " ".join(_words(seed + i, 80)),
+                "score": round(0.9 - i * 0.1, 2),
+                "raw_content": None,
+            }
+            for i in range(max_results)
+        ],
+        "response_time": latency_seconds,
+    }
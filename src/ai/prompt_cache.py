@@ -0,0 +1,283 @@
+"""Provider-side caching of the static prompt prefix.
+
+The system prompt and the tool schemas are identical on every agent call.
+``PromptCache`` keeps one provider cache handle per distinct prefix alive,
+refreshing its TTL before it expires. Creating and refreshing are injected
+callables, so a stub provider can stand in for the real one.
+``CachingChatGoogleGenerativeAI`` serves that prefix from a Gemini context
+cache; it relies on private helpers of langchain-google-genai, so
+``create_llm`` falls back to the plain model when they are missing. OpenAI caches prompt prefixes implicitly; ``create_llm`` only adds a
+``prompt_cache_key`` so that calls with the same prefix reach the same cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import Field
+
+from src.monitoring.metrics import PROMPT_CACHE_OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+# (system prompt, tool schemas, ttl seconds) -> provider cache name
+CreateCache = Callable[[str, list[dict] | None, int], Awaitable[str]]
+# (provider cache name, ttl seconds)
+RefreshCache = Callable[[str, int], Awaitable[None]]
+
+
+@dataclass
+class _Handle:
+    # None after a failed creation: calls go uncached until expires_at.
+    name: str | None
+    expires_at: float
+
+
+class PromptCache:
+    def __init__(
+        self,
+        create: CreateCache,
+        refresh: RefreshCache,
+        ttl_seconds: int,
+        refresh_margin_seconds: int,
+        retry_after_seconds: int,
+    ):
+        self._create = create
+        self._refresh = refresh
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._handles: dict[str, _Handle] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(system_prompt: str, tools: list[dict] | None) -> str:
+        payload = json.dumps([system_prompt, tools], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _fresh(self, handle: _Handle | None, now: float) -> bool:
+        if handle is None:
+            return False
+        if handle.name is None:
+            return now < handle.expires_at
+        return now < handle.expires_at - self.refresh_margin_seconds
+
+    async def get(self, system_prompt: str, tools: list[dict] | None) -> str | None:
+        """Name of a live cache of this prefix, or None to send it uncached."""
+        key = self._key(system_prompt, tools)
+        handle = self._handles.get(key)
+        if self._fresh(handle, time.monotonic()):
+            return handle.name
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        if lock.locked() and handle and handle.name:
+            # Being refreshed by another call and still valid meanwhile.
+            if time.monotonic() < handle.expires_at:
+                return handle.name
+
+        async with lock:
+            handle = self._handles.get(key)
+            now = time.monotonic()
+            if self._fresh(handle, now):
+                return handle.name
+
+            if handle and handle.name and now < handle.expires_at:
+                operation = "refresh"
+                call = self._refresh(handle.name, self.ttl_seconds)
+            else:
+                operation = "create"
+                call = self._create(system_prompt, tools, self.ttl_seconds)
+            try:
+                result = await call
+            except Exception as e:
+                PROMPT_CACHE_OPERATIONS.labels(operation, "error").inc()
+                logger.warning(
+                    f"Prompt cache {operation} failed, sending uncached: {e}"
+                )
+                self._handles[key] = _Handle(None, now + self.retry_after_seconds)
+                return None
+
+            PROMPT_CACHE_OPERATIONS.labels(operation, "ok").inc()
+            name = handle.name if operation == "refresh" else result
+            self._handles[key] = _Handle(name, now + self.ttl_seconds)
+            return name
+
+    def invalidate(self, name: str) -> None:
+        """Forget a handle the provider no longer accepts."""
+        for key, handle in list(self._handles.items()):
+            if handle.name == name:
+                del self._handles[key]
+
+
+@lru_cache(maxsize=1)
+def _genai_internals() -> tuple[Callable, Callable] | None:
+    """Private helpers of langchain-google-genai that caching relies on, or
+    None when this version does not have them."""
+    # Imported here: only needed once a Gemini model actually uses caching.
+    try:
+        from langchain_google_genai import _genai_extension as genaix
+        from langchain_google_genai._function_utils import (
+            convert_to_genai_function_declarations,
+        )
+
+        return genaix._prepare_config, convert_to_genai_function_declarations
+    except (ImportError, AttributeError) as e:
+        logger.warning(f"Gemini prompt caching unavailable, sending uncached: {e}")
+        return None
+
+
+def gemini_prompt_cache_supported() -> bool:
+    return _genai_internals() is not None
+
+
+def gemini_prompt_cache(llm: ChatGoogleGenerativeAI, settings: dict) -> PromptCache:
+    from google.ai.generativelanguage_v1beta import (
+        CacheServiceAsyncClient,
+        CachedContent,
+        Content,
+        Part,
+    )
+    from google.protobuf.field_mask_pb2 import FieldMask
+
+    prepare_config, convert_to_genai_function_declarations = _genai_internals()
+    client = None
+
+    def get_client() -> CacheServiceAsyncClient:
+        # Same credentials and endpoint as the model's own async client.
+        nonlocal client
+        if client is None:
+            api_key = llm.google_api_key
+            client = CacheServiceAsyncClient(
+                **prepare_config(
+                    credentials=llm.credentials,
+                    api_key=api_key.get_secret_value() if api_key else None,
+                    client_options=llm.client_options,
+                )
+            )
+        return client
+
+    async def create(system_prompt: str, tools: list[dict] | None, ttl: int) -> str:
+        cached = await get_client().create_cached_content(
+            cached_content=CachedContent(
+                model=llm.model,
+                system_instruction=Content(parts=[Part(text=system_prompt)]),
+                tools=[convert_to_genai_function_declarations(tools)] if tools else [],
+                ttl=timedelta(seconds=ttl),
+            )
+        )
+        return cached.name
+
+    async def refresh(name: str, ttl: int) -> None:
+        await get_client().update_cached_content(
+            cached_content=CachedContent(name=name, ttl=timedelta(seconds=ttl)),
+            update_mask=FieldMask(paths=["ttl"]),
+        )
+
+    return PromptCache(
+        create,
+        refresh,
+        ttl_seconds=settings["ttl_seconds"],
+        refresh_margin_seconds=settings["refresh_margin_seconds"],
+        retry_after_seconds=settings["retry_after_seconds"],
+    )
+
+
+class CachingChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """Gemini chat model that sends its static prefix as a context cache.
+
+    When a call starts with a system message and binds plain tools, both
+    are replaced by a cached content handle from ``prompt_cache``. Gemini
+    does not accept a system instruction next to cached content, so later
+    system messages (the thread summary) are sent as user content. Calls
+    fall back to the full prompt when no cache is available, and once more
+    if the provider rejects the handle. Only async calls use the cache.
+    """
+
+    prompt_cache: PromptCache | None = Field(default=None, exclude=True)
+
+    async def _cached_request(
+        self, messages: list[BaseMessage], kwargs: dict[str, Any]
+    ) -> tuple[list[BaseMessage], dict[str, Any], str | None]:
+        uncacheable = ("functions", "tool_config", "tool_choice", "cached_content")
+        if (
+            self.prompt_cache is None
+            or not messages
+            or not isinstance(messages[0], SystemMessage)
+            or any(kwargs.get(name) for name in uncacheable)
+        ):
+            return messages, kwargs, None
+
+        tools = kwargs.get("tools")
+        name = await self.prompt_cache.get(messages[0].text(), tools)
+        if name is None:
+            return messages, kwargs, None
+
+        rest = [
+            HumanMessage(message.content)
+            if isinstance(message, SystemMessage)
+            else message
+            for message in messages[1:]
+        ]
+        cached_kwargs = {k: v for k, v in kwargs.items() if k != "tools"}
+        return rest, {**cached_kwargs, "cached_content": name}, name
+
+    def _rejected(self, name: str, error: Exception) -> None:
+        logger.warning(
+            f"Gemini rejected cached content {name}, retrying uncached: {error}"
+        )
+        self.prompt_cache.invalidate(name)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        cached_messages, cached_kwargs, name = await self._cached_request(
+            messages, kwargs
+        )
+        if name is not None:
+            try:
+                return await super()._agenerate(
+                    cached_messages, stop, run_manager, **cached_kwargs
+                )
+            except Exception as e:
+                self._rejected(name, e)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        cached_messages, cached_kwargs, name = await self._cached_request(
+            messages, kwargs
+        )
+        if name is not None:
+            started = False
+            try:
+                async for chunk in super()._astream(
+                    cached_messages, stop, run_manager, **cached_kwargs
+                ):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    raise
+                self._rejected(name, e)
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
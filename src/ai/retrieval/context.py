@@ -0,0 +1,192 @@
+import hashlib
+import re
+from collections.abc import Sequence
+
+from langchain_core.documents import Document
+
+from src.ai.tokens import approx_token_count, truncate_to_tokens
+
+ScoredDocument = tuple[Document, float]
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _document_key(doc: Document) -> str:
+    if doc.id:
+        return doc.id
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]], k: int = 60
+) -> list[ScoredDocument]:
+    """Fuse several ranked result lists into one list ordered by RRF score.
+
+    Each list is expected to be ordered from most to least relevant, e.g. the
+    results of one generated query variant.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = _document_key(doc)
+            documents.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+
+    return sorted(
+        ((documents[key], score) for key, score in scores.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def merge_by_similarity(
+    rankings: Sequence[Sequence[ScoredDocument]], k: int
+) -> list[ScoredDocument]:
+    """Merge result lists from different collections into one top-k ranking.
+
+    Scores are pgvector cosine distances. The collections share an embedding
+    model, so their distances are comparable as they are and the lists are
+    interleaved by distance, closest first.
+    """
+    merged = [item for ranking in rankings for item in ranking]
+    merged.sort(key=lambda item: item[1])
+    return merged[:k]
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def deduplicate(
+    documents: Sequence[ScoredDocument], threshold: float = 0.85
+) -> list[ScoredDocument]:
+    """Drop exact and near-duplicate chunks, keeping the best-scored copy.
+
+    Input must be ordered by score so that the first occurrence wins.
+    """
+    seen_hashes: set[str] = set()
+    kept: list[ScoredDocument] = []
+    kept_shingles: list[set[tuple[str, ...]]] = []
+
+    for doc, score in documents:
+        normalized = _normalize_text(doc.page_content)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if digest in seen_hashes:
+            continue
+
+        shingles = _shingles(normalized)
+        if any(_jaccard(shingles, other) >= threshold for other in kept_shingles):
+            continue
+
+        seen_hashes.add(digest)
+        kept.append((doc, score))
+        kept_shingles.append(shingles)
+
+    return kept
+
+
+def _join_overlapping(first: str, second: str, max_overlap: int = 500) -> str:
+    """Concatenate two chunks, removing text repeated by the chunker's overlap."""
+    limit = min(len(first), len(second), max_overlap)
+    for size in range(limit, 20, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+def merge_adjacent(
+    documents: Sequence[ScoredDocument],
+    article_key: str = "article",
+    chunk_key: str = "chunk_index",
+) -> list[ScoredDocument]:
+    """Merge consecutive chunks of the same article into a single document.
+
+    A merged document keeps the best score of its parts. Chunks without the
+    article and chunk metadata are passed through unchanged.
+    """
+    groups: dict[tuple, list[tuple[int, Document, float]]] = {}
+    passthrough: list[ScoredDocument] = []
+
+    for doc, score in documents:
+        metadata = doc.metadata or {}
+        article = metadata.get(article_key)
+        chunk = metadata.get(chunk_key)
+        if article is None or not isinstance(chunk, int):
+            passthrough.append((doc, score))
+            continue
+        source = metadata.get("source")
+        groups.setdefault((source, article), []).append((chunk, doc, score))
+
+    merged: list[ScoredDocument] = list(passthrough)
+    for chunks in groups.values():
+        chunks.sort(key=lambda item: item[0])
+        run_index, run_doc, run_score = chunks[0]
+        run_text = run_doc.page_content
+        for chunk, doc, score in chunks[1:]:
+            if chunk == run_index + 1:
+                run_text = _join_overlapping(run_text, doc.page_content)
+                run_score = max(run_score, score)
+            else:
+                merged.append(
+                    (run_doc.model_copy(update={"page_content": run_text}), run_score)
+                )
+                run_doc, run_text, run_score = doc, doc.page_content, score
+            run_index = chunk
+        merged.append(
+            (run_doc.model_copy(update={"page_content": run_text}), run_score)
+        )
+
+    merged.sort(key=lambda item: item[1], reverse=True)
+    return merged
+
+
+def fit_to_budget(
+    documents: Sequence[ScoredDocument], token_budget: int
+) -> list[Document]:
+    """Take documents in score order until the token budget is exhausted."""
+    selected: list[Document] = []
+    remaining = token_budget
+
+    for doc, _ in documents:
+        tokens = approx_token_count(doc.page_content)
+        if tokens <= remaining:
+            selected.append(doc)
+            remaining -= tokens
+        elif not selected:
+            # Never return an empty context just because the best chunk is long.
+            text = truncate_to_tokens(doc.page_content, remaining)
+            selected.append(doc.model_copy(update={"page_content": text}))
+            break
+
+    return selected
+
+
+def build_context(
+    documents: Sequence[ScoredDocument],
+    *,
+    token_budget: int,
+    near_duplicate_threshold: float = 0.85,
+    article_key: str = "article",
+    chunk_key: str = "chunk_index",
+) -> str:
+    """Turn fused retrieval results into the text handed to the chat model."""
+    unique = deduplicate(documents, threshold=near_duplicate_threshold)
+    merged = merge_adjacent(unique, article_key=article_key, chunk_key=chunk_key)
+    # Merging can reintroduce overlap between a merged run and a lone chunk.
+    merged = deduplicate(merged, threshold=near_duplicate_threshold)
+    selected = fit_to_budget(merged, token_budget)
+    return "\n\n".join(doc.page_content for doc in selected)
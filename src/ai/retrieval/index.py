@@ -0,0 +1,211 @@
+"""Management of pgvector HNSW indexes for the legal document collections.
+
+Usage::
+
+    python -m src.ai.retrieval.index status
+    python -m src.ai.retrieval.index build [--collection NAME] [--m 16]
+        [--ef-construction 64] [--quantization {none,halfvec,binary}] [--rebuild]
+    python -m src.ai.retrieval.index invalidate-answers
+
+Each collection gets its own partial index so that a search in one
+collection never walks graph nodes that belong to another. Quantized indexes
+get their own name, so switching ``retrieval.quantization`` can be prepared by
+building the new index before the config change.
+
+Run ``invalidate-answers`` after re-ingesting collections so that answers
+cached from the old texts are no longer served.
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncConnection  # noqa: E402
+
+from src.ai.answer_cache import bump_collections_version  # noqa: E402
+from src.ai.config import config  # noqa: E402
+from src.ai.retrieval.vector_search import (  # noqa: E402
+    COLLECTION_TABLE,
+    EMBEDDING_TABLE,
+    Quantization,
+    embedding_expression,
+    operator_class,
+)
+from src.database.session import get_async_engine  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def hnsw_index_name(collection_name: str, quantization: Quantization = None) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", collection_name.lower()).strip("_")
+    if quantization:
+        slug = f"{slug}_{quantization}"
+    return f"ix_{EMBEDDING_TABLE}_hnsw_{slug}"[:63]
+
+
+def create_hnsw_index_sql(
+    collection_name: str,
+    collection_id: str,
+    *,
+    m: int,
+    ef_construction: int,
+    quantization: Quantization = None,
+) -> str:
+    """``CREATE INDEX CONCURRENTLY`` statement of a collection's HNSW index;
+    it must run outside a transaction."""
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+        f"{hnsw_index_name(collection_name, quantization)} ON {EMBEDDING_TABLE} "
+        f"USING hnsw ({embedding_expression(quantization)} "
+        f"{operator_class(quantization)}) "
+        f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)}) "
+        f"WHERE collection_id = '{collection_id}'"
+    )
+
+
+async def _index_definition(connection: AsyncConnection, name: str) -> str | None:
+    return await connection.scalar(
+        text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"),
+        {"name": name},
+    )
+
+
+async def build_hnsw_index(
+    connection: AsyncConnection,
+    collection_name: str,
+    *,
+    m: int,
+    ef_construction: int,
+    quantization: Quantization = None,
+    rebuild: bool = False,
+) -> bool:
+    """Create the HNSW index for a collection; returns True if one was built.
+
+    The connection must be in autocommit mode because the index is built
+    ``CONCURRENTLY`` to keep the collection searchable meanwhile.
+    """
+    collection_id = await connection.scalar(
+        text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+        {"name": collection_name},
+    )
+    if collection_id is None:
+        logger.warning(f"Collection '{collection_name}' does not exist, skipping")
+        return False
+
+    name = hnsw_index_name(collection_name, quantization)
+    existing = await _index_definition(connection, name)
+    if existing and not rebuild:
+        logger.info(f"{name} already exists: {existing}")
+        return False
+    if existing:
+        await connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+    logger.info(f"Building {name} (m={m}, ef_construction={ef_construction})")
+    await connection.execute(
+        text(
+            create_hnsw_index_sql(
+                collection_name,
+                collection_id,
+                m=m,
+                ef_construction=ef_construction,
+                quantization=quantization,
+            )
+        )
+    )
+    return True
+
+
+async def index_status() -> list[dict]:
+    async with get_async_engine().connect() as connection:
+        rows = await connection.execute(
+            text(
+                f"""
+                SELECT c.name AS collection, i.indexname AS index,
+                       pg_relation_size(quote_ident(i.indexname)) AS size_bytes,
+                       (SELECT count(*) FROM {EMBEDDING_TABLE} e
+                        WHERE e.collection_id = c.uuid) AS rows
+                FROM {COLLECTION_TABLE} c
+                LEFT JOIN pg_indexes i
+                  ON i.tablename = '{EMBEDDING_TABLE}'
+                 AND i.indexdef LIKE '%hnsw%'
+                 AND i.indexdef LIKE '%' || c.uuid::text || '%'
+                ORDER BY c.name
+                """
+            )
+        )
+        return [dict(row._mapping) for row in rows]
+
+
+async def build_indexes(
+    collections: list[str],
+    *,
+    m: int,
+    ef_construction: int,
+    quantization: Quantization,
+    rebuild: bool,
+) -> None:
+    engine = get_async_engine().execution_options(isolation_level="AUTOCOMMIT")
+    async with engine.connect() as connection:
+        # HNSW builds are dramatically faster when the graph fits in memory.
+        await connection.execute(text("SET maintenance_work_mem = '1GB'"))
+        for collection_name in collections:
+            await build_hnsw_index(
+                connection,
+                collection_name,
+                m=m,
+                ef_construction=ef_construction,
+                quantization=quantization,
+                rebuild=rebuild,
+            )
+
+
+def main() -> None:
+    hnsw_config = config["retrieval"]["hnsw"]
+    collections = list(config["retrieval"]["collections"].values())
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Show HNSW indexes per collection")
+    build = subparsers.add_parser("build", help="Build HNSW indexes")
+    build.add_argument("--collection", action="append", choices=collections)
+    build.add_argument("--m", type=int, default=hnsw_config["m"])
+    build.add_argument(
+        "--ef-construction", type=int, default=hnsw_config["ef_construction"]
+    )
+    build.add_argument(
+        "--quantization",
+        choices=["none", "halfvec", "binary"],
+        default=config["retrieval"]["quantization"] or "none",
+    )
+    build.add_argument("--rebuild", action="store_true")
+    subparsers.add_parser(
+        "invalidate-answers", help="Drop cached answers after re-ingestion"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "status":
+        for row in asyncio.run(index_status()):
+            print(row)
+    elif args.command == "invalidate-answers":
+        asyncio.run(bump_collections_version())
+    else:
+        asyncio.run(
+            build_indexes(
+                args.collection or collections,
+                m=args.m,
+                ef_construction=args.ef_construction,
+                quantization=None if args.quantization == "none" else args.quantization,
+                rebuild=args.rebuild,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
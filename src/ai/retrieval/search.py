@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from functools import lru_cache
+
+from langchain.prompts import PromptTemplate
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from src.ai.config import config, get_embeddings_model, get_llm
+from src.ai.retrieval.context import (
+    ScoredDocument,
+    merge_by_similarity,
+    reciprocal_rank_fusion,
+)
+from src.ai.retrieval.vector_search import similarity_search_many
+from src.monitoring.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class QueryGenerationOutput(BaseModel):
+    queries: list[str]
+
+
+QUERY_PROMPT = PromptTemplate(
+    input_variables=["question"],
+    template="""You are an AI language model assistant. Your task is to generate five
+        different versions of the given user question to retrieve relevant documents from a vector
+        database. By generating multiple perspectives on the user question, your goal is to help
+        the user overcome some of the limitations of the distance-based similarity search.
+        Provide these alternative questions separated by newlines.
+        Original question: {question}""",
+)
+
+
+@lru_cache(maxsize=1)
+def get_query_generator() -> Runnable[dict[str, str], list[str]]:
+    llm = get_llm("query_generation")
+    return (
+        QUERY_PROMPT
+        | llm.with_structured_output(QueryGenerationOutput)
+        | RunnableLambda(lambda x: x.queries)
+    )
+
+
+async def _search_collection(
+    collection_name: str, embeddings: list[list[float]], k: int
+) -> list[list[ScoredDocument]]:
+    """Run every query variant against one collection."""
+    retrieval_config = config["retrieval"]
+    ef_search = retrieval_config["hnsw"]["ef_search_overrides"].get(
+        collection_name, retrieval_config["hnsw"]["ef_search"]
+    )
+    return await similarity_search_many(
+        collection_name,
+        embeddings,
+        k=k,
+        ef_search=max(ef_search, k),
+        quantization=retrieval_config["quantization"],
+        rescore_factor=retrieval_config["rescore_factor"],
+    )
+
+
+async def _search_collection_with_timeout(
+    collection_name: str, embeddings: list[list[float]], k: int, timeout: float
+) -> list[list[ScoredDocument]] | None:
+    try:
+        return await asyncio.wait_for(
+            _search_collection(collection_name, embeddings, k), timeout=timeout
+        )
+    except TimeoutError:
+        logger.warning(f"Search in '{collection_name}' timed out after {timeout}s")
+    except Exception as e:
+        logger.error(f"Search in '{collection_name}' failed: {e}")
+    return None
+
+
+async def _search_collections(
+    collection_names: list[str], embeddings: list[list[float]], k: int
+) -> list[list[ScoredDocument]]:
+    """Search several collections concurrently and merge results per query variant.
+
+    A collection that fails or exceeds its timeout is skipped so that it
+    does not hold up the others.
+    """
+    per_collection = await asyncio.gather(
+        *(
+            _search_collection_with_timeout(
+                collection_name,
+                embeddings,
+                k,
+                config["retrieval"]["collection_timeout_seconds"],
+            )
+            for collection_name in collection_names
+        )
+    )
+    available = [results for results in per_collection if results is not None]
+
+    return [
+        merge_by_similarity([results[i] for results in available], k)
+        for i in range(len(embeddings))
+    ]
+
+
+async def retrieve(
+    query: str,
+    collection_names: list[str],
+    *,
+    query_generator: Runnable[dict[str, str], list[str]] | None = None,
+    embeddings_model: Embeddings | None = None,
+) -> list[ScoredDocument]:
+    """Multi-query retrieval over one or more collections, fused with RRF.
+
+    The query generator and embeddings model default to the configured ones;
+    the retrieval benchmark passes deterministic stand-ins.
+    """
+    retrieval_config = config["retrieval"]
+    query_generator = query_generator or get_query_generator()
+    embeddings_model = embeddings_model or get_embeddings_model()
+
+    with tracer.start_as_current_span("retrieval.query_generation"):
+        generated = await query_generator.ainvoke({"question": query})
+    queries = list(dict.fromkeys(q.strip() for q in [query, *generated] if q.strip()))
+
+    # One embeddings request for all query variants instead of one per variant.
+    with tracer.start_as_current_span(
+        "retrieval.embeddings", attributes={"retrieval.queries": len(queries)}
+    ):
+        embeddings = await embeddings_model.aembed_documents(queries)
+
+    with tracer.start_as_current_span(
+        "retrieval.vector_search",
+        attributes={"retrieval.collections": collection_names},
+    ):
+        if len(collection_names) == 1:
+            results = await _search_collection(
+                collection_names[0], embeddings, retrieval_config["k"]
+            )
+        else:
+            results = await _search_collections(
+                collection_names, embeddings, retrieval_config["k"]
+            )
+
+    return reciprocal_rank_fusion(
+        [[doc for doc, _ in ranking] for ranking in results],
+        k=retrieval_config["rrf_k"],
+    )
@@ -0,0 +1,204 @@
+import time
+from typing import Literal, TypeAlias
+from uuid import UUID
+
+from langchain_core.documents import Document
+from sqlalchemy import text
+
+from src.ai.config import config
+from src.database.session import get_async_engine
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+COLLECTION_TABLE = "langchain_pg_collection"
+
+# How vectors are represented in the HNSW index. Rows always keep the full
+# precision embedding, which is used to rescore quantized candidates.
+Quantization: TypeAlias = Literal["halfvec", "binary"] | None
+
+# Collection name -> (expiry on the monotonic clock, collection id).
+_collection_ids: dict[str, tuple[float, UUID]] = {}
+
+
+def _dimensions(dimensions: int | None) -> int:
+    return dimensions or config["embeddings"]["dimensions"]
+
+
+def embedding_expression(
+    quantization: Quantization = None, dimensions: int | None = None
+) -> str:
+    """Indexed expression for the embedding column.
+
+    langchain_postgres creates the column as an untyped ``vector``, and HNSW
+    needs a fixed dimension, so indexes and queries both use this cast.
+    """
+    dimensions = _dimensions(dimensions)
+    if quantization == "halfvec":
+        return f"(embedding::halfvec({dimensions}))"
+    if quantization == "binary":
+        return f"(binary_quantize(embedding)::bit({dimensions}))"
+    return f"(embedding::vector({dimensions}))"
+
+
+def operator_class(quantization: Quantization = None) -> str:
+    if quantization == "halfvec":
+        return "halfvec_cosine_ops"
+    if quantization == "binary":
+        return "bit_hamming_ops"
+    return "vector_cosine_ops"
+
+
+def index_distance(
+    parameter: str, quantization: Quantization = None, dimensions: int | None = None
+) -> str:
+    """Distance between the indexed expression and a text-encoded vector."""
+    dimensions = _dimensions(dimensions)
+    query = f"CAST(CAST(:{parameter} AS text) AS vector)"
+    column = embedding_expression(quantization, dimensions)
+    if quantization == "halfvec":
+        return f"{column} <=> CAST({query} AS halfvec({dimensions}))"
+    if quantization == "binary":
+        return f"{column} <~> binary_quantize({query})::bit({dimensions})"
+    return f"{column} <=> {query}"
+
+
+def format_vector(embedding: list[float]) -> str:
+    return "[" + ",".join(repr(float(value)) for value in embedding) + "]"
+
+
+async def get_collection_id(collection_name: str) -> UUID | None:
+    """Id of a collection, cached for ``collection_id_ttl_seconds``.
+
+    Re-ingesting with ``pre_delete_collection`` gives a collection a new id;
+    the TTL bounds how long searches keep using the old one.
+    """
+    cached = _collection_ids.get(collection_name)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    async with get_async_engine().connect() as connection:
+        collection_id = await connection.scalar(
+            text(f"SELECT uuid FROM {COLLECTION_TABLE} WHERE name = :name"),
+            {"name": collection_name},
+        )
+
+    if collection_id is not None:
+        ttl = config["retrieval"]["collection_id_ttl_seconds"]
+        _collection_ids[collection_name] = (time.monotonic() + ttl, collection_id)
+    else:
+        _collection_ids.pop(collection_name, None)
+    return collection_id
+
+
+def search_query(
+    table: str = EMBEDDING_TABLE,
+    where: str = "collection_id = :collection_id",
+    columns: str = "id, document, cmetadata",
+    quantization: Quantization = None,
+    dimensions: int | None = None,
+) -> str:
+    """SQL for a k-NN search, with full precision rescoring when quantized.
+
+    A quantized search first takes ``:candidates`` rows from the quantized
+    index, then orders them by the exact cosine distance.
+    """
+    exact = index_distance("embedding", None, dimensions)
+    if quantization is None:
+        return f"""
+            SELECT {columns}, {exact} AS distance
+            FROM {table}
+            WHERE {where}
+            ORDER BY {exact}
+            LIMIT :k
+        """
+
+    approximate = index_distance("embedding", quantization, dimensions)
+    return f"""
+        SELECT {columns}, {exact} AS distance
+        FROM (
+            SELECT {columns}, embedding
+            FROM {table}
+            WHERE {where}
+            ORDER BY {approximate}
+            LIMIT :candidates
+        ) AS candidates
+        ORDER BY distance
+        LIMIT :k
+    """
+
+
+async def similarity_search_many(
+    collection_name: str,
+    embeddings: list[list[float]],
+    k: int,
+    ef_search: int,
+    quantization: Quantization = None,
+    rescore_factor: int = 4,
+) -> list[list[tuple[Document, float]]]:
+    """Nearest-neighbour searches in one collection, one per embedding,
+    returning cosine distances.
+
+    Unlike PGVector's own query this sets ``hnsw.ef_search`` for the
+    transaction and uses the same expression as the per-collection HNSW
+    index, so the planner can serve the query from it. All searches run
+    one after another in a single transaction, so a multi-query search
+    holds one pooled connection per collection rather than one per query.
+    """
+    collection_id = await get_collection_id(collection_name)
+    if collection_id is None:
+        return [[] for _ in embeddings]
+
+    parameters = {"collection_id": collection_id, "k": k}
+    if quantization:
+        parameters["candidates"] = k * rescore_factor
+    query = text(search_query(quantization=quantization))
+
+    results = []
+    async with get_async_engine().begin() as connection:
+        await connection.execute(
+            text(
+                "SELECT set_config('hnsw.ef_search', :ef_search, true),"
+                # The partial index can only be matched against a known
+                # collection id, which a generic prepared plan does not have.
+                " set_config('plan_cache_mode', 'force_custom_plan', true)"
+            ),
+            # An HNSW scan returns at most ef_search rows.
+            {"ef_search": str(max(ef_search, parameters.get("candidates", k)))},
+        )
+        for embedding in embeddings:
+            rows = await connection.execute(
+                query, {**parameters, "embedding": format_vector(embedding)}
+            )
+            results.append(
+                [
+                    (
+                        Document(
+                            id=str(row.id),
+                            page_content=row.document,
+                            metadata=row.cmetadata,
+                        ),
+                        row.distance,
+                    )
+                    for row in rows
+                ]
+            )
+    return results
+
+
+async def similarity_search_with_score(
+    collection_name: str,
+    embedding: list[float],
+    k: int,
+    ef_search: int,
+    quantization: Quantization = None,
+    rescore_factor: int = 4,
+) -> list[tuple[Document, float]]:
+    """Nearest-neighbour search in one collection, returning cosine distances."""
+    [results] = await similarity_search_many(
+        collection_name,
+        [embedding],
+        k=k,
+        ef_search=ef_search,
+        quantization=quantization,
+        rescore_factor=rescore_factor,
+    )
+    return results
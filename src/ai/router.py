@@ -0,0 +1,379 @@
+import asyncio
+import itertools
+import logging
+import statistics
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.messages.ai import UsageMetadata, add_usage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
+from opentelemetry.trace import Status, StatusCode
+
+from src.ai.tokens import token_counter
+from src.cache.rate_limiter import RateLimiter
+from src.monitoring.metrics import LLM_INPUT_TOKENS, LLM_OUTPUT_TOKENS
+from src.monitoring.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CandidateStats:
+    """Rolling time-to-first-token, latency and error history of one
+    provider/model serving one purpose."""
+
+    window: int
+    ttft: deque[float] = field(init=False)
+    latency: deque[float] = field(init=False)
+    errors: deque[bool] = field(init=False)
+    unhealthy_until: float = 0.0
+
+    def __post_init__(self):
+        self.ttft = deque(maxlen=self.window)
+        self.latency = deque(maxlen=self.window)
+        self.errors = deque(maxlen=self.window)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+    @property
+    def median_ttft(self) -> float | None:
+        return statistics.median(self.ttft) if self.ttft else None
+
+    @property
+    def median_latency(self) -> float | None:
+        return statistics.median(self.latency) if self.latency else None
+
+    def record_ttft(self, seconds: float) -> None:
+        self.ttft.append(seconds)
+
+    def record_latency(self, seconds: float) -> None:
+        self.latency.append(seconds)
+
+    def record_success(self) -> None:
+        self.errors.append(False)
+
+    def record_failure(self, cooldown_seconds: float) -> None:
+        self.errors.append(True)
+        self.unhealthy_until = time.monotonic() + cooldown_seconds
+
+
+# Per process, shared by every model routed over the same provider/model for
+# the same purpose: a slow purpose must not reorder the candidates of a fast one.
+_stats: dict[tuple[str, str], CandidateStats] = {}
+
+
+def get_stats(purpose: str, name: str, window: int) -> CandidateStats:
+    key = (purpose, name)
+    if key not in _stats:
+        _stats[key] = CandidateStats(window=window)
+    return _stats[key]
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model that serves a purpose from an ordered list of candidates.
+
+    Healthy candidates (not cooling down after a failure, error rate below
+    ``max_error_rate``) are tried first, fastest rolling median TTFT first
+    (median latency for purposes that are never streamed); candidates
+    without measurements keep their configured order after the measured
+    ones. A candidate that fails, or does not produce a first token
+    within ``first_token_timeout_seconds``, is skipped for the next one. Once
+    a streamed answer has started it is not retried elsewhere.
+
+    Async calls first reserve capacity from the candidate's rate limiter, if
+    it has one, and wait for it; the wait does not count towards TTFT.
+    """
+
+    purpose: str
+    names: list[str]
+    candidates: list[Runnable]
+    window: int = 50
+    max_error_rate: float = 0.5
+    cooldown_seconds: float = 30.0
+    first_token_timeout_seconds: float | None = None
+    # One per candidate, None for candidates without a configured limit.
+    limiters: list[RateLimiter | None] = []
+    # Output tokens reserved per call until actual usage is known.
+    output_token_reservation: int = 1_000
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"purpose": self.purpose, "candidates": self.names}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RoutedChatModel":
+        return self.model_copy(
+            update={
+                "candidates": [
+                    candidate.bind_tools(tools, **kwargs)
+                    for candidate in self.candidates
+                ]
+            }
+        )
+
+    def _ordered(
+        self,
+    ) -> list[tuple[str, Runnable, CandidateStats, RateLimiter | None]]:
+        now = time.monotonic()
+        limiters = self.limiters or [None] * len(self.candidates)
+        entries = [
+            (name, candidate, get_stats(self.purpose, name, self.window), limiter)
+            for name, candidate, limiter in zip(self.names, self.candidates, limiters)
+        ]
+
+        def healthy(stats: CandidateStats) -> bool:
+            return (
+                stats.unhealthy_until <= now and stats.error_rate <= self.max_error_rate
+            )
+
+        def speed(entry) -> tuple[bool, float]:
+            # Purposes that are never streamed have latencies but no TTFT.
+            stats = entry[2]
+            seconds = stats.median_ttft
+            if seconds is None:
+                seconds = stats.median_latency
+            return seconds is None, seconds or 0.0
+
+        # Unhealthy candidates are still tried last rather than never.
+        return sorted((e for e in entries if healthy(e[2])), key=speed) + [
+            e for e in entries if not healthy(e[2])
+        ]
+
+    def _child_config(self, run_manager) -> RunnableConfig:
+        # The router reports tokens itself; the candidate's run is traced
+        # but kept out of LangGraph's message stream to avoid duplicates.
+        if run_manager is None:
+            return {"tags": [TAG_NOSTREAM]}
+        # LLM run managers have no get_child(), so build the equivalent.
+        callbacks = CallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+        callbacks.set_handlers(run_manager.inheritable_handlers)
+        callbacks.add_tags(run_manager.inheritable_tags)
+        callbacks.add_metadata(run_manager.inheritable_metadata)
+        return {"callbacks": callbacks, "tags": [TAG_NOSTREAM]}
+
+    async def _reserve(
+        self, limiter: RateLimiter | None, messages: list[BaseMessage]
+    ) -> int:
+        if limiter is None:
+            return 0
+        tokens = self.output_token_reservation + token_counter(messages)
+        await limiter.acquire(tokens)
+        return tokens
+
+    @staticmethod
+    async def _refund(limiter: RateLimiter | None, reserved: int) -> None:
+        # A call that failed or produced nothing gives its reservation back.
+        if limiter is not None:
+            await limiter.adjust(reserved, 0)
+
+    async def _settle(
+        self,
+        name: str,
+        limiter: RateLimiter | None,
+        reserved: int,
+        usage: UsageMetadata | None,
+    ) -> None:
+        # Without usage the reservation stands as the estimate.
+        if usage is None:
+            return
+        cache_read = usage.get("input_token_details", {}).get("cache_read") or 0
+        LLM_INPUT_TOKENS.labels(name, "cache_read").inc(cache_read)
+        LLM_INPUT_TOKENS.labels(name, "uncached").inc(
+            max(usage["input_tokens"] - cache_read, 0)
+        )
+        LLM_OUTPUT_TOKENS.labels(name).inc(usage["output_tokens"])
+        if limiter is not None:
+            await limiter.adjust(reserved, usage["total_tokens"])
+
+    def _span_attributes(self, name: str) -> dict[str, str]:
+        return {"llm.purpose": self.purpose, "llm.model": name}
+
+    @staticmethod
+    def _record_usage(span, usage: UsageMetadata | None) -> None:
+        if usage:
+            span.set_attribute("llm.input_tokens", usage["input_tokens"])
+            span.set_attribute("llm.output_tokens", usage["output_tokens"])
+
+    def _failed(self, name: str, stats: CandidateStats, error: BaseException) -> None:
+        stats.record_failure(self.cooldown_seconds)
+        logger.warning(f"LLM candidate {name} for '{self.purpose}' failed: {error!r}")
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: BaseException | None = None
+        for name, candidate, stats, limiter in self._ordered():
+            with tracer.start_as_current_span(
+                "llm.generate", attributes=self._span_attributes(name)
+            ) as span:
+                reserved = await self._reserve(limiter, messages)
+                started = time.perf_counter()
+                try:
+                    message = await candidate.ainvoke(
+                        messages, self._child_config(run_manager), stop=stop, **kwargs
+                    )
+                except Exception as e:
+                    await self._refund(limiter, reserved)
+                    self._failed(name, stats, e)
+                    span.record_exception(e)
+                    span.set_status(Status(StatusCode.ERROR))
+                    error = e
+                    continue
+                stats.record_latency(time.perf_counter() - started)
+                stats.record_success()
+                usage = getattr(message, "usage_metadata", None)
+                self._record_usage(span, usage)
+                await self._settle(name, limiter, reserved, usage)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+        raise error
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        error: BaseException | None = None
+        for name, candidate, stats, limiter in self._ordered():
+            # Not made current: the span would outlive this generator's
+            # context between yields.
+            span = tracer.start_span(
+                "llm.stream", attributes=self._span_attributes(name)
+            )
+            try:
+                reserved = await self._reserve(limiter, messages)
+                started = time.perf_counter()
+                stream = candidate.astream(
+                    messages, self._child_config(run_manager), stop=stop, **kwargs
+                ).__aiter__()
+                try:
+                    first = await asyncio.wait_for(
+                        anext(stream), timeout=self.first_token_timeout_seconds
+                    )
+                except StopAsyncIteration:
+                    stats.record_success()
+                    await self._refund(limiter, reserved)
+                    return
+                except Exception as e:
+                    await stream.aclose()
+                    await self._refund(limiter, reserved)
+                    self._failed(name, stats, e)
+                    span.record_exception(e)
+                    span.set_status(Status(StatusCode.ERROR))
+                    error = e
+                    continue
+
+                ttft = time.perf_counter() - started
+                stats.record_ttft(ttft)
+                span.set_attribute("llm.ttft_ms", round(ttft * 1000))
+                usage = None
+                try:
+                    async for message in _prepend(first, stream):
+                        if message.usage_metadata:
+                            usage = add_usage(usage, message.usage_metadata)
+                        chunk = ChatGenerationChunk(message=message)
+                        if run_manager:
+                            await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                        yield chunk
+                except Exception as e:
+                    # Part of the answer is out already, so no failover.
+                    self._failed(name, stats, e)
+                    span.record_exception(e)
+                    span.set_status(Status(StatusCode.ERROR))
+                    await self._settle(name, limiter, reserved, usage)
+                    raise
+                stats.record_success()
+                self._record_usage(span, usage)
+                await self._settle(name, limiter, reserved, usage)
+                return
+            finally:
+                span.end()
+        raise error
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: BaseException | None = None
+        for name, candidate, stats, _ in self._ordered():
+            started = time.perf_counter()
+            try:
+                message = candidate.invoke(
+                    messages, self._child_config(run_manager), stop=stop, **kwargs
+                )
+            except Exception as e:
+                self._failed(name, stats, e)
+                error = e
+                continue
+            stats.record_latency(time.perf_counter() - started)
+            stats.record_success()
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise error
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        error: BaseException | None = None
+        for name, candidate, stats, _ in self._ordered():
+            started = time.perf_counter()
+            stream = candidate.stream(
+                messages, self._child_config(run_manager), stop=stop, **kwargs
+            )
+            try:
+                first = next(stream)
+            except StopIteration:
+                stats.record_success()
+                return
+            except Exception as e:
+                self._failed(name, stats, e)
+                error = e
+                continue
+
+            stats.record_ttft(time.perf_counter() - started)
+            try:
+                for message in itertools.chain([first], stream):
+                    chunk = ChatGenerationChunk(message=message)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+            except Exception as e:
+                self._failed(name, stats, e)
+                raise
+            stats.record_success()
+            return
+        raise error
+
+
+async def _prepend(first, rest: AsyncIterator) -> AsyncIterator:
+    yield first
+    async for item in rest:
+        yield item
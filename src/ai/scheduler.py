@@ -0,0 +1,157 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from src.ai.config import config
+from src.database.plans import SubscriptionPlan
+from src.monitoring.metrics import (
+    SCHEDULER_DEADLINE_ADMISSIONS,
+    SCHEDULER_QUEUE_DEPTH,
+    SCHEDULER_WAIT_SECONDS,
+)
+from src.monitoring.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class _Ticket:
+    tenant: str
+    plan: SubscriptionPlan
+    start: float
+    finish: float
+    sequence: int
+    enqueued_at: float
+    granted: asyncio.Future = field(repr=False)
+    deadline: asyncio.TimerHandle | None = field(default=None, repr=False)
+
+
+class GenerationScheduler:
+    """Weighted fair queue in front of agent runs in this worker.
+
+    Each tenant (user) is a flow weighted by its plan: a queued run gets the
+    virtual finish time ``max(V, tenant's last finish) + 1 / weight`` and
+    free slots go to the lowest one, so a burst from one tenant or from
+    lower-weight plans cannot starve the others. A run that has waited its
+    plan's ``max_wait_seconds`` is admitted even when all slots are busy, up
+    to ``max_overflow`` extra concurrent runs.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_overflow: int,
+        plans: dict[SubscriptionPlan, dict],
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_overflow = max_overflow
+        self.plans = plans
+        self._queue: list[_Ticket] = []
+        self._active = 0
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._sequence = itertools.count()
+
+    def _enqueue(self, tenant: str, plan: SubscriptionPlan) -> _Ticket:
+        plan_config = self.plans[plan]
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        ticket = _Ticket(
+            tenant=tenant,
+            plan=plan,
+            start=start,
+            finish=start + 1 / plan_config["weight"],
+            sequence=next(self._sequence),
+            enqueued_at=time.monotonic(),
+            granted=asyncio.get_running_loop().create_future(),
+        )
+        self._last_finish[tenant] = ticket.finish
+        self._queue.append(ticket)
+        SCHEDULER_QUEUE_DEPTH.labels(plan.name).inc()
+        ticket.deadline = asyncio.get_running_loop().call_later(
+            plan_config["max_wait_seconds"], self._admit_overdue, ticket
+        )
+        return ticket
+
+    def _grant(self, ticket: _Ticket) -> None:
+        self._queue.remove(ticket)
+        if ticket.deadline:
+            ticket.deadline.cancel()
+        self._active += 1
+        self._virtual_time = max(self._virtual_time, ticket.start)
+        SCHEDULER_QUEUE_DEPTH.labels(ticket.plan.name).dec()
+        SCHEDULER_WAIT_SECONDS.labels(ticket.plan.name).observe(
+            time.monotonic() - ticket.enqueued_at
+        )
+        ticket.granted.set_result(None)
+
+    def _overdue(self, ticket: _Ticket, now: float) -> bool:
+        return now - ticket.enqueued_at >= self.plans[ticket.plan]["max_wait_seconds"]
+
+    def _dispatch(self) -> None:
+        while self._queue and self._active < self.max_concurrent:
+            now = time.monotonic()
+            self._grant(
+                min(
+                    self._queue,
+                    key=lambda t: (not self._overdue(t, now), t.finish, t.sequence),
+                )
+            )
+        if not self._queue:
+            # Idle: restart virtual time so old finish tags do not linger.
+            self._virtual_time = 0.0
+            self._last_finish.clear()
+
+    def _admit_overdue(self, ticket: _Ticket) -> None:
+        if ticket not in self._queue:
+            return
+        if self._active < self.max_concurrent + self.max_overflow:
+            SCHEDULER_DEADLINE_ADMISSIONS.labels(ticket.plan.name).inc()
+            self._grant(ticket)
+        else:
+            logger.warning(
+                f"Generation for plan {ticket.plan.name} exceeded its maximum "
+                "wait with no overflow capacity left"
+            )
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, plan: SubscriptionPlan) -> AsyncIterator[None]:
+        ticket = self._enqueue(tenant, plan)
+        self._dispatch()
+        try:
+            with tracer.start_as_current_span(
+                "scheduler.wait", attributes={"scheduler.plan": plan.name}
+            ):
+                await ticket.granted
+        except asyncio.CancelledError:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                if ticket.deadline:
+                    ticket.deadline.cancel()
+                SCHEDULER_QUEUE_DEPTH.labels(plan.name).dec()
+            else:
+                self._release()
+            raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+
+@lru_cache(maxsize=1)
+def get_scheduler() -> GenerationScheduler:
+    scheduler_config = config["scheduler"]
+    return GenerationScheduler(
+        max_concurrent=scheduler_config["max_concurrent_generations"],
+        max_overflow=scheduler_config["max_overflow"],
+        plans=scheduler_config["plans"],
+    )
@@ -0,0 +1,197 @@
+"""Incremental summarization of long threads.
+
+After each completed turn the messages older than the last
+``keep_last_messages`` are folded into a rolling per-thread summary, off the
+critical path of the user's turn. The agent's pre-model hook then sends the
+summary followed by the messages it does not cover, so the prompt stays
+bounded without summarizing in the middle of a turn.
+"""
+
+import logging
+from collections.abc import Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    trim_messages,
+)
+from langchain_core.runnables import RunnableConfig
+from langmem.short_term import SummarizationNode
+
+from src.ai.config import config, get_llm
+from src.ai.prompt import SUMMARY_CONTEXT_PROMPT, SUMMARY_PROMPT
+from src.ai.tokens import token_counter, truncate_to_tokens
+from src.database.session import get_session
+from src.database.thread_summaries import ThreadSummary
+from src.monitoring.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+def _settings() -> dict:
+    # Read through a function: the pre-model hook's ``config`` argument
+    # shadows the module-level settings.
+    return config["summarization"]
+
+
+def is_incremental() -> bool:
+    return _settings()["mode"] == "incremental"
+
+
+def split_point(messages: Sequence[BaseMessage], keep_last: int) -> int:
+    """Start of the verbatim tail: the last human message that leaves at
+    least ``keep_last`` messages after it, so tool calls are never split
+    from their results. 0 when nothing can be summarized yet."""
+    for index in range(len(messages) - keep_last, 0, -1):
+        if isinstance(messages[index], HumanMessage):
+            return index
+    return 0
+
+
+def _covered(messages: Sequence[BaseMessage], summary: ThreadSummary | None) -> int:
+    """Number of leading messages the summary covers."""
+    if summary is None:
+        return 0
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].id == summary.last_message_id:
+            return index + 1
+    # The history was rewritten; the summary no longer applies.
+    return 0
+
+
+def build_prompt(
+    messages: Sequence[BaseMessage],
+    summary: ThreadSummary | None,
+    max_tokens: int,
+) -> list[BaseMessage]:
+    covered = _covered(messages, summary)
+    prompt = list(messages[covered:])
+    tokens = token_counter.count_history(messages, start=covered)
+    if covered:
+        prompt.insert(
+            0, SystemMessage(SUMMARY_CONTEXT_PROMPT.format(summary=summary.summary))
+        )
+        tokens += token_counter.count(prompt[0])
+
+    if tokens > max_tokens:
+        # Only when summaries fall far behind, e.g. the summary model is down.
+        prompt = trim_messages(
+            prompt,
+            max_tokens=max_tokens,
+            token_counter=token_counter,
+            strategy="last",
+            start_on="human",
+            include_system=covered > 0,
+        )
+    return prompt
+
+
+def _transcript(messages: Sequence[BaseMessage], tool_output_tokens: int) -> str:
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {message.text()}")
+        elif isinstance(message, AIMessage):
+            if message.text():
+                lines.append(f"Assistant: {message.text()}")
+            for tool_call in message.tool_calls:
+                lines.append(
+                    f"Assistant called {tool_call['name']}({tool_call['args']})"
+                )
+        elif isinstance(message, ToolMessage):
+            output = truncate_to_tokens(message.text(), tool_output_tokens)
+            lines.append(f"{message.name} returned: {output}")
+    return "\n\n".join(lines)
+
+
+async def advance(
+    llm: BaseChatModel,
+    thread_id: str,
+    messages: Sequence[BaseMessage],
+    summary: ThreadSummary | None,
+) -> ThreadSummary | None:
+    """Fold the messages before the verbatim tail into the summary.
+
+    Returns None while the unsummarized part is below
+    ``min_tokens_to_summarize``, so short threads never call the model.
+    """
+    summarization = _settings()
+    covered = _covered(messages, summary)
+    end = split_point(messages, summarization["keep_last_messages"])
+    if end <= covered:
+        return None
+    new_messages = messages[covered:end]
+    if token_counter(new_messages) < summarization["min_tokens_to_summarize"]:
+        return None
+
+    response = await llm.ainvoke(
+        SUMMARY_PROMPT.format(
+            summary=summary.summary if covered else "",
+            transcript=_transcript(
+                new_messages, summarization["max_tool_output_tokens"]
+            ),
+        )
+    )
+    return ThreadSummary(
+        thread_id=thread_id,
+        summary=response.text(),
+        last_message_id=messages[end - 1].id,
+        message_count=end,
+    )
+
+
+@traced("summary.update")
+async def update_summary(thread_id: str, messages: Sequence[BaseMessage]) -> None:
+    """Bring the thread's stored summary up to date after a turn."""
+    async with get_session() as session:
+        summary = await ThreadSummary.get(thread_id, session)
+    updated = await advance(get_llm("summary"), thread_id, messages, summary)
+    if updated is None:
+        return
+    async with get_session() as session:
+        await ThreadSummary.save(updated, session)
+    logger.info(
+        f"Summary of thread {thread_id} covers {updated.message_count} messages"
+    )
+
+
+@traced("summary.load")
+async def rolling_summary_hook(state: dict, config: RunnableConfig) -> dict:
+    """Pre-model hook sending the stored summary plus the uncovered messages."""
+    async with get_session() as session:
+        summary = await ThreadSummary.get(config["configurable"]["thread_id"], session)
+    return {
+        "llm_input_messages": build_prompt(
+            state["messages"], summary, _settings()["max_prompt_tokens"]
+        )
+    }
+
+
+class OnDemandSummarizationNode(SummarizationNode):
+    """langmem's summarization node, skipped while nothing can be summarized.
+
+    langmem counts every message of the history on each model step. Until a
+    thread is first summarized, the running total kept by
+    ``token_counter.count_history`` decides it instead, counting only the
+    messages added since the last step. After that langmem only counts the
+    messages the running summary does not cover.
+    """
+
+    def _unchanged(self, input: dict) -> dict | None:
+        messages, context = self._parse_input(input)
+        if context.get("running_summary"):
+            return None
+        threshold = self.max_tokens_before_summary or self.max_tokens
+        if token_counter.count_history(messages) >= threshold:
+            return None
+        return {self.output_messages_key: messages}
+
+    def _func(self, input: dict) -> dict:
+        return self._unchanged(input) or super()._func(input)
+
+    async def _afunc(self, input: dict) -> dict:
+        return self._unchanged(input) or await super()._afunc(input)
@@ -0,0 +1,104 @@
+import math
+from collections.abc import Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+# Cyrillic text tokenizes noticeably denser than English with the OpenAI and
+# Gemini tokenizers, so the usual "4 characters per token" undercounts.
+CHARS_PER_TOKEN = 3.0
+
+
+def approx_token_count(text: str, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    """Cheap token estimate that does not require a tokenizer."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / chars_per_token)
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int, chars_per_token: float = CHARS_PER_TOKEN
+) -> str:
+    """Cut text to roughly `max_tokens`, preferring a paragraph or sentence end."""
+    max_chars = int(max_tokens * chars_per_token)
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    for separator in ("\n\n", "\n", ". "):
+        position = cut.rfind(separator)
+        if position > max_chars // 2:
+            return cut[: position + len(separator)].rstrip()
+    return cut.rstrip()
+
+
+def approx_message_tokens(message: BaseMessage) -> int:
+    tokens = approx_token_count(str(message.content))
+    if isinstance(message, AIMessage):
+        for tool_call in message.tool_calls:
+            tokens += approx_token_count(str(tool_call["args"]))
+    return tokens
+
+
+class MessageTokenCounter:
+    """Approximate message token counts, cached by message id.
+
+    Calling the counter sums per-message counts, each computed once, so it
+    can be passed as a ``token_counter`` to langchain and langmem helpers.
+    ``count_history`` also remembers running totals by position, so counting
+    an append-only thread history costs only the messages added since the
+    last call. Messages without an id are counted every time.
+    """
+
+    def __init__(self, maxsize: int = 200_000):
+        self.maxsize = maxsize
+        # message id -> (content length, tokens)
+        self._tokens: dict[str, tuple[int, int]] = {}
+        # message id -> (position in its history, total tokens up to it)
+        self._totals: dict[str, tuple[int, int]] = {}
+
+    def _remember(self, cache: dict, key: str, value: tuple[int, int]) -> None:
+        if len(cache) >= self.maxsize:
+            # Oldest first; cheaper than LRU bookkeeping on every hit.
+            del cache[next(iter(cache))]
+        cache[key] = value
+
+    def count(self, message: BaseMessage) -> int:
+        if message.id is None:
+            return approx_message_tokens(message)
+        length = len(message.content)
+        cached = self._tokens.get(message.id)
+        if cached is not None and cached[0] == length:
+            return cached[1]
+        tokens = approx_message_tokens(message)
+        self._remember(self._tokens, message.id, (length, tokens))
+        return tokens
+
+    def __call__(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(self.count(message) for message in messages)
+
+    def count_history(self, messages: Sequence[BaseMessage], start: int = 0) -> int:
+        """Tokens of ``messages[start:]``, where ``messages`` is a thread
+        history that is only ever appended to."""
+        total = self._history_total(messages)
+        if start and messages[start - 1].id in self._totals:
+            return total - self._totals[messages[start - 1].id][1]
+        return total - self(messages[:start])
+
+    def _history_total(self, messages: Sequence[BaseMessage]) -> int:
+        start, total = 0, 0
+        for index in range(len(messages) - 1, -1, -1):
+            cached = self._totals.get(messages[index].id)
+            if cached is not None and cached[0] == index:
+                start, total = index + 1, cached[1]
+                break
+
+        for index in range(start, len(messages)):
+            message = messages[index]
+            total += self.count(message)
+            if message.id is not None:
+                self._remember(self._totals, message.id, (index, total))
+        return total
+
+
+# Shared by the pre-model hooks and the router in this process.
+token_counter = MessageTokenCounter()
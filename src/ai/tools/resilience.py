@@ -0,0 +1,209 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from langchain_core.callbacks import Callbacks
+from langchain_core.runnables import RunnableConfig, patch_config
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from opentelemetry import trace
+
+from src.ai.config import config
+from src.cache.redis import get_redis
+from src.monitoring.metrics import TOOL_CALLS, TOOL_HEDGED_CALLS
+from src.monitoring.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_MESSAGE = (
+    "Tool {name} is temporarily unavailable ({reason}). "
+    "Do not call it again for this answer; use other tools or answer from "
+    "your own knowledge and state this limitation."
+)
+
+
+def get_tool_config(name: str) -> dict[str, Any]:
+    tools_config = config["tools"]
+    return {**tools_config["default"], **tools_config.get(name, {})}
+
+
+class CircuitBreaker:
+    """Failure counter shared by all workers through Redis.
+
+    After ``failure_threshold`` failures within ``failure_window_seconds``
+    the circuit opens for ``reset_seconds``. It is then half-open: a single
+    probe call, picked with a ``SET NX`` key, is let through, and closes the
+    circuit on success or opens it again on failure. Other calls are
+    rejected until the probe finishes, or for at most ``reset_seconds``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        failure_window_seconds: int,
+        reset_seconds: int,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window_seconds = failure_window_seconds
+        self.reset_seconds = reset_seconds
+        self._failures_key = f"circuit:{name}:failures"
+        self._open_key = f"circuit:{name}:open"
+        self._half_open_key = f"circuit:{name}:half_open"
+        self._probe_key = f"circuit:{name}:probe"
+
+    async def allow(self) -> bool:
+        """Whether a call may go through now."""
+        try:
+            redis = get_redis()
+            if await redis.exists(self._open_key):
+                return False
+            if not await redis.exists(self._half_open_key):
+                return True
+            return bool(
+                await redis.set(self._probe_key, "1", nx=True, ex=self.reset_seconds)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read circuit state of {self.name}: {e}")
+            return True
+
+    async def record_success(self) -> None:
+        try:
+            await get_redis().delete(
+                self._failures_key, self._half_open_key, self._probe_key
+            )
+        except Exception as e:
+            logger.warning(f"Failed to reset circuit of {self.name}: {e}")
+
+    async def record_failure(self) -> None:
+        try:
+            redis = get_redis()
+            if await redis.exists(self._half_open_key):
+                # The probe failed.
+                failures = self.failure_threshold
+            else:
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.set(
+                        self._failures_key,
+                        0,
+                        nx=True,
+                        ex=self.failure_window_seconds,
+                    )
+                    pipe.incr(self._failures_key)
+                    _, failures = await pipe.execute()
+            if failures >= self.failure_threshold:
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.set(self._open_key, "1", ex=self.reset_seconds)
+                    pipe.set(self._half_open_key, "1")
+                    pipe.delete(self._failures_key, self._probe_key)
+                    await pipe.execute()
+                logger.warning(
+                    f"Circuit of {self.name} opened after {failures} failures"
+                )
+        except Exception as e:
+            logger.warning(f"Failed to record failure of {self.name}: {e}")
+
+
+async def hedged(
+    call: Callable[[], Awaitable[Any]], hedge_after: float | None, name: str
+) -> Any:
+    """Run ``call``; if it has not finished after ``hedge_after`` seconds,
+    start a second identical call and return whichever succeeds first."""
+    first = asyncio.ensure_future(call())
+    if hedge_after is None:
+        return await first
+
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            TOOL_HEDGED_CALLS.labels(name).inc()
+            tasks.add(asyncio.ensure_future(call()))
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def with_resilience(tool: BaseTool) -> BaseTool:
+    """Wrap a tool with a deadline, optional hedging and a circuit breaker.
+
+    A call that times out, fails or hits an open circuit returns a short
+    "unavailable" message instead of blocking or failing the agent run.
+    ToolException is passed through, as it reports a bad call rather than
+    an unhealthy service.
+    """
+    tool_config = get_tool_config(tool.name)
+    breaker = CircuitBreaker(
+        tool.name,
+        failure_threshold=tool_config["failure_threshold"],
+        failure_window_seconds=tool_config["failure_window_seconds"],
+        reset_seconds=tool_config["reset_seconds"],
+    )
+
+    def record(outcome: str) -> None:
+        TOOL_CALLS.labels(tool.name, outcome).inc()
+        trace.get_current_span().set_attribute("tool.outcome", outcome)
+
+    @traced(f"tool.{tool.name}")
+    async def call(
+        config: RunnableConfig, callbacks: Callbacks = None, **kwargs: Any
+    ) -> Any:
+        if not await breaker.allow():
+            record("rejected")
+            return UNAVAILABLE_MESSAGE.format(name=tool.name, reason="circuit open")
+
+        # Run the tool with the caller's config, as a child of this call.
+        config = patch_config(config, callbacks=callbacks)
+        try:
+            result = await asyncio.wait_for(
+                hedged(
+                    lambda: tool.ainvoke(kwargs, config),
+                    tool_config["hedge_after_seconds"],
+                    tool.name,
+                ),
+                timeout=tool_config["timeout_seconds"],
+            )
+        except ToolException:
+            record("ok")
+            await breaker.record_success()
+            raise
+        except TimeoutError:
+            logger.warning(
+                f"Tool {tool.name} timed out after {tool_config['timeout_seconds']}s"
+            )
+            record("timeout")
+            await breaker.record_failure()
+            return UNAVAILABLE_MESSAGE.format(name=tool.name, reason="timed out")
+        except Exception as e:
+            logger.error(f"Tool {tool.name} failed: {e}")
+            record("error")
+            await breaker.record_failure()
+            return UNAVAILABLE_MESSAGE.format(name=tool.name, reason="error")
+
+        # TavilySearch reports upstream failures as {"error": ...}.
+        if isinstance(result, dict) and "error" in result:
+            logger.error(f"Tool {tool.name} failed: {result['error']}")
+            record("error")
+            await breaker.record_failure()
+            return UNAVAILABLE_MESSAGE.format(name=tool.name, reason="error")
+
+        record("ok")
+        await breaker.record_success()
+        return result
+
+    return StructuredTool.from_function(
+        coroutine=call,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
@@ -1,57 +1,13 @@
 from langchain.tools import StructuredTool
 from typing import Literal, TypeAlias
 from pydantic import BaseModel
-from src.ai.config import get_llm
-from langchain.retrievers.multi_query import MultiQueryRetriever
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnableLambda
-from langchain_postgres import PGVector
-from src.ai.config import get_embeddings_model
-from functools import lru_cache
-from src.database.config import db_config
-
+from src.ai.config import config
+from src.ai.retrieval.context import build_context
+from src.ai.retrieval.search import retrieve
 
 SearchType: TypeAlias = Literal[
-    "constitution"
-]  # , "laws", "codes", "judicial practice", "all"]
-
-
-@lru_cache(maxsize=1)  # TODO: increase when we have more collections
-def get_vector_store(search_source: SearchType) -> PGVector:
-    return PGVector(
-        embeddings=get_embeddings_model(),
-        collection_name=search_source,
-        connection=db_config.langchain_connection_string,
-        use_jsonb=True,
-        async_mode=True,
-    )
-
-
-class QueryGenerationOutput(BaseModel):
-    queries: list[str]
-
-
-def get_retriever(collection_name: SearchType):
-    llm = get_llm("query_generation")
-    QUERY_PROMPT = PromptTemplate(
-        input_variables=["question"],
-        template="""You are an AI language model assistant. Your task is to generate five
-        different versions of the given user question to retrieve relevant documents from a vector
-        database. By generating multiple perspectives on the user question, your goal is to help
-        the user overcome some of the limitations of the distance-based similarity search.
-        Provide these alternative questions separated by newlines.
-        Original question: {question}""",
-    )
-    llm_chain = (
-        QUERY_PROMPT
-        | llm.with_structured_output(QueryGenerationOutput)
-        | RunnableLambda(lambda x: x.queries)
-    )
-    vector_store = get_vector_store(collection_name)
-    return MultiQueryRetriever(
-        retriever=vector_store.as_retriever(),
-        llm_chain=llm_chain,
-    )
+    "constitution", "all"
+]  # , "laws", "codes", "judicial practice"]
 
 
 class InputData(BaseModel):
@@ -60,11 +16,21 @@ class InputData(BaseModel):
 
 
 async def search_documents(query: str, search_source: SearchType) -> str:
-    retriever = get_retriever(search_source)
-
-    docs = await retriever.ainvoke(query)
-
-    return "\n\n".join([doc.page_content for doc in docs])
+    retrieval_config = config["retrieval"]
+    collections = retrieval_config["collections"]
+    if search_source == "all":
+        collection_names = list(collections.values())
+    else:
+        collection_names = [collections[search_source]]
+
+    fused = await retrieve(query, collection_names)
+    return build_context(
+        fused,
+        token_budget=retrieval_config["context_token_budget"],
+        near_duplicate_threshold=retrieval_config["near_duplicate_threshold"],
+        article_key=retrieval_config["article_key"],
+        chunk_key=retrieval_config["chunk_key"],
+    )
 
 
 tool_description = """
@@ -81,6 +47,7 @@ When not to use:
 
 How to call:
 - Provide a concise Ukrainian query that describes the legal point or article needed.
+- Set search_source to a specific collection when you know where the norm lives, otherwise use "all".
 """.strip()
 
 
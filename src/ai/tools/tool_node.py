@@ -0,0 +1,43 @@
+import asyncio
+from collections.abc import Sequence
+from typing import Literal
+
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.config import get_stream_writer
+from langgraph.prebuilt import ToolNode
+
+
+class ParallelToolNode(ToolNode):
+    """ToolNode that bounds concurrent tool calls and reports their progress.
+
+    create_react_agent already runs the tool calls of one model step as
+    separate concurrent tasks; this caps how many run at once and writes
+    a ``tool_call`` event to the custom stream when each starts and ends.
+    """
+
+    def __init__(self, tools: Sequence[BaseTool], max_parallel_calls: int):
+        super().__init__(tools)
+        self._semaphore = asyncio.Semaphore(max_parallel_calls)
+
+    async def _arun_one(
+        self,
+        call: ToolCall,
+        input_type: Literal["list", "dict", "tool_calls"],
+        config: RunnableConfig,
+    ) -> ToolMessage:
+        write = get_stream_writer()
+        event = {"type": "tool_call", "id": call["id"], "name": call["name"]}
+
+        async with self._semaphore:
+            write({**event, "status": "started"})
+            try:
+                message = await super()._arun_one(call, input_type, config)
+            except BaseException:
+                write({**event, "status": "error"})
+                raise
+
+        status = getattr(message, "status", "success")
+        write({**event, "status": "error" if status == "error" else "finished"})
+        return message
@@ -1,6 +1,14 @@
+from typing import Any
+
+from langchain_core.tools import StructuredTool
 from langchain_tavily import TavilySearch
 
-tool = TavilySearch(
+from src.ai import fake
+from src.ai.config import config, get_rate_limiter
+from src.cache.result_cache import ResultCache
+from src.monitoring.tracing import traced
+
+tavily = TavilySearch(
     max_results=7,
     topic="general",
     exclude_domains=[
@@ -55,4 +63,59 @@ tool = TavilySearch(
         "riafan.ru",
         "blitz-news.ru",
     ],
+    # Fake mode never calls Tavily, but the wrapper requires a key.
+    **({"tavily_api_key": "fake"} if config["fake"]["enabled"] else {}),
+)
+
+cache = ResultCache(
+    "web_search",
+    ttl_seconds=config["web_search"]["cache_ttl_seconds"],
+    lock_timeout_seconds=config["web_search"]["lock_timeout_seconds"],
+)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+async def search(query: str, **options: Any) -> dict[str, Any]:
+    options = {
+        name: sorted(value) if isinstance(value, list) else value
+        for name, value in options.items()
+        if value is not None
+    }
+    payload = {
+        "query": normalize_query(query),
+        "options": options,
+        "max_results": tavily.max_results,
+        "topic": tavily.topic,
+        "exclude_domains": sorted(tavily.exclude_domains),
+    }
+
+    @traced("tavily.search")
+    async def call_tavily() -> dict[str, Any]:
+        if config["fake"]["enabled"]:
+            return await fake.web_search(
+                query,
+                latency_seconds=config["fake"]["search_latency_seconds"],
+                max_results=tavily.max_results,
+                **options,
+            )
+        if limiter := get_rate_limiter("tavily:search"):
+            await limiter.acquire()
+        return await tavily.ainvoke({"query": query, **options})
+
+    return await cache.get_or_compute(
+        payload,
+        call_tavily,
+        # TavilySearch returns failed requests as {"error": ...} instead of raising.
+        should_cache=lambda result: "error" not in result,
+    )
+
+
+tool = StructuredTool.from_function(
+    coroutine=search,
+    name=tavily.name,
+    description=tavily.description,
+    args_schema=tavily.args_schema,
 )
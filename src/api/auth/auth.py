@@ -3,6 +3,7 @@ from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.database.subscriptions import Subscription
@@ -11,12 +12,10 @@ from src.database.session import get_session
 from src.database.password_resets import PasswordReset
 from src.database.refresh_tokens import RefreshToken
 from src.database.users import User
-from src.database.plans import SubscriptionPlan
-from src.database.subscriptions import SubscriptionStatus
+from src.cache.principal_cache import principal_cache
 from src.middleware.auth_middleware import get_current_user
 from src.services.auth_service import AuthConfig, AuthService, TokenService
 from src.services.email_service import EmailService
-from sqlalchemy import select
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -25,6 +24,19 @@ auth_service = AuthService()
 email_service = EmailService()
 
 
+async def _get_user_record(
+    principal: schema.Principal, session: AsyncSession
+) -> User:
+    """Database record of the authenticated user, bypassing the principal cache."""
+    user = await User.get_by_id(principal.id, session)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Користувача не знайдено",
+        )
+    return user
+
+
 @router.post(
     "/register",
     response_model=schema.RegisterResponse,
@@ -53,7 +65,9 @@ async def register(user_data: schema.UserRegisterRequest):
             )
 
         # Hash password
-        password_hash = auth_service.password_service.hash_password(user_data.password)
+        password_hash = await auth_service.password_service.hash_password(
+            user_data.password
+        )
 
         # Generate email verification token
         verification_token, expires_at = (
@@ -117,11 +131,7 @@ async def login(user_data: schema.UserLoginRequest):
             user, session
         )
 
-        subscription = await session.scalar(select(Subscription).where(Subscription.user_id == user.id))
-        if not subscription or subscription.status == SubscriptionStatus.FROZEN.value:
-            plan_id = SubscriptionPlan.FREE.value
-        else:
-            plan_id = subscription.plan_id
+        plan_id = (await Subscription.get_user_plan(user.id, session)).value
 
         user_response = schema.UserResponse(name=user.name, email=user.email, plan_id=plan_id)
 
@@ -174,7 +184,8 @@ async def refresh_token(token_data: schema.RefreshTokenRequest):
 
 @router.post("/logout", response_model=schema.MessageResponse)
 async def logout(
-    logout_data: schema.LogoutRequest, current_user: User = Depends(get_current_user)
+    logout_data: schema.LogoutRequest,
+    current_user: schema.Principal = Depends(get_current_user),
 ):
     """Logout user and revoke refresh token."""
     session = get_session()
@@ -272,7 +283,7 @@ async def reset_password(request_data: schema.ResetPasswordRequest):
             )
 
         # Update password
-        user.password_hash = auth_service.password_service.hash_password(
+        user.password_hash = await auth_service.password_service.hash_password(
             request_data.new_password
         )
 
@@ -283,6 +294,7 @@ async def reset_password(request_data: schema.ResetPasswordRequest):
         await RefreshToken.revoke_all_user_tokens(user.id, session)
 
         await session.commit()
+        await principal_cache.invalidate(user.id)
 
         return schema.MessageResponse(message="Пароль успішно змінено")
 
@@ -303,6 +315,7 @@ async def verify_email(token: str):
 
         # Verify email
         await user.verify_email(session)
+        await principal_cache.invalidate(user.id)
 
         return schema.MessageResponse(message="Електронну адресу успішно підтверджено")
 
@@ -355,29 +368,31 @@ async def resend_verification_email(request_data: schema.ResendVerificationReque
 
 
 @router.get("/me", response_model=schema.UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: schema.Principal = Depends(get_current_user),
+):
     """Get current user information."""
-    async with get_session() as session:
-        subscription = await session.scalar(select(Subscription).where(Subscription.user_id == current_user.id))
-        if not subscription or subscription.status == SubscriptionStatus.FROZEN.value:
-            plan_id = SubscriptionPlan.FREE.value
-        else:
-            plan_id = subscription.plan_id
-    return schema.UserResponse(name=current_user.name, email=current_user.email, plan_id=plan_id)
+    return schema.UserResponse(
+        name=current_user.name,
+        email=current_user.email,
+        plan_id=current_user.plan.value,
+    )
 
 
 @router.post("/change-password", response_model=schema.MessageResponse)
 async def change_password(
     request_data: schema.ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: schema.Principal = Depends(get_current_user),
 ):
     """Change user's password."""
     session = get_session()
 
     async with session:
+        user = await _get_user_record(current_user, session)
+
         # Verify current password
-        if not auth_service.password_service.verify_password(
-            request_data.current_password, current_user.password_hash
+        if not await auth_service.password_service.verify_password(
+            request_data.current_password, user.password_hash
         ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -394,28 +409,32 @@ async def change_password(
             )
 
         # Update password
-        current_user.password_hash = auth_service.password_service.hash_password(
+        user.password_hash = await auth_service.password_service.hash_password(
             request_data.new_password
         )
         await session.commit()
+        await principal_cache.invalidate(user.id)
 
         # Revoke all refresh tokens for security
-        await RefreshToken.revoke_all_user_tokens(current_user.id, session)
+        await RefreshToken.revoke_all_user_tokens(user.id, session)
 
         return schema.MessageResponse(message="Пароль успішно змінено")
 
 
 @router.delete("/delete-account", response_model=schema.MessageResponse)
-async def delete_account(current_user: User = Depends(get_current_user)):
+async def delete_account(current_user: schema.Principal = Depends(get_current_user)):
     """Delete the current user's account."""
     session = get_session()
 
     async with session:
+        user = await _get_user_record(current_user, session)
+
         # Revoke all refresh tokens
-        await RefreshToken.revoke_all_user_tokens(current_user.id, session)
+        await RefreshToken.revoke_all_user_tokens(user.id, session)
 
         # Delete the user account
-        await session.delete(current_user)
+        await session.delete(user)
         await session.commit()
+        await principal_cache.invalidate(user.id)
 
         return schema.MessageResponse(message="Акаунт успішно видалено")
@@ -1,4 +1,6 @@
+import json
 import os
+from contextlib import nullcontext
 from time import monotonic
 from datetime import datetime
 from functools import partial
@@ -7,13 +9,15 @@ from uuid import uuid4, UUID
 from fastapi import APIRouter, Depends, status, Response
 from fastapi.responses import StreamingResponse
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from opentelemetry.trace import Status, StatusCode
+from src.ai import answer_cache, cassette, summary
 from src.ai.config import get_llm
+from src.ai.scheduler import get_scheduler
 from src.middleware.auth_middleware import get_current_user
 
-from src.database.users import User
+from src.schema.auth import Principal
 from src.ai.agent import GraphBuilder
 from src.schema.chat import ChatRequest, ReactionRequest
 from fastapi.background import BackgroundTasks
@@ -24,6 +28,15 @@ from sqlalchemy import select
 
 import logging
 from src.database.reactions import Reaction
+from src.database.checkpointer import Checkpoint, TracedAsyncPostgresSaver
+from src.database.plans import SubscriptionPlan
+from src.monitoring.metrics import (
+    ACTIVE_GENERATIONS,
+    ACTIVE_SSE_CONNECTIONS,
+    ANSWER_CACHE_REQUESTS,
+    STREAM_BACKLOG_ENTRIES,
+)
+from src.monitoring.tracing import trace_id, traced, tracer
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +45,7 @@ router = APIRouter()
 STREAM_TTL_SECONDS = int(
     os.getenv("STREAM_TTL_SECONDS", "900")
 )  # 15 minutes by default
+REPLAY_CHUNK_CHARS = 200
 
 
 def _format_sse_event(message_id: str, data: str, event: str = None) -> str:
@@ -51,80 +65,257 @@ def _format_sse_event(message_id: str, data: str, event: str = None) -> str:
     return "\n".join(parts) + "\n"
 
 
+def _message_text(message: AIMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else part
+        for part in message.content
+    )
+
+
+@traced("chat.first_turn_check")
+async def _is_cacheable_first_turn(message: str, thread_id: str) -> bool:
+    if not answer_cache.is_cacheable(message):
+        return False
+    async with get_session() as session:
+        if await Checkpoint.exists(thread_id, session):
+            # Answers depend on earlier turns, so threads with context bypass.
+            ANSWER_CACHE_REQUESTS.labels("bypass").inc()
+            return False
+    return True
+
+
+@traced("answer_cache.lookup")
+async def _lookup_cached_answer(message: str) -> answer_cache.CachedAnswer | None:
+    try:
+        return await answer_cache.lookup(message)
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return None
+
+
+async def _store_answer(graph, config: RunnableConfig, message: str) -> None:
+    try:
+        state = await graph.aget_state(config)
+        last_message = state.values["messages"][-1]
+        if isinstance(last_message, AIMessage) and not last_message.tool_calls:
+            answer = _message_text(last_message)
+            if answer:
+                await answer_cache.store(message, answer)
+    except Exception as e:
+        logger.warning(f"Failed to store answer in cache: {e}")
+
+
+async def _update_summary(thread_id: str, messages: list) -> None:
+    try:
+        await summary.update_summary(thread_id, messages)
+    except Exception as e:
+        logger.warning(f"Failed to update summary of thread {thread_id}: {e}")
+
+
+async def _save_cassette(recorder: cassette.CassetteRecorder, thread_id: str) -> None:
+    try:
+        await cassette.save(recorder, thread_id)
+    except Exception as e:
+        logger.warning(f"Failed to save cassette of thread {thread_id}: {e}")
+
+
+async def _replay_answer(r, stream_id: str, answer: str) -> None:
+    """Publish a cached answer with the same events as a generated one."""
+    for start in range(0, len(answer), REPLAY_CHUNK_CHARS):
+        await r.xadd(
+            stream_id,
+            {"event": "chunk", "data": answer[start : start + REPLAY_CHUNK_CHARS]},
+        )
+    msg_id = await r.xadd(stream_id, {"event": "system", "data": "message_ended"})
+    await r.set(f"{stream_id}:message_ended", msg_id, ex=STREAM_TTL_SECONDS)
+
+
+async def _publish_event(r, stream_id: str, thread_id: str, mode: str, payload) -> bool:
+    """Publish one agent stream event; True if it was an answer chunk."""
+    # Tool call started or finished: "tool_call" carries the tool name once
+    # per call, "tool_status" every change of its status.
+    if mode == "custom":
+        if payload.get("type") == "tool_call":
+            if payload["status"] == "started":
+                await r.xadd(stream_id, {"event": "tool_call", "data": payload["name"]})
+            await r.xadd(
+                stream_id,
+                {
+                    "event": "tool_status",
+                    "data": json.dumps(
+                        {
+                            "id": payload["id"],
+                            "name": payload["name"],
+                            "status": payload["status"],
+                        }
+                    ),
+                },
+            )
+        return False
+
+    chunk, metadata = payload
+    published = False
+
+    # New chunk
+    if (
+        isinstance(chunk, AIMessageChunk)
+        and chunk.content
+        and metadata.get("langgraph_node", "") == "agent"
+    ):
+        await r.xadd(stream_id, {"event": "chunk", "data": chunk.content})
+        published = True
+
+    # Message ended
+    if chunk.response_metadata and chunk.response_metadata.get("finish_reason"):
+        msg_id = await r.xadd(stream_id, {"event": "system", "data": "message_ended"})
+        await r.set(f"{stream_id}:message_ended", msg_id, ex=STREAM_TTL_SECONDS)
+
+    # Touch TTLs for active stream
+    await r.expire(thread_id, STREAM_TTL_SECONDS)
+    await r.expire(stream_id, STREAM_TTL_SECONDS)
+    await r.expire(f"{stream_id}:message_ended", STREAM_TTL_SECONDS)
+    await r.expire(f"{stream_id}:status", STREAM_TTL_SECONDS)
+    return published
+
+
+async def _publish_metadata(
+    r, stream_id: str, span, started: float, first_token_at: float | None
+) -> None:
+    """Publish the turn's timing as a "metadata" event and under
+    ``{stream_id}:metadata``, and record it on the turn's span."""
+    metadata = {
+        "ttft_ms": round((first_token_at - started) * 1000) if first_token_at else None,
+        "duration_ms": round((monotonic() - started) * 1000),
+        "trace_id": trace_id(),
+    }
+    span.set_attribute("chat.duration_ms", metadata["duration_ms"])
+    if metadata["ttft_ms"] is not None:
+        span.set_attribute("chat.ttft_ms", metadata["ttft_ms"])
+    data = json.dumps(metadata)
+    await r.xadd(stream_id, {"event": "metadata", "data": data})
+    await r.set(f"{stream_id}:metadata", data, ex=STREAM_TTL_SECONDS)
+
+
 async def generate_response(
     request: ChatRequest,
     llm: BaseChatModel,
     stream_id: str,
     thread_id: str,
     config: RunnableConfig,
+    plan: SubscriptionPlan,
 ) -> None:
     r = get_redis()
-    try:
-        async with AsyncPostgresSaver.from_conn_string(
-            conn_string=db_config.connection_string,
-        ) as checkpointer:
-            await checkpointer.setup()
-            graph = GraphBuilder(
-                llm=llm,
-                checkpointer=checkpointer,
-                store=None,
-            ).get_graph()
-
-            events = graph.astream(
-                {"messages": HumanMessage(content=request.message)},
-                config,
-                stream_mode="messages",
+    messages = None
+    started = monotonic()
+    first_token_at = None
+    metadata_published = False
+    with (
+        ACTIVE_GENERATIONS.track_inprogress(),
+        tracer.start_as_current_span(
+            "chat.turn",
+            attributes={"chat.thread_id": thread_id, "chat.plan": plan.name},
+        ) as span,
+    ):
+        try:
+            first_turn = await _is_cacheable_first_turn(request.message, thread_id)
+            cached = (
+                await _lookup_cached_answer(request.message) if first_turn else None
             )
+            span.set_attribute("chat.cached", cached is not None)
 
-            async for chunk, metadata in events:
-                # New chunk
-                if (
-                    isinstance(chunk, AIMessageChunk)
-                    and chunk.content
-                    and metadata.get("langgraph_node", "") == "agent"
-                ):
-                    await r.xadd(stream_id, {"event": "chunk", "data": chunk.content})
-
-                # New tool call
-                if isinstance(chunk, AIMessageChunk) and chunk.tool_calls:
-                    for tool_call in chunk.tool_calls:
-                        tool_name = tool_call["name"].strip()
-                        if tool_name:
-                            await r.xadd(
-                                stream_id, {"event": "tool_call", "data": tool_name}
-                            )
-
-                # Message ended
-                if chunk.response_metadata and chunk.response_metadata.get(
-                    "finish_reason"
-                ):
-                    msg_id = await r.xadd(
-                        stream_id, {"event": "system", "data": "message_ended"}
+            # Cached answers are cheap, so only agent runs wait for a slot.
+            slot = (
+                nullcontext()
+                if cached
+                else get_scheduler().slot(config["configurable"]["user_id"], plan)
+            )
+            async with (
+                slot,
+                TracedAsyncPostgresSaver.from_conn_string(
+                    conn_string=db_config.connection_string,
+                ) as checkpointer,
+            ):
+                with tracer.start_as_current_span("graph.build"):
+                    await checkpointer.setup()
+                    graph = GraphBuilder(
+                        llm=llm,
+                        checkpointer=checkpointer,
+                        store=None,
+                    ).get_graph()
+
+                if cached:
+                    # Record the turn so the thread continues like a normal one.
+                    await graph.aupdate_state(
+                        config,
+                        {
+                            "messages": [
+                                HumanMessage(content=request.message),
+                                AIMessage(content=cached.answer),
+                            ]
+                        },
+                        as_node="agent",
                     )
+                    first_token_at = monotonic()
+                    await _replay_answer(r, stream_id, cached.answer)
+                    await _publish_metadata(r, stream_id, span, started, first_token_at)
+                    metadata_published = True
+                    await r.xadd(stream_id, {"event": "system", "data": "end"})
                     await r.set(
-                        f"{stream_id}:message_ended", msg_id, ex=STREAM_TTL_SECONDS
+                        f"{stream_id}:status", "completed", ex=STREAM_TTL_SECONDS
                     )
-
-                # Touch TTLs for active stream
-                await r.expire(thread_id, STREAM_TTL_SECONDS)
-                await r.expire(stream_id, STREAM_TTL_SECONDS)
-                await r.expire(f"{stream_id}:message_ended", STREAM_TTL_SECONDS)
-                await r.expire(f"{stream_id}:status", STREAM_TTL_SECONDS)
-
+                    return
+
+                recorder = cassette.get_recorder(request.message)
+                chunks, redis_seconds = 0, 0.0
+                with tracer.start_as_current_span("agent.run"):
+                    events = graph.astream(
+                        {"messages": HumanMessage(content=request.message)},
+                        {**config, "callbacks": [recorder]} if recorder else config,
+                        stream_mode=["messages", "custom"],
+                    )
+                    async for mode, payload in events:
+                        publish_started = monotonic()
+                        if await _publish_event(r, stream_id, thread_id, mode, payload):
+                            chunks += 1
+                            first_token_at = first_token_at or publish_started
+                        redis_seconds += monotonic() - publish_started
+                span.set_attribute("chat.chunks", chunks)
+                span.set_attribute("chat.redis_write_ms", round(redis_seconds * 1000))
+
+                await _publish_metadata(r, stream_id, span, started, first_token_at)
+                metadata_published = True
+                await r.xadd(stream_id, {"event": "system", "data": "end"})
+                await r.set(f"{stream_id}:status", "completed", ex=STREAM_TTL_SECONDS)
+
+                if recorder:
+                    await _save_cassette(recorder, thread_id)
+                if first_turn:
+                    await _store_answer(graph, config, request.message)
+                if summary.is_incremental():
+                    messages = (await graph.aget_state(config)).values["messages"]
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            span.record_exception(e)
+            span.set_status(Status(StatusCode.ERROR))
+            await r.xadd(stream_id, {"event": "system", "data": "error"})
+            if not metadata_published:
+                # Failed and timed out turns are the ones worth diagnosing.
+                await _publish_metadata(r, stream_id, span, started, first_token_at)
             await r.xadd(stream_id, {"event": "system", "data": "end"})
             await r.set(f"{stream_id}:status", "completed", ex=STREAM_TTL_SECONDS)
-    except Exception as e:
-        logger.error(f"Error generating response: {e}")
-        await r.xadd(stream_id, {"event": "system", "data": "error"})
-        await r.xadd(stream_id, {"event": "system", "data": "end"})
-        await r.set(f"{stream_id}:status", "completed", ex=STREAM_TTL_SECONDS)
+
+        # After the stream has ended and the generation slot is released.
+        if messages:
+            await _update_summary(thread_id, messages)
 
 
 @router.post("/message", status_code=status.HTTP_200_OK)
 async def chat_message(
     request: ChatRequest,
     llm: BaseChatModel = Depends(partial(get_llm, "chat")),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     *,
     background_tasks: BackgroundTasks,
 ) -> None:
@@ -136,6 +327,7 @@ async def chat_message(
         }
     }
 
+    plan = user.plan
     r = get_redis()
 
     stream_id = str(uuid4())
@@ -150,6 +342,7 @@ async def chat_message(
         stream_id,
         thread_id,
         config,
+        plan,
     )
 
     return None
@@ -171,30 +364,32 @@ async def stream_tokens(thread_id: UUID):
 
     async def get_chunks(last_id: str) -> AsyncGenerator[str, None]:
         last_ping_time = monotonic()
-        while True:
-            # Heartbeat ping to keep SSE connection alive
-            current_time = monotonic()
-            if current_time - last_ping_time >= 20:
-                yield ": keepalive\n\n"
-                last_ping_time = current_time
-
-            messages = await r.xread(streams={STREAM_ID: last_id}, block=3000)
-
-            if not messages:
-                continue
-
-            for _, msgs in messages:
-                for msg_id, data in msgs:
-                    yield _format_sse_event(
-                        message_id=msg_id,
-                        data=data["data"],
-                        event=data["event"],
-                    )
+        with ACTIVE_SSE_CONNECTIONS.track_inprogress():
+            while True:
+                # Heartbeat ping to keep SSE connection alive
+                current_time = monotonic()
+                if current_time - last_ping_time >= 20:
+                    yield ": keepalive\n\n"
+                    last_ping_time = current_time
+
+                messages = await r.xread(streams={STREAM_ID: last_id}, block=3000)
+
+                if not messages:
+                    continue
+
+                for _, msgs in messages:
+                    STREAM_BACKLOG_ENTRIES.observe(len(msgs))
+                    for msg_id, data in msgs:
+                        yield _format_sse_event(
+                            message_id=msg_id,
+                            data=data["data"],
+                            event=data["event"],
+                        )
 
-                    last_id = msg_id
+                        last_id = msg_id
 
-                    if data["event"] == "system" and data["data"] == "end":
-                        return
+                        if data["event"] == "system" and data["data"] == "end":
+                            return
 
     return StreamingResponse(
         get_chunks(last_id=message_ended_id or "0"),
@@ -210,7 +405,7 @@ async def stream_tokens(thread_id: UUID):
 
 @router.post("/reaction")
 async def add_reaction(
-    request: ReactionRequest, user: User = Depends(get_current_user)
+    request: ReactionRequest, user: Principal = Depends(get_current_user)
 ):
     async with get_session() as session:
         thread_id = str(request.thread_id)
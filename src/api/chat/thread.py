@@ -5,13 +5,13 @@ from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, HumanMessage
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 
 from src.ai.config import get_llm
 from src.middleware.auth_middleware import get_current_user
-from src.database.users import User
+from src.schema.auth import Principal
 from src.database.session import get_session
-from src.database.checkpointer import Checkpoint
+from src.database.checkpointer import Checkpoint, TracedAsyncPostgresSaver
+from src.database.thread_summaries import ThreadSummary
 from src.ai.agent import GraphBuilder
 from src.schema.chat import ThreadMessagesItemSchema
 from sqlalchemy import select
@@ -33,10 +33,10 @@ class UpdateThreadNameRequest(BaseModel):
 async def get_thread(
     thread_id: UUID = Query(..., description="The thread ID to retrieve"),
     llm: BaseChatModel = Depends(partial(get_llm, "chat")),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     config = {"configurable": {"thread_id": str(thread_id), "user_id": str(user.id)}}
-    async with AsyncPostgresSaver.from_conn_string(
+    async with TracedAsyncPostgresSaver.from_conn_string(
         conn_string=db_config.connection_string,
     ) as checkpointer:
         graph = GraphBuilder(
@@ -72,12 +72,14 @@ async def get_thread(
 @router.delete("", description="Delete a current thread.")
 async def delete_thread(
     thread_id: UUID = Query(..., description="The thread ID to delete"),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    async with AsyncPostgresSaver.from_conn_string(
+    async with TracedAsyncPostgresSaver.from_conn_string(
         conn_string=db_config.connection_string,
     ) as checkpointer:
         await checkpointer.adelete_thread(thread_id)
+    async with get_session() as session:
+        await ThreadSummary.delete(str(thread_id), session)
     return []
 
 
@@ -85,7 +87,7 @@ async def delete_thread(
 async def update_thread_name(
     request: UpdateThreadNameRequest,
     thread_id: UUID = Query(..., description="The thread ID to update"),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     async with get_session() as session:
         checkpoints = await session.scalars(
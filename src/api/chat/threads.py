@@ -8,7 +8,7 @@ from src.database.checkpointer import Checkpoint
 from src.database.session import get_session
 from src.schema.chat import ThreadSchema
 from src.middleware.auth_middleware import get_current_user
-from src.database.users import User
+from src.schema.auth import Principal
 
 router = APIRouter()
 
@@ -19,7 +19,7 @@ router = APIRouter()
     response_model=list[ThreadSchema],
 )
 async def get_threads(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     async with get_session() as session:
         checkpoints = await session.scalars(
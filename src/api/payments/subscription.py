@@ -13,8 +13,9 @@ from src.schema.auth import UserResponse
 from src.database.plans import Plan
 from datetime import timedelta
 from fastapi import Response
+from src.cache.principal_cache import principal_cache
 from src.middleware.auth_middleware import get_current_user
-from src.database.users import User
+from src.schema.auth import Principal
 from src.services.liqpay_client import liqpay_request
 import logging
 from src.database.subscriptions import Subscription
@@ -33,7 +34,7 @@ router = APIRouter(prefix="/subscription")
 
 @router.post("/create")
 async def create_subscription(
-    request: SubscriptionRequest, user: User = Depends(get_current_user)
+    request: SubscriptionRequest, user: Principal = Depends(get_current_user)
 ):
     async with get_session() as session:
         if request.subscription_plan == SubscriptionPlan.FREE:
@@ -95,12 +96,13 @@ async def create_subscription(
         )
         session.add(subscription)
         await session.commit()
+        await principal_cache.invalidate(user.id)
 
     return UserResponse(name=user.name, email=user.email, plan_id=plan.id)
 
 
 @router.post("/cancel")
-async def cancel_subscription(user: User = Depends(get_current_user)):
+async def cancel_subscription(user: Principal = Depends(get_current_user)):
     async with get_session() as session:
         subscription = await session.scalar(select(Subscription).where(Subscription.user_id == user.id))
         if not subscription:
@@ -120,6 +122,7 @@ async def cancel_subscription(user: User = Depends(get_current_user)):
 
         subscription.status = SubscriptionStatus.CANCELLED.value
         await session.commit()
+        await principal_cache.invalidate(user.id)
 
     return Response(status_code=204, content="OK")
 
@@ -176,6 +179,7 @@ async def subscription_callback(request: CallbackRequest):
             subscription.status = SubscriptionStatus.FROZEN.value
 
         await session.commit()
+        await principal_cache.invalidate(subscription.user_id)
 
     return Response(status_code=204, content="OK")
 
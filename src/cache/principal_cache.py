@@ -0,0 +1,160 @@
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from src.cache.redis import get_redis
+from src.monitoring.metrics import PRINCIPAL_CACHE_REQUESTS
+from src.schema.auth import Principal
+from src.services.auth_service import AuthConfig
+
+logger = logging.getLogger(__name__)
+
+# Caches the principal ARGV[1] under KEYS[1] for ARGV[3] seconds, unless the
+# generation KEYS[2] moved past ARGV[2] (the one read before loading it): the
+# user was invalidated meanwhile and the loaded principal may be stale.
+_WRITE_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+
+class PrincipalCache:
+    """Two-level cache of authenticated users, keyed by user id.
+
+    Each worker keeps the most recently used principals in memory for
+    ``local_ttl_seconds``; behind it, Redis keeps them for ``ttl_seconds``
+    for all workers. ``invalidate`` clears both levels in this worker and
+    Redis, so other workers see a change after at most ``local_ttl_seconds``.
+    It also bumps the user's generation, so a load that started before it
+    is not cached. If Redis is unavailable lookups fall through to the
+    database.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        local_ttl_seconds: float,
+        max_local_entries: int = 10_000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self.max_local_entries = max_local_entries
+        self._local: OrderedDict[UUID, tuple[float, Principal]] = OrderedDict()
+
+    @staticmethod
+    def key(user_id: UUID) -> str:
+        return f"principal:{user_id}"
+
+    @staticmethod
+    def generation_key(user_id: UUID) -> str:
+        return f"principal:{user_id}:generation"
+
+    async def get_or_load(
+        self,
+        user_id: UUID,
+        load: Callable[[], Awaitable[Principal | None]],
+    ) -> Principal | None:
+        if self.ttl_seconds <= 0:
+            PRINCIPAL_CACHE_REQUESTS.labels("db").inc()
+            return await load()
+
+        principal = self._get_local(user_id)
+        if principal is not None:
+            PRINCIPAL_CACHE_REQUESTS.labels("local").inc()
+            return principal
+
+        principal, generation = await self._read(user_id)
+        if principal is not None:
+            PRINCIPAL_CACHE_REQUESTS.labels("redis").inc()
+            self._set_local(principal)
+            return principal
+
+        PRINCIPAL_CACHE_REQUESTS.labels("db").inc()
+        principal = await load()
+        if principal is not None and await self._write(principal, generation):
+            self._set_local(principal)
+        return principal
+
+    async def invalidate(self, *user_ids: UUID) -> None:
+        for user_id in user_ids:
+            self._local.pop(user_id, None)
+        if not user_ids:
+            return
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                for user_id in user_ids:
+                    pipe.incr(self.generation_key(user_id))
+                    # Outlives any load that could have read the old one.
+                    pipe.expire(self.generation_key(user_id), self.ttl_seconds)
+                pipe.delete(*(self.key(user_id) for user_id in user_ids))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cached principals: {e}")
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    def _get_local(self, user_id: UUID) -> Principal | None:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._local[user_id]
+            return None
+        self._local.move_to_end(user_id)
+        return principal
+
+    def _set_local(self, principal: Principal) -> None:
+        self._local[principal.id] = (
+            time.monotonic() + self.local_ttl_seconds,
+            principal,
+        )
+        self._local.move_to_end(principal.id)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    async def _read(self, user_id: UUID) -> tuple[Principal | None, str | None]:
+        """The cached principal and the user's current generation."""
+        try:
+            cached, generation = await get_redis().mget(
+                self.key(user_id), self.generation_key(user_id)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read cached principal: {e}")
+            return None, None
+        principal = Principal.model_validate_json(cached) if cached else None
+        return principal, generation or "0"
+
+    async def _write(self, principal: Principal, generation: str | None) -> bool:
+        """Cache a loaded principal unless it was invalidated since
+        ``generation`` was read; True if it may be kept."""
+        if generation is None:
+            # Redis was unavailable for the read: keep it in this worker only.
+            return True
+        try:
+            return bool(
+                await get_redis().eval(
+                    _WRITE_IF_CURRENT,
+                    2,
+                    self.key(principal.id),
+                    self.generation_key(principal.id),
+                    principal.model_dump_json(),
+                    generation,
+                    self.ttl_seconds,
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache principal: {e}")
+            return True
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=AuthConfig.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl_seconds=AuthConfig.PRINCIPAL_LOCAL_TTL_SECONDS,
+)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+
+from src.cache.redis import get_redis
+from src.monitoring.metrics import (
+    RATE_LIMITER_AVAILABLE_RATIO,
+    RATE_LIMITER_REQUESTS,
+    RATE_LIMITER_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Reserves ARGV[i] units from the token bucket KEYS[i] (capacity per minute
+# ARGV[n + i]) and returns the longest wait in milliseconds plus the lowest
+# fill ratio. Buckets may go negative: that debt is the queue of callers that
+# reserved before, so later callers wait longer and are served in order.
+_RESERVE = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local n = #KEYS
+local wait = 0
+local ratio = 1
+for i = 1, n do
+    local capacity = tonumber(ARGV[n + i])
+    local rate = capacity / 60000
+    local amount = math.min(tonumber(ARGV[i]), capacity)
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate) - amount
+    redis.call('HSET', KEYS[i], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], 120000)
+    if tokens < 0 then
+        wait = math.max(wait, math.ceil(-tokens / rate))
+    end
+    ratio = math.min(ratio, tokens / capacity)
+end
+return {wait, tostring(ratio)}
+"""
+
+# Returns (or takes) the difference between reserved and actual usage.
+_ADJUST = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HINCRBYFLOAT', KEYS[1], 'tokens', ARGV[1])
+end
+return 0
+"""
+
+
+class RateLimiter:
+    """Requests and tokens per minute limit shared by all workers via Redis.
+
+    ``acquire`` reserves capacity and sleeps until the reservation is due,
+    so callers queue in arrival order instead of failing or retrying in
+    lockstep. If Redis is unavailable calls are let through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int | None = None,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests_key = f"rate_limit:{name}:requests"
+        self._tokens_key = f"rate_limit:{name}:tokens"
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Reserve one request and ``tokens`` tokens; return seconds waited."""
+        keys = [self._requests_key]
+        amounts = [1]
+        capacities = [self.requests_per_minute]
+        if self.tokens_per_minute and tokens:
+            keys.append(self._tokens_key)
+            amounts.append(tokens)
+            capacities.append(self.tokens_per_minute)
+
+        try:
+            wait_ms, ratio = await get_redis().eval(
+                _RESERVE, len(keys), *keys, *amounts, *capacities
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter {self.name} unavailable: {e}")
+            return 0.0
+
+        RATE_LIMITER_AVAILABLE_RATIO.labels(self.name).set(float(ratio))
+        wait = int(wait_ms) / 1000
+        RATE_LIMITER_REQUESTS.labels(
+            self.name, "delayed" if wait else "immediate"
+        ).inc()
+        RATE_LIMITER_WAIT_SECONDS.labels(self.name).observe(wait)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def adjust(self, reserved_tokens: int, used_tokens: int) -> None:
+        """Correct a token reservation once actual usage is known."""
+        if not self.tokens_per_minute or reserved_tokens == used_tokens:
+            return
+        try:
+            await get_redis().eval(
+                _ADJUST, 1, self._tokens_key, reserved_tokens - used_tokens
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter {self.name} unavailable: {e}")
@@ -1,12 +1,30 @@
 import os
+import time
+from typing import Any
+
 from redis.asyncio import Redis
 
 from functools import lru_cache
 
+from src.monitoring.metrics import REDIS_COMMAND_SECONDS
+
+
+class InstrumentedRedis(Redis):
+    """Redis client recording the latency of every command it executes."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - started
+            )
+
 
 @lru_cache
 def get_redis() -> Redis:
-    redis = Redis(
+    redis = InstrumentedRedis(
         host=os.getenv("REDIS_HOST"),
         port=os.getenv("REDIS_PORT"),
         decode_responses=True,
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.cache.redis import get_redis
+from src.monitoring.metrics import (
+    TOOL_CACHE_LATENCY_SAVED,
+    TOOL_CACHE_REQUESTS,
+    TOOL_CACHE_UPSTREAM_CALLS,
+    TOOL_CACHE_UPSTREAM_CALLS_AVOIDED,
+)
+
+logger = logging.getLogger(__name__)
+
+# Deletes the lock KEYS[1] only while it still holds this caller's token
+# ARGV[1], so a leader that overran the lock timeout does not release the
+# lock of the next one.
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ResultCache:
+    """Redis TTL cache for JSON results of slow or paid calls, with single-flight.
+
+    Concurrent calls with the same key share one upstream request: within a
+    process they await the same task, across workers the first caller
+    holds a short Redis lock while the others poll for its result. If Redis
+    is unavailable the call goes straight to the upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: int,
+        lock_timeout_seconds: float = 30.0,
+        poll_interval_seconds: float = 0.1,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    def key(self, payload: dict[str, Any]) -> str:
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+        return f"cache:{self.name}:{digest}"
+
+    async def get_or_compute(
+        self,
+        payload: dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda result: True,
+    ) -> Any:
+        key = self.key(payload)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            try:
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The shared call itself was cancelled, not this caller.
+                return await self.get_or_compute(payload, compute, should_cache)
+            TOOL_CACHE_REQUESTS.labels(self.name, "coalesced").inc()
+            TOOL_CACHE_UPSTREAM_CALLS_AVOIDED.labels(self.name).inc()
+            return result
+
+        # The call runs in a task owned by the cache, so a caller that is
+        # cancelled (e.g. by its own deadline) does not cancel it for the
+        # others waiting on it; they get its real result or exception.
+        task = asyncio.ensure_future(self._get_or_compute(key, compute, should_cache))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._finish(key, task))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved when nobody else was waiting.
+        if not task.cancelled():
+            task.exception()
+
+    async def _get_or_compute(self, key, compute, should_cache) -> Any:
+        started = time.perf_counter()
+        entry = await self._read(key)
+
+        token = None
+        if entry is None:
+            token = await self._acquire_lock(key)
+            if token is None:
+                # Another worker is fetching the same result, wait for it.
+                entry = await self._wait_for_result(key)
+
+        if entry is not None:
+            TOOL_CACHE_REQUESTS.labels(self.name, "hit").inc()
+            TOOL_CACHE_UPSTREAM_CALLS_AVOIDED.labels(self.name).inc()
+            saved = entry["duration"] - (time.perf_counter() - started)
+            TOOL_CACHE_LATENCY_SAVED.labels(self.name).inc(max(saved, 0.0))
+            return entry["value"]
+
+        TOOL_CACHE_REQUESTS.labels(self.name, "miss").inc()
+        TOOL_CACHE_UPSTREAM_CALLS.labels(self.name).inc()
+        try:
+            started = time.perf_counter()
+            result = await compute()
+            duration = time.perf_counter() - started
+            if should_cache(result):
+                await self._write(key, result, duration)
+            return result
+        finally:
+            if token is not None:
+                await self._release_lock(key, token)
+
+    async def _read(self, key: str) -> dict | None:
+        try:
+            cached = await get_redis().get(key)
+        except Exception as e:
+            logger.warning(f"Failed to read {self.name} cache: {e}")
+            return None
+        return json.loads(cached) if cached else None
+
+    async def _write(self, key: str, value: Any, duration: float) -> None:
+        try:
+            await get_redis().set(
+                key,
+                json.dumps(
+                    {"value": value, "duration": duration},
+                    ensure_ascii=False,
+                    default=str,
+                ),
+                ex=self.ttl_seconds,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write {self.name} cache: {e}")
+
+    async def _acquire_lock(self, key: str) -> str | None:
+        """Take the lock for ``key``; returns its token, or None if it is held."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await get_redis().set(
+                f"{key}:lock",
+                token,
+                nx=True,
+                px=int(self.lock_timeout_seconds * 1000),
+            )
+        except Exception as e:
+            logger.warning(f"Failed to lock {self.name} cache: {e}")
+            return token
+        return token if acquired else None
+
+    async def _release_lock(self, key: str, token: str) -> None:
+        try:
+            await get_redis().eval(_RELEASE_LOCK, 1, f"{key}:lock", token)
+        except Exception as e:
+            logger.warning(f"Failed to unlock {self.name} cache: {e}")
+
+    async def _wait_for_result(self, key: str) -> dict | None:
+        """Poll until the lock holder stores the result or gives up.
+
+        Returns None when the holder failed or did not cache its result, in
+        which case the caller fetches it itself.
+        """
+        redis = get_redis()
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval_seconds)
+                entry = await self._read(key)
+                if entry is not None:
+                    return entry
+                if not await redis.exists(f"{key}:lock"):
+                    return None
+        except Exception as e:
+            logger.warning(f"Failed to wait for {self.name} cache: {e}")
+        return None
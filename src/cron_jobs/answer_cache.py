@@ -0,0 +1,11 @@
+import logging
+
+from src.ai import answer_cache
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_expired_answers() -> None:
+    deleted = await answer_cache.delete_expired()
+    if deleted:
+        logger.info(f"Deleted {deleted} expired cached answers")
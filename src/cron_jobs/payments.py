@@ -4,6 +4,7 @@ from src.database.users import User
 from sqlalchemy import delete, select, update
 from datetime import datetime
 from src.database.plans import SubscriptionPlan
+from src.cache.principal_cache import principal_cache
 
 
 async def delete_expired_subscriptions():
@@ -29,3 +30,4 @@ async def delete_expired_subscriptions():
                 )
             )
             await session.commit()
+            await principal_cache.invalidate(*user_ids)
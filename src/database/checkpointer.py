@@ -1,11 +1,23 @@
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
 from typing import Any
 
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.base import Checkpoint as CheckpointData
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from sqlalchemy import String, select, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database.base import Base
+from src.monitoring.metrics import DB_POOL_CHECKED_OUT
+from src.monitoring.tracing import tracer
 
 
 class Checkpoint(Base):
@@ -34,3 +46,56 @@ class Checkpoint(Base):
             .where(Checkpoint.thread_id == thread_id)
             .distinct(Checkpoint.thread_id)
         )
+
+    @staticmethod
+    async def exists(thread_id: str, session: AsyncSession) -> bool:
+        return (
+            await session.scalar(
+                select(Checkpoint.checkpoint_id)
+                .where(Checkpoint.thread_id == thread_id)
+                .limit(1)
+            )
+        ) is not None
+
+
+class TracedAsyncPostgresSaver(AsyncPostgresSaver):
+    """AsyncPostgresSaver emitting a span per checkpoint read and write and
+    counting its open connections."""
+
+    @classmethod
+    @asynccontextmanager
+    async def from_conn_string(
+        cls, conn_string: str, **kwargs: Any
+    ) -> AsyncIterator["TracedAsyncPostgresSaver"]:
+        async with super().from_conn_string(conn_string, **kwargs) as saver:
+            DB_POOL_CHECKED_OUT.labels("checkpointer").inc()
+            try:
+                yield saver
+            finally:
+                DB_POOL_CHECKED_OUT.labels("checkpointer").dec()
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with tracer.start_as_current_span("checkpoint.get"):
+            return await super().aget_tuple(config)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: CheckpointData,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with tracer.start_as_current_span("checkpoint.put"):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with tracer.start_as_current_span(
+            "checkpoint.put_writes", attributes={"checkpoint.writes": len(writes)}
+        ):
+            await super().aput_writes(config, writes, task_id, task_path)
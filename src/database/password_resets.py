@@ -2,7 +2,7 @@ from datetime import UTC, datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, String, and_, select
+from sqlalchemy import ForeignKey, Index, String, and_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -11,6 +11,14 @@ from src.database.base import BaseEntity
 
 class PasswordReset(BaseEntity):
     __tablename__ = "password_resets"
+    __table_args__ = (
+        Index(
+            "ix_password_resets_token_hash_unused",
+            "token_hash",
+            unique=True,
+            postgresql_where=text("used_at IS NULL"),
+        ),
+    )
 
     user_id: Mapped[UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
@@ -1,5 +1,6 @@
 from functools import lru_cache
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -7,6 +8,21 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from src.database.config import db_config
+from src.monitoring.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW
+
+
+def _track_pool(engine: AsyncEngine, pool_size: int) -> None:
+    """Keep the pool gauges current on every checkout and checkin."""
+    checked_out = 0
+
+    def update(delta: int) -> None:
+        nonlocal checked_out
+        checked_out += delta
+        DB_POOL_CHECKED_OUT.labels("sqlalchemy").set(checked_out)
+        DB_POOL_OVERFLOW.labels("sqlalchemy").set(max(checked_out - pool_size, 0))
+
+    event.listen(engine.sync_engine, "checkout", lambda *_: update(1))
+    event.listen(engine.sync_engine, "checkin", lambda *_: update(-1))
 
 
 @lru_cache
@@ -16,6 +32,7 @@ def get_async_engine(pool_size: int = 10, max_overflow: int = 5) -> AsyncEngine:
         pool_size=pool_size,
         max_overflow=max_overflow,
     )
+    _track_pool(engine, pool_size)
 
     return engine
 
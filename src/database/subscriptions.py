@@ -1,5 +1,7 @@
 from src.database.base import BaseWithTimestamps
-from sqlalchemy import String, DateTime
+from src.database.plans import SubscriptionPlan
+from sqlalchemy import String, DateTime, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import ForeignKey
 from uuid import UUID
@@ -19,6 +21,17 @@ class Subscription(BaseWithTimestamps):
     id: Mapped[UUID] = mapped_column(init=True, primary_key=True)
     user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
     plan_id: Mapped[int] = mapped_column(ForeignKey("plans.id"), nullable=False)
-    status: Mapped[str] = mapped_column(String(255), nullable=False) # active, cancelled, pending
+    status: Mapped[str] = mapped_column(
+        String(255), nullable=False
+    )  # active, cancelled, pending
     start_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     end_date: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    @staticmethod
+    async def get_user_plan(user_id: UUID, session: AsyncSession) -> SubscriptionPlan:
+        subscription = await session.scalar(
+            select(Subscription).where(Subscription.user_id == user_id)
+        )
+        if not subscription or subscription.status == SubscriptionStatus.FROZEN.value:
+            return SubscriptionPlan.FREE
+        return SubscriptionPlan(subscription.plan_id)
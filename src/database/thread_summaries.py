@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqlalchemy import Integer, String, Text, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.base import Base
+
+
+class ThreadSummary(Base):
+    """Rolling summary of the older part of a thread's history."""
+
+    __tablename__ = "thread_summaries"
+
+    thread_id: Mapped[str] = mapped_column(String, primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    # Id of the last message folded into the summary and how many messages
+    # of the thread it covers.
+    last_message_id: Mapped[str] = mapped_column(String, nullable=False)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime | None] = mapped_column(
+        init=False, default=None, server_default=func.now(), onupdate=func.now()
+    )
+
+    @staticmethod
+    async def get(thread_id: str, session: AsyncSession) -> "ThreadSummary | None":
+        return await session.get(ThreadSummary, thread_id)
+
+    @staticmethod
+    async def save(summary: "ThreadSummary", session: AsyncSession) -> None:
+        """Insert or replace, unless a summary covering more messages exists."""
+        statement = insert(ThreadSummary).values(
+            thread_id=summary.thread_id,
+            summary=summary.summary,
+            last_message_id=summary.last_message_id,
+            message_count=summary.message_count,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ThreadSummary.thread_id],
+            set_={
+                "summary": statement.excluded.summary,
+                "last_message_id": statement.excluded.last_message_id,
+                "message_count": statement.excluded.message_count,
+                "updated_at": func.now(),
+            },
+            where=ThreadSummary.message_count < statement.excluded.message_count,
+        )
+        await session.execute(statement)
+        await session.commit()
+
+    @staticmethod
+    async def delete(thread_id: str, session: AsyncSession) -> None:
+        await session.execute(
+            delete(ThreadSummary).where(ThreadSummary.thread_id == thread_id)
+        )
+        await session.commit()
@@ -2,7 +2,7 @@ from datetime import UTC, datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, String, and_, delete, func, select
+from sqlalchemy import Boolean, Index, String, and_, delete, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 from src.database.base import BaseEntity
@@ -10,6 +10,14 @@ from src.database.base import BaseEntity
 
 class User(BaseEntity):
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_email_verification_token",
+            "email_verification_token",
+            postgresql_where=text("email_verification_token IS NOT NULL"),
+        ),
+        Index("ix_users_email_lower", func.lower(text("email"))),
+    )
 
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
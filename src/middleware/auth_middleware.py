@@ -3,17 +3,40 @@ from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from src.cache.principal_cache import principal_cache
 from src.database.session import get_session
+from src.database.subscriptions import Subscription
 from src.database.users import User
+from src.schema.auth import Principal
 from src.services.auth_service import TokenService
 
 security = HTTPBearer()
 
 
+async def load_principal(user_id: UUID) -> Principal | None:
+    """Load the user and their plan from the database."""
+    async with get_session() as session:
+        user = await User.get_by_id(user_id, session)
+        if not user:
+            return None
+        plan = await Subscription.get_user_plan(user_id, session)
+    return Principal(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        email_verified=user.email_verified,
+        plan=plan,
+    )
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> User:
-    """Get the current authenticated user from JWT token."""
+) -> Principal:
+    """Get the current authenticated user from JWT token.
+
+    The user is served from the principal cache; endpoints that need the
+    database record (password hash, deletion) load it themselves.
+    """
     token = credentials.credentials
 
     # Verify the token
@@ -36,20 +59,17 @@ async def get_current_user(
             detail="Недійсний токен: неправильний формат ідентифікатора користувача",
         )
 
-    # Get user from database
-    session = get_session()
-    async with session:
-        user = await User.get_by_id(user_id, session)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Користувача не знайдено",
-            )
-
-        if not user.email_verified:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Електронну адресу не підтверджено",
-            )
+    user = await principal_cache.get_or_load(user_id, lambda: load_principal(user_id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Користувача не знайдено",
+        )
+
+    if not user.email_verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Електронну адресу не підтверджено",
+        )
 
     return user
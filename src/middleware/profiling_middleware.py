@@ -0,0 +1,147 @@
+"""Profiling of single requests, on demand.
+
+Off unless PROFILE_DIR is set. A request is then profiled when it carries a
+valid ``X-Profile`` header, or at random with probability PROFILE_SAMPLE_RATE
+(default 0). The header is ``<expires>.<signature>``: a Unix timestamp and the
+hex HMAC-SHA256, keyed with PROFILE_SECRET, of ``"<expires>:<path>"``, so it
+only works for one path and for a limited time; ``sign_profile_request``
+makes one.
+
+Profiles are wall-clock and async-aware (pyinstrument): time spent awaiting
+is attributed to the awaiting coroutine, and other requests running
+concurrently on the event loop are left out. Background tasks of the request,
+such as the generation started by ``POST /chat/message``, are included. Each
+profile is written to PROFILE_DIR in speedscope format (open it at
+https://www.speedscope.app). Only one request is profiled at a time per
+worker; others run as usual. Profiling stops after PROFILE_MAX_SECONDS
+(default 30) even if the request goes on, e.g. an SSE stream, so the
+profiler's overhead and the profiling slot are held for a bounded time.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import random
+import time
+from pathlib import Path
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+class ProfilingConfig:
+    """Request profiling configuration."""
+
+    DIR = os.getenv("PROFILE_DIR")
+    SECRET = os.getenv("PROFILE_SECRET")
+    SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    # Sampling interval of the profiler, in seconds.
+    INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+    # Longest stretch of a request that is profiled, in seconds.
+    MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+
+
+def _signature(expires: int, path: str, secret: str) -> str:
+    return hmac.new(
+        secret.encode(), f"{expires}:{path}".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def sign_profile_request(path: str, ttl_seconds: int = 300) -> str:
+    """Value of the X-Profile header that profiles a request to ``path``."""
+    if not ProfilingConfig.SECRET:
+        raise ValueError("PROFILE_SECRET is not set")
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_signature(expires, path, ProfilingConfig.SECRET)}"
+
+
+def _valid_signature(value: str, path: str) -> bool:
+    if not ProfilingConfig.SECRET:
+        return False
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(
+        signature, _signature(int(expires), path, ProfilingConfig.SECRET)
+    )
+
+
+def _write_profile(profiler: Profiler, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(profiler.output(SpeedscopeRenderer()), encoding="utf-8")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._busy = False
+        # Profiles being written after PROFILE_MAX_SECONDS, kept referenced.
+        self._timed_out: set[asyncio.Task] = set()
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if not ProfilingConfig.DIR or self._busy:
+            return False
+        header = Headers(scope=scope).get(PROFILE_HEADER)
+        if header is not None:
+            if _valid_signature(header, scope["path"]):
+                return True
+            logger.warning(f"Invalid profiling signature for {scope['path']}")
+            return False
+        return random.random() < ProfilingConfig.SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profiler = Profiler(interval=ProfilingConfig.INTERVAL, async_mode="enabled")
+        started = time.time()
+        stopped = False
+
+        async def finish(truncated: bool = False) -> None:
+            nonlocal stopped
+            if stopped:
+                return
+            stopped = True
+            profiler.stop()
+            self._busy = False
+            route = getattr(scope.get("route"), "path", scope["path"])
+            elapsed = time.time() - started
+            name = "-".join(
+                [
+                    time.strftime("%Y%m%dT%H%M%S", time.gmtime(started)),
+                    scope["method"],
+                    route.strip("/").replace("/", "_") or "root",
+                    f"{int(elapsed * 1000)}ms" + ("-truncated" if truncated else ""),
+                ]
+            )
+            path = Path(ProfilingConfig.DIR) / f"{name}.speedscope.json"
+            try:
+                await asyncio.to_thread(_write_profile, profiler, path)
+                logger.info(f"Profile of {scope['method']} {route} written to {path}")
+            except Exception as e:
+                logger.error(f"Failed to write profile {path}: {e}")
+
+        def on_timeout() -> None:
+            task = asyncio.get_running_loop().create_task(finish(truncated=True))
+            self._timed_out.add(task)
+            task.add_done_callback(self._timed_out.discard)
+
+        timeout = asyncio.get_running_loop().call_later(
+            ProfilingConfig.MAX_SECONDS, on_timeout
+        )
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            timeout.cancel()
+            await finish()
@@ -0,0 +1,217 @@
+import hmac
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    make_asgi_app,
+    multiprocess,
+)
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+# (see gunicorn.conf.py) and /metrics aggregates them. Gauges therefore state
+# how values of live workers combine.
+
+TOOL_CACHE_REQUESTS = Counter(
+    "tool_cache_requests_total",
+    "Cached tool calls by outcome: hit, miss or coalesced onto an in-flight call",
+    ["tool", "result"],
+)
+TOOL_CACHE_UPSTREAM_CALLS = Counter(
+    "tool_cache_upstream_calls_total",
+    "Calls that reached the upstream service",
+    ["tool"],
+)
+TOOL_CACHE_UPSTREAM_CALLS_AVOIDED = Counter(
+    "tool_cache_upstream_calls_avoided_total",
+    "Calls served from the cache or from another in-flight call",
+    ["tool"],
+)
+TOOL_CACHE_LATENCY_SAVED = Counter(
+    "tool_cache_latency_saved_seconds_total",
+    "Upstream latency that cache hits did not have to wait for",
+    ["tool"],
+)
+TOOL_CALLS = Counter(
+    "tool_calls_total",
+    "Agent tool calls by outcome: ok, error, timeout or rejected by an open circuit",
+    ["tool", "outcome"],
+)
+TOOL_HEDGED_CALLS = Counter(
+    "tool_hedged_calls_total",
+    "Tool calls that were slow enough to start a second, hedging request",
+    ["tool"],
+)
+ANSWER_CACHE_REQUESTS = Counter(
+    "answer_cache_requests_total",
+    "Answer cache lookups by result: exact or semantic hit, miss, or bypass",
+    ["result"],
+)
+PRINCIPAL_CACHE_REQUESTS = Counter(
+    "principal_cache_requests_total",
+    "Authenticated user lookups by where they were served from: local, redis or db",
+    ["source"],
+)
+PASSWORD_HASH_QUEUE_SECONDS = Histogram(
+    "password_hash_queue_seconds",
+    "Time bcrypt calls waited for a free password hashing thread",
+    ["operation"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Duration of bcrypt hashing and verification on the password hashing pool",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1, 2.5),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "bcrypt calls refused with a 503 because the password hashing pool was full",
+    ["operation"],
+)
+PASSWORD_HASH_WAITING = Gauge(
+    "password_hash_waiting",
+    "bcrypt calls waiting for a free password hashing thread",
+    multiprocess_mode="livesum",
+)
+RATE_LIMITER_REQUESTS = Counter(
+    "rate_limiter_requests_total",
+    "Provider calls passed through a rate limiter, immediately or after a wait",
+    ["limiter", "result"],
+)
+RATE_LIMITER_WAIT_SECONDS = Histogram(
+    "rate_limiter_wait_seconds",
+    "Time callers waited for their rate limiter reservation",
+    ["limiter"],
+    buckets=(0, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+RATE_LIMITER_AVAILABLE_RATIO = Gauge(
+    "rate_limiter_available_ratio",
+    "Remaining share of the most saturated bucket after the last reservation; "
+    "negative values are capacity already promised to queued callers",
+    ["limiter"],
+    multiprocess_mode="mostrecent",
+)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "generation_queue_depth",
+    "Agent runs waiting for a generation slot",
+    ["plan"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "generation_queue_wait_seconds",
+    "Time agent runs waited for a generation slot",
+    ["plan"],
+    buckets=(0, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+SCHEDULER_DEADLINE_ADMISSIONS = Counter(
+    "generation_deadline_admissions_total",
+    "Agent runs admitted over capacity because they reached their maximum wait",
+    ["plan"],
+)
+LLM_INPUT_TOKENS = Counter(
+    "llm_input_tokens_total",
+    "Prompt tokens sent to each provider/model, read from its prompt cache or not",
+    ["model", "cache"],
+)
+PROMPT_CACHE_OPERATIONS = Counter(
+    "prompt_cache_operations_total",
+    "Provider-side prompt cache creations and refreshes by result",
+    ["operation", "result"],
+)
+LLM_OUTPUT_TOKENS = Counter(
+    "llm_output_tokens_total",
+    "Completion tokens generated by each provider/model",
+    ["model"],
+)
+EMBEDDING_TOKENS = Counter(
+    "embedding_tokens_total",
+    "Approximate tokens sent to each embeddings provider/model",
+    ["model"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration until the response body is complete, by route",
+    ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections in use: SQLAlchemy pool checkouts and open "
+    "checkpointer connections",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Checked out connections beyond the SQLAlchemy pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency; blocking reads include their wait",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+ACTIVE_SSE_CONNECTIONS = Gauge(
+    "sse_active_connections",
+    "Open /chat/stream connections",
+    multiprocess_mode="livesum",
+)
+ACTIVE_GENERATIONS = Gauge(
+    "generations_active",
+    "Chat turns being generated, including those waiting for a slot",
+    multiprocess_mode="livesum",
+)
+STREAM_BACKLOG_ENTRIES = Histogram(
+    "sse_stream_backlog_entries",
+    "Stream entries returned by one read of an SSE viewer, i.e. how far it "
+    "lags behind the generation",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+)
+
+
+def _require_token(app: ASGIApp) -> ASGIApp:
+    """Serve ``app`` only to requests with ``Authorization: Bearer
+    <METRICS_TOKEN>``; without METRICS_TOKEN the metrics are not served."""
+    token = os.getenv("METRICS_TOKEN")
+
+    async def guarded(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            if not token:
+                response = PlainTextResponse("Not Found", status_code=404)
+                await response(scope, receive, send)
+                return
+            scheme, _, credentials = (
+                Headers(scope=scope).get("authorization", "").partition(" ")
+            )
+            if scheme.lower() != "bearer" or not hmac.compare_digest(
+                credentials.encode(), token.encode()
+            ):
+                response = PlainTextResponse(
+                    "Unauthorized",
+                    status_code=401,
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+                await response(scope, receive, send)
+                return
+        await app(scope, receive, send)
+
+    return guarded
+
+
+def make_metrics_app():
+    """ASGI app serving the metrics of all workers, or of this process alone
+    when PROMETHEUS_MULTIPROC_DIR is not set. Scrapers authenticate with the
+    METRICS_TOKEN bearer token."""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return _require_token(make_asgi_app())
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return _require_token(make_asgi_app(registry))
@@ -0,0 +1,84 @@
+"""OpenTelemetry tracing of chat turns.
+
+Code creates spans through the OpenTelemetry API with ``tracer``; until a
+provider is installed they are no-ops. ``setup_tracing`` installs one when
+TRACES_FILE is set, exporting finished spans in batches, off the request
+path, as one JSON object per line appended to that file. Workers may share
+the file: every batch is a single append.
+"""
+
+import os
+import threading
+from collections.abc import Awaitable, Callable, Sequence
+from functools import wraps
+from typing import ParamSpec, TypeVar
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+
+tracer = trace.get_tracer("pravo")
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            if self._file.closed:
+                return SpanExportResult.FAILURE
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30_000) -> bool:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+        return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def setup_tracing(service_name: str = "pravo-api") -> None:
+    path = os.getenv("TRACES_FILE")
+    if not path:
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(path)))
+    trace.set_tracer_provider(provider)
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Run the decorated coroutine function in a span called ``name``."""
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_id() -> str | None:
+    """Hex id of the current trace, or None when tracing is off."""
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
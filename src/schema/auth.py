@@ -1,5 +1,9 @@
+from uuid import UUID
+
 from pydantic import BaseModel, EmailStr, Field
 
+from src.database.plans import SubscriptionPlan
+
 
 # Request Models
 class UserRegisterRequest(BaseModel):
@@ -56,6 +60,16 @@ class UserResponse(BaseModel):
     plan_id: int
 
 
+class Principal(BaseModel):
+    """Authenticated user, as resolved from an access token and cached."""
+
+    id: UUID
+    email: str
+    name: str
+    email_verified: bool
+    plan: SubscriptionPlan
+
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -1,6 +1,12 @@
+import asyncio
 import hashlib
 import os
 import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
 from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
@@ -10,6 +16,12 @@ from fastapi import HTTPException, status
 
 from src.database.refresh_tokens import RefreshToken
 from src.database.users import User
+from src.monitoring.metrics import (
+    PASSWORD_HASH_QUEUE_SECONDS,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAITING,
+)
 
 
 class AuthConfig:
@@ -25,22 +37,141 @@ class AuthConfig:
         os.getenv("EMAIL_VERIFICATION_EXPIRE_HOURS", "24")
     )
     PASSWORD_RESET_EXPIRE_HOURS = int(os.getenv("PASSWORD_RESET_EXPIRE_HOURS", "24"))
+    # Authenticated users are cached in Redis for this long (0 disables the
+    # cache) and in each worker's memory for the shorter local TTL.
+    PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+    PRINCIPAL_LOCAL_TTL_SECONDS = float(os.getenv("PRINCIPAL_LOCAL_TTL_SECONDS", "5"))
+    # bcrypt runs on this many threads per worker. When all are busy, callers
+    # queue; with the "reject" overload policy at most PASSWORD_HASH_MAX_WAITING
+    # of them, for at most PASSWORD_HASH_QUEUE_TIMEOUT seconds, before a 503.
+    # With "wait" they queue without limit.
+    PASSWORD_HASH_WORKERS = int(
+        os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+    )
+    PASSWORD_HASH_OVERLOAD = os.getenv("PASSWORD_HASH_OVERLOAD", "reject")
+    PASSWORD_HASH_MAX_WAITING = int(os.getenv("PASSWORD_HASH_MAX_WAITING", "64"))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+    # Verified access tokens kept per worker; 0 verifies every request anew.
+    ACCESS_TOKEN_CACHE_SIZE = int(os.getenv("ACCESS_TOKEN_CACHE_SIZE", "10000"))
+
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool, off the event loop.
+
+    bcrypt releases the GIL, so up to ``workers`` hashes run in parallel
+    while the loop keeps serving requests and streams. The semaphore, rather
+    than the executor's unbounded queue, holds waiting callers, so their
+    queue time is measured and overload can be refused. A slot is freed when
+    the bcrypt call finishes, not when its caller goes away: the thread
+    cannot be stopped.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        overload: str = "reject",
+        max_waiting: int = 64,
+        queue_timeout: float = 5.0,
+    ):
+        if overload not in ("reject", "wait"):
+            raise ValueError(f"Unknown password hashing overload policy: {overload}")
+        self.overload = overload
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self._slots = asyncio.Semaphore(workers)
+        self._waiting = 0
+
+    def _reject(self, operation: str) -> HTTPException:
+        PASSWORD_HASH_REJECTED.labels(operation).inc()
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перевантажений, спробуйте пізніше",
+            headers={"Retry-After": "1"},
+        )
+
+    async def _acquire(self, operation: str) -> None:
+        if not self._slots.locked():
+            # A slot is free: taken without yielding, so callers arriving in
+            # the same burst see it as taken.
+            await self._slots.acquire()
+            return
+        if self.overload == "reject" and self._waiting >= self.max_waiting:
+            raise self._reject(operation)
+
+        self._waiting += 1
+        PASSWORD_HASH_WAITING.inc()
+        try:
+            if self.overload == "wait":
+                await self._slots.acquire()
+                return
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except TimeoutError:
+                raise self._reject(operation)
+        finally:
+            self._waiting -= 1
+            PASSWORD_HASH_WAITING.dec()
+
+    async def run(self, operation: str, func: Callable[..., T], *args) -> T:
+        queued = time.perf_counter()
+        await self._acquire(operation)
+
+        started = time.perf_counter()
+        PASSWORD_HASH_QUEUE_SECONDS.labels(operation).observe(started - queued)
+        loop = asyncio.get_running_loop()
+
+        def done(_) -> None:
+            # In the bcrypt thread, or in this one if the call never started.
+            PASSWORD_HASH_SECONDS.labels(operation).observe(
+                time.perf_counter() - started
+            )
+            loop.call_soon_threadsafe(self._slots.release)
+
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+
+password_hasher = PasswordHasher(
+    workers=AuthConfig.PASSWORD_HASH_WORKERS,
+    overload=AuthConfig.PASSWORD_HASH_OVERLOAD,
+    max_waiting=AuthConfig.PASSWORD_HASH_MAX_WAITING,
+    queue_timeout=AuthConfig.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
+
+
+def _hash_password(password: str) -> str:
+    salt = bcrypt.gensalt()
+    hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
+    return hashed.decode("utf-8")
+
+
+def _verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
 
 
 class PasswordService:
     """Service for password hashing and verification."""
 
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Hash a password using bcrypt."""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-        return hashed.decode("utf-8")
+    async def hash_password(password: str) -> str:
+        """Hash a password using bcrypt, on the password hashing pool."""
+        return await password_hasher.run("hash", _hash_password, password)
 
     @staticmethod
-    def verify_password(password: str, hashed: str) -> bool:
-        """Verify a password against its hash."""
-        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    async def verify_password(password: str, hashed: str) -> bool:
+        """Verify a password against its hash, on the password hashing pool."""
+        return await password_hasher.run("verify", _verify_password, password, hashed)
 
     @staticmethod
     def validate_password_strength(password: str) -> bool:
@@ -55,9 +186,52 @@ class PasswordService:
         return has_upper and has_lower and has_digit
 
 
+class VerifiedTokenCache:
+    """LRU of decoded access token payloads, keyed by the token's SHA-256.
+
+    A payload is returned until the token's ``exp``, so a cached token never
+    outlives its signature; the raw token is not kept in memory.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, token: str) -> dict | None:
+        key = TokenService.hash_token(token)
+        payload = self._entries.get(key)
+        if payload is None:
+            return None
+        if payload["exp"] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        key = TokenService.hash_token(token)
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(TokenService.hash_token(token), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
 class TokenService:
     """Service for JWT token management."""
 
+    verified_tokens = VerifiedTokenCache(AuthConfig.ACCESS_TOKEN_CACHE_SIZE)
+    # Called with the payload of every access token that passed verification,
+    # cached or not; returning True rejects the token as revoked.
+    revocation_check: Callable[[dict], bool] | None = None
+
     @staticmethod
     def create_access_token(user_id: UUID, email: str) -> tuple[str, datetime]:
         """Create a JWT access token."""
@@ -83,7 +257,21 @@ class TokenService:
 
     @staticmethod
     def verify_access_token(token: str) -> dict:
-        """Verify and decode a JWT access token."""
+        """Verify and decode a JWT access token, or reuse its cached payload."""
+        payload = TokenService.verified_tokens.get(token)
+        if payload is None:
+            payload = TokenService._decode_access_token(token)
+            TokenService.verified_tokens.put(token, payload)
+
+        if TokenService.revocation_check and TokenService.revocation_check(payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Токен відкликано",
+            )
+        return payload
+
+    @staticmethod
+    def _decode_access_token(token: str) -> dict:
         try:
             payload = jwt.decode(
                 token, AuthConfig.SECRET_KEY, algorithms=[AuthConfig.ALGORITHM]
@@ -153,7 +341,9 @@ class AuthService:
         if not user:
             return None
 
-        if not self.password_service.verify_password(password, user.password_hash):
+        if not await self.password_service.verify_password(
+            password, user.password_hash
+        ):
             return None
 
         return user